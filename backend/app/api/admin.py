@@ -1,13 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from elasticsearch import ApiError, TransportError
+from fastapi import APIRouter, UploadFile, File, Depends, Query
 from starlette import status
 from starlette.responses import JSONResponse, Response
 
+from app.core import answer_cache, vectorizer_manager
 from app.core.logs import logger
 from app.dependencies.auth import get_auth_admin_id
 from app.dependencies.db import DDB
+from app.dependencies.es import DES
 from app.exceptions.base import BaseCustomException
 from app.schemas.api import ErrorResponse
 from app.services.admin import AdminServices
+from app.services.ingestion import KnowledgeIngestionService
 from app.types import status_ok
 
 admin_router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -56,3 +60,47 @@ async def sitemap(db: DDB):
     except BaseCustomException as ex:
         logger.exception(ex)
         return ex.json_response
+
+
+@admin_router.post(
+    "/ragbot/ingest",
+    summary="Загрузка статей и базы знаний в индекс RAG-бота",
+    dependencies=[Depends(get_auth_admin_id)],
+)
+async def ragbot_ingest(
+        db: DDB,
+        es: DES,
+        force: bool = Query(False, description="векторизовать все чанки независимо от изменений"),
+):
+    """
+    Инкрементальная загрузка статей и базы знаний о проекте в индекс RAG-бота
+    """
+
+    try:
+        data = await KnowledgeIngestionService(db, es, vectorizer_manager).run(force=force)
+        return {**status_ok, "data": data}
+
+    # сервис векторизации или Elasticsearch недоступен
+    except (RuntimeError, ApiError, TransportError) as ex:
+        logger.error(f"Ошибка загрузки индекса RAG-бота: {ex}")
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=ErrorResponse(detail=str(ex)).model_dump()
+        )
+
+    except BaseCustomException as ex:
+        logger.exception(ex)
+        return ex.json_response
+
+
+@admin_router.get(
+    "/chatbot/answer-cache",
+    summary="Статистика семантического кэша ответов чат-бота",
+    dependencies=[Depends(get_auth_admin_id)],
+)
+async def chatbot_answer_cache():
+    """
+    Статистика семантического кэша ответов чат-бота (попадания, сэкономленные токены LLM)
+    """
+
+    return {**status_ok, "data": answer_cache.get_stats()}
@@ -28,9 +28,52 @@ BUCKET_IMAGES = "images"
 ARTICLES_INDEX_NAME = "articles"
 RAGBOT_INDEX_NAME = "rag-bot"
 
+# источник чанков RAG-бота
+RAGBOT_RETRIEVER_ES = "es"  # kNN-поиск Elasticsearch
+RAGBOT_RETRIEVER_VECTORIZER = "vectorizer"  # индекс сервиса векторизации (текст чанка в метаданных "text")
+RAGBOT_RETRIEVER_PGVECTOR = "pgvector"  # HNSW-поиск pgvector по базе знаний (также если Elasticsearch не настроен)
+RAGBOT_RETRIEVER = RAGBOT_RETRIEVER_ES
+
+# поиск чанков RAG-бота в Elasticsearch
+RAGBOT_HYBRID_SEARCH = True  # гибридный поиск: полнотекстовый (BM25) и kNN, объединение Reciprocal Rank Fusion
+RAGBOT_HYBRID_CANDIDATES = 50  # количество лучших чанков каждого поиска для объединения
+RAGBOT_KNN_NUM_CANDIDATES = 100  # количество кандидатов kNN-поиска на шард (больше - выше полнота, но медленнее)
+RAGBOT_RRF_RANK_CONSTANT = 60  # константа Reciprocal Rank Fusion (больше - меньше вес первых позиций)
+
+# поиск чанков базы знаний в PostgreSQL (pgvector)
+RAGBOT_EMBEDDING_DIMS = 384  # размерность векторов модели сервиса векторизации
+RAGBOT_PGVECTOR_HNSW_M = 16  # количество связей вершины графа HNSW
+RAGBOT_PGVECTOR_HNSW_EF_CONSTRUCTION = 64  # размер списка кандидатов при построении графа HNSW
+RAGBOT_PGVECTOR_EF_SEARCH = 40  # размер списка кандидатов при поиске (больше - выше полнота, но медленнее)
+
+# переранжирование чанков RAG-бота кросс-энкодером сервиса векторизации
+RAGBOT_RERANK_CANDIDATES = 0  # количество кандидатов поиска для переранжирования (0 - без переранжирования)
+RAGBOT_RERANK_TIMEOUT = 0.5  # бюджет задержки переранжирования (в секундах), при превышении - порядок поиска
+
+# загрузка статей и базы знаний о проекте в индекс RAG-бота
+RAGBOT_CHUNK_SIZE = 200  # размер чанка (в словах)
+RAGBOT_CHUNK_OVERLAP = 40  # перекрытие соседних чанков (в словах)
+RAGBOT_INGEST_BATCH_SIZE = 32  # количество чанков в одном запросе векторизации
+RAGBOT_INGEST_CONCURRENCY = 4  # количество одновременно выполняемых запросов векторизации
+RAGBOT_INGEST_DB_BATCH_SIZE = 100  # количество строк, читаемых из базы за раз
+RAGBOT_INGEST_PROGRESS_INTERVAL = 10  # интервал вывода прогресса загрузки (в секундах)
+
 # настройки GigaChat API
 GIGACHAT_USER_MESSAGE_MAX_SIZE = 200  # максимальная длина сообщения от пользователя
 
+# поиск чанков RAG-бота одновременно с определением темы сообщения (до ответа LLM)
+CHATBOT_SPECULATIVE_RETRIEVAL = True
+# опережающий поиск выполняется, пока доля вопросов по теме проекта среди последних ответов не ниже порога
+# (иначе поиск почти всегда напрасен и только удваивает векторизацию запросов), 0 - всегда
+CHATBOT_SPECULATIVE_MIN_PROJECT_SHARE = 0.2
+CHATBOT_SPECULATIVE_WINDOW = 200  # количество последних ответов для оценки доли
+
+# семантический кэш ответов чат-бота (для вопросов без предшествующей истории чата)
+CHATBOT_ANSWER_CACHE_ENABLED = True
+CHATBOT_ANSWER_CACHE_THRESHOLD = 0.95  # минимальная косинусная близость вопросов для ответа из кэша
+CHATBOT_ANSWER_CACHE_TTL = 3600  # срок хранения ответа (в секундах)
+CHATBOT_ANSWER_CACHE_MAX_ENTRIES = 2000  # максимальное количество ответов в кэше
+
 # настройки типов и размеров загружаемых изображений
 MAX_IMAGE_FILE_SIZE = 1 * 1024 * 1024  # максимальный размер загружаемого изображения (1 Mb)
 ALLOWED_IMAGE_TYPES = {
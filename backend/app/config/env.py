@@ -62,7 +62,13 @@ class Settings(BaseSettings):
     S3_DIRECT_URL: str | None = ""  # url для доступа к данным в S3
 
     # подключение к Vectorizer
-    VECTORIZER_GRPC_ADDRESS: str | None = None
+    VECTORIZER_GRPC_ADDRESS: str | None = None  # адрес сервиса или адреса реплик через запятую
+    VECTORIZER_GRPC_UDS: str | None = None  # Unix-сокеты сервиса на том же хосте (предпочтительнее TCP)
+    VECTORIZER_MAX_RETRIES: int = 3  # повторы запроса при перегрузке или недоступности сервиса
+    VECTORIZER_CHANNELS: int = 2  # количество долгоживущих каналов (соединений) к сервису
+    VECTORIZER_TIMEOUT: float = 10.0  # срок выполнения одного запроса к сервису (в секундах)
+    VECTORIZER_BALANCING: str = "least_outstanding"  # балансировка реплик: least_outstanding или round_robin
+    VECTORIZER_HEALTH_CHECK_INTERVAL: float = 5.0  # интервал проверки готовности реплик (в секундах)
 
     # учётная запись админа по умолчанию (создаётся при первом запуске)
     ADMIN_USER: str | None = None
@@ -1,5 +1,7 @@
+from app.config.app import CHATBOT_ANSWER_CACHE_MAX_ENTRIES, CHATBOT_ANSWER_CACHE_THRESHOLD, CHATBOT_ANSWER_CACHE_TTL
 from app.config.chatbot import ChatBotSettingsManager
 from app.config.env import settings
+from app.core.answer_cache import SemanticAnswerCache
 from app.core.cache_manager import CacheManager
 from app.core.es_manager import ESManager
 from app.core.http_manager import HTTPManager
@@ -29,5 +31,20 @@ ws_manager = WSManager()
 # инициализация менеджера настроек чат-бота
 chatbot_settings = ChatBotSettingsManager()
 
+# инициализация семантического кэша ответов чат-бота
+answer_cache = SemanticAnswerCache(
+    threshold=CHATBOT_ANSWER_CACHE_THRESHOLD,
+    ttl=CHATBOT_ANSWER_CACHE_TTL,
+    max_entries=CHATBOT_ANSWER_CACHE_MAX_ENTRIES,
+)
+
 # инициализация менеджера векторизатора текста
-vectorizer_manager = VectorizerManager(server_address=settings.VECTORIZER_GRPC_ADDRESS)
+vectorizer_manager = VectorizerManager(
+    server_address=settings.VECTORIZER_GRPC_ADDRESS,
+    uds_address=settings.VECTORIZER_GRPC_UDS,
+    max_retries=settings.VECTORIZER_MAX_RETRIES,
+    channels=settings.VECTORIZER_CHANNELS,
+    timeout=settings.VECTORIZER_TIMEOUT,
+    balancing=settings.VECTORIZER_BALANCING,
+    health_check_interval=settings.VECTORIZER_HEALTH_CHECK_INTERVAL,
+)
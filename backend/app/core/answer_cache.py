@@ -0,0 +1,219 @@
+""" Семантический кэш ответов чат-бота """
+
+import hashlib
+import re
+import time
+
+import numpy as np
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.db.models.chatbot import MessageIntent
+from app.schemas.chatbot import SChatBotSettings
+
+# темы сообщений, ответы на которые кэшируются
+CACHEABLE_INTENTS = (str(MessageIntent.intent_ontopic), str(MessageIntent.intent_project))
+
+
+def normalize_question(text: str) -> str:
+    """
+    Нормализация вопроса для точного совпадения: регистр, ё, знаки препинания и пробелы
+    """
+
+    text = text.casefold().replace("ё", "е")
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+
+def question_anchors(text: str) -> frozenset[str]:
+    """
+    Слова вопроса с цифрами (модели, номера, годы): у семантически близких вопросов они должны совпадать,
+    так как векторы вопросов "Ту-144" и "Ту-154" почти не различаются
+    """
+
+    return frozenset(word for word in normalize_question(text).split() if any(char.isdigit() for char in word))
+
+
+def prompt_fingerprints(settings: SChatBotSettings) -> dict[str, str]:
+    """
+    Отпечатки настроек LLM, от которых зависят ответы каждой темы: при изменении промта ответы темы устаревают
+    """
+
+    def fingerprint(*values: str | None) -> str:
+        return hashlib.sha256("\x00".join(value or "" for value in values).encode("utf-8")).hexdigest()
+
+    return {
+        str(MessageIntent.intent_ontopic): fingerprint(settings.model, settings.system_prompt),
+        str(MessageIntent.intent_project): fingerprint(settings.model, settings.system_prompt, settings.rag_prompt),
+    }
+
+
+@dataclass
+class CachedAnswer:
+    """
+    Ответ в кэше
+    """
+
+    question: str  # нормализованный вопрос
+    vector: np.ndarray | None  # нормированный вектор вопроса
+    intent: str  # тема сообщения
+    answer: str  # ответ LLM
+    tokens: int  # токенов, потраченных на ответ
+    fingerprint: str  # отпечаток настроек LLM темы на момент ответа
+    anchors: frozenset[str]  # слова вопроса с цифрами
+    created: float
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """
+    Кэш ответов LLM по вопросам пользователей (в пределах процесса).
+
+    Ответ ищется сначала по точному совпадению нормализованного вопроса, затем по косинусной близости
+    векторов вопросов не ниже threshold среди вопросов с теми же словами с цифрами. Ответы хранятся с темой
+    сообщения и отпечатком промтов этой темы, ответы с устаревшим отпечатком или старше ttl секунд удаляются
+    при поиске; при превышении max_entries удаляются давно не использованные ответы.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600, max_entries: int = 2000) -> None:
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._matrix: np.ndarray | None = None  # векторы вопросов (строки в порядке _entries)
+        self._matrix_keys: list[str] = []
+
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "invalidated": 0,  # удалено ответов с устаревшими промтами
+            "saved_tokens": 0,  # токенов LLM, не потраченных благодаря кэшу
+        }
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._matrix = None
+
+    def _is_valid(self, entry: CachedAnswer, fingerprints: dict[str, str]) -> bool:
+        return fingerprints.get(entry.intent) == entry.fingerprint and time.monotonic() - entry.created < self.ttl
+
+    def invalidate(self, fingerprints: dict[str, str]) -> int:
+        """
+        Удаление ответов с устаревшими промтами и истёкшим сроком хранения
+        """
+
+        stale = [key for key, entry in self._entries.items() if not self._is_valid(entry, fingerprints)]
+        for key in stale:
+            if fingerprints.get(self._entries[key].intent) != self._entries[key].fingerprint:
+                self.stats["invalidated"] += 1
+            self._drop(key)
+
+        return len(stale)
+
+    def _hit(self, key: str, stat: str) -> CachedAnswer:
+        entry = self._entries[key]
+        entry.hits += 1
+        self._entries.move_to_end(key)
+
+        self.stats[stat] += 1
+        self.stats["saved_tokens"] += entry.tokens
+
+        return entry
+
+    def get_exact(self, question: str, fingerprints: dict[str, str]) -> CachedAnswer | None:
+        """
+        Ответ на вопрос, совпадающий после нормализации
+        """
+
+        self.invalidate(fingerprints)
+
+        key = normalize_question(question)
+        return self._hit(key, "exact_hits") if key in self._entries else None
+
+    def search(self, question: str, vector: np.ndarray | None, fingerprints: dict[str, str]) -> CachedAnswer | None:
+        """
+        Ответ на наиболее близкий вопрос (косинусная близость не ниже threshold) с теми же словами с цифрами
+        """
+
+        self.invalidate(fingerprints)
+
+        if vector is None or not len(vector):
+            self.stats["misses"] += 1
+            return None
+
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry.vector is not None]
+            self._matrix = (
+                np.stack([self._entries[key].vector for key in self._matrix_keys]) if self._matrix_keys else None
+            )
+
+        query = self.normalize_vector(vector)
+        if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+            self.stats["misses"] += 1
+            return None
+
+        similarities = self._matrix @ query
+        anchors = question_anchors(question)
+
+        close = np.flatnonzero(similarities >= self.threshold)
+        for row in close[np.argsort(-similarities[close], kind="stable")]:
+            key = self._matrix_keys[row]
+            if self._entries[key].anchors == anchors:
+                return self._hit(key, "semantic_hits")
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(
+            self,
+            question: str,
+            vector: np.ndarray | None,
+            intent: str,
+            answer: str,
+            tokens: int,
+            fingerprints: dict[str, str],
+    ) -> None:
+        """
+        Сохранение ответа (только для кэшируемых тем)
+        """
+
+        if intent not in CACHEABLE_INTENTS or not answer or intent not in fingerprints:
+            return
+
+        key = normalize_question(question)
+        self._drop(key)
+        self._entries[key] = CachedAnswer(
+            question=key,
+            vector=self.normalize_vector(vector) if vector is not None and len(vector) else None,
+            intent=intent,
+            answer=answer,
+            tokens=tokens,
+            fingerprint=fingerprints[intent],
+            anchors=question_anchors(question),
+            created=time.monotonic(),
+        )
+
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    @staticmethod
+    def normalize_vector(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._matrix = None
+
+    def get_stats(self) -> dict:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -4,7 +4,7 @@ from datetime import datetime
 from fastapi import FastAPI
 
 from app.config.env import settings, AppMode
-from app.core import rmq_manager, cache_manager, es_manager, chatbot_settings
+from app.core import rmq_manager, cache_manager, es_manager, chatbot_settings, vectorizer_manager
 from app.core.db_manager import DBManager
 from app.core.logs import logger
 from app.core.logs_handlers import add_logging_handler
@@ -48,6 +48,10 @@ async def lifespan(fastapi_app: FastAPI):  # noqa
         await es_manager.start()
         logger.info("Elasticsearch connected")
 
+    if vectorizer_manager.server_address:
+        await vectorizer_manager.start()
+        logger.info("Vectorizer channels opened")
+
     db_manager = DBManager(session_factory=async_session_maker)
     async with db_manager as db:
         try:
@@ -62,6 +66,10 @@ async def lifespan(fastapi_app: FastAPI):  # noqa
 
     yield
 
+    if vectorizer_manager.server_address:
+        await vectorizer_manager.close()
+        logger.info("Vectorizer channels closed")
+
     if es_manager.url:
         await es_manager.close()
         logger.info("Elasticsearch stopped")
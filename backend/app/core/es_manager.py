@@ -5,10 +5,11 @@
 import asyncio
 
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 
 from elasticsearch import AsyncElasticsearch
 from elasticsearch.exceptions import ConnectionError, NotFoundError, AuthenticationException
+from elasticsearch.helpers import async_bulk, async_scan
 
 from app.config.env import settings, AppMode
 from app.core.logs import logger
@@ -167,6 +168,41 @@ class ESManager:
                 logger.error(f"Ошибка при удалении из ES: {ex}")
                 return False
 
+    async def bulk(self, actions: list[Dict[str, Any]]) -> tuple[int, list[Dict[str, Any]]]:
+        """
+        Пакетное индексирование и удаление документов (действия повторяемы, поэтому пакет повторяется целиком).
+        Возвращает количество выполненных действий и ошибки отдельных действий
+        """
+
+        if not self.es or not actions:
+            return 0, []
+
+        for attempt in range(self.max_retries):
+            try:
+                return await async_bulk(self.es, actions, raise_on_error=False)
+
+            except ConnectionError:
+                if attempt == self.max_retries - 1:
+                    logger.error(f"ES недоступен для пакетной записи после {self.max_retries} попыток")
+                    return 0, [{"error": "connection"}]
+                logger.warning(f"Ошибка подключения к ES при пакетной записи (попытка {attempt + 1})")
+                await asyncio.sleep(1 * (attempt + 1))
+
+            except Exception as ex:
+                logger.error(f"Ошибка при пакетной записи в ES: {ex}")
+                return 0, [{"error": str(ex)}]
+
+    async def scan(self, index: str, query: Dict[str, Any] | None = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Чтение всех документов индекса, соответствующих запросу (пустой результат, если индекса нет)
+        """
+
+        if not self.es or not await self.es.indices.exists(index=index):
+            return
+
+        async for hit in async_scan(self.es, index=index, query=query or {"query": {"match_all": {}}}, **kwargs):
+            yield hit
+
     async def health_check(self) -> bool:
         """
         Проверка подключения Elasticsearch
@@ -1,29 +1,212 @@
+import asyncio
 import grpc
+import numpy as np
+import random
+import time
 
-from app.core.grpc_clients import vectorizer_pb2_grpc, vectorizer_pb2
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+from app.core.grpc_clients import vectorizer_pb2
+from app.core.vectorizer_balancer import BalancingPolicy, ReplicaBalancer, VectorizerReplica, parse_targets
+
+EmbeddingFormat = vectorizer_pb2.EmbeddingFormat  # noqa
+
+# название сервиса для проверки готовности по протоколу gRPC Health Checking
+VECTORIZER_SERVICE_NAME = vectorizer_pb2.DESCRIPTOR.services_by_name["VectorizerService"].full_name  # noqa
+
+# коды ошибок, после которых запрос повторяется (сервис перегружен или временно недоступен)
+RETRYABLE_CODES = (grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.UNAVAILABLE)
+# ключ метаданных с рекомендуемой сервисом задержкой повтора (в миллисекундах)
+RETRY_PUSHBACK_KEY = "grpc-retry-pushback-ms"
+
+# параметры долгоживущих каналов: keepalive-пинги обнаруживают разорванные соединения,
+# переподключение выполняется с экспоненциальной задержкой
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.initial_reconnect_backoff_ms", 200),
+    ("grpc.min_reconnect_backoff_ms", 200),
+    ("grpc.max_reconnect_backoff_ms", 10_000),
+    # отдельное соединение на каждый канал пула (иначе каналы с одинаковыми параметрами делят соединение)
+    ("grpc.use_local_subchannel_pool", 1),
+]
+
+# типы данных упакованных форматов векторов (little-endian)
+PACKED_DTYPES = {
+    EmbeddingFormat.FORMAT_FLOAT32: np.dtype("<f4"),
+    EmbeddingFormat.FORMAT_FLOAT16: np.dtype("<f2"),
+    EmbeddingFormat.FORMAT_INT8: np.dtype("i1"),
+}
+
+
+def unpack_embeddings(packed: vectorizer_pb2.PackedEmbeddings) -> np.ndarray:  # noqa
+    """
+    Распаковка векторов в матрицу NumPy (для float32 и float16 - без копирования, только чтение)
+    """
+
+    dtype = PACKED_DTYPES.get(packed.format)
+    if dtype is None:
+        raise ValueError(f"Неизвестный формат упаковки векторов: {packed.format}")
+
+    matrix = np.frombuffer(packed.data, dtype=dtype).reshape(packed.count, packed.dim)
+
+    if packed.format == EmbeddingFormat.FORMAT_INT8:
+        scales = np.asarray(packed.scales, dtype=np.float32)
+        return matrix.astype(np.float32) * scales[:, None]
+
+    return matrix
+
+
+def retry_delay(ex: grpc.aio.AioRpcError, attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Задержка перед повтором запроса (в секундах): подсказка сервиса или экспоненциальный рост,
+    со случайным разбросом вверх, чтобы отклонённые одновременно клиенты не повторяли запросы одновременно
+    """
+
+    delay = base_delay * 2 ** attempt
+    pushback = (ex.trailing_metadata() or {}).get(RETRY_PUSHBACK_KEY)
+    if pushback:
+        try:
+            delay = int(pushback) / 1000
+        except ValueError:
+            pass
+
+    return min(max_delay, delay) * random.uniform(1.0, 1.5)
 
 
 class VectorizerManager:
-    def __init__(self, server_address: str | None = None):
-        self.server_address = server_address
-        self._channel = None
-        self._stub = None
+    def __init__(
+            self,
+            server_address: str | list[str] | None = None,
+            uds_address: str | list[str] | None = None,
+            embedding_format: int = EmbeddingFormat.FORMAT_FLOAT32,
+            max_retries: int = 3,
+            retry_base_delay: float = 0.1,
+            retry_max_delay: float = 5.0,
+            channels: int = 1,
+            timeout: float | None = 10.0,
+            balancing: str = BalancingPolicy.least_outstanding,
+            health_check_interval: float = 5.0,
+    ):
+        # Unix-сокеты сервиса на том же хосте используются, пока доступны, TCP-адреса - как резерв
+        uds_targets = parse_targets(uds_address)
+        tcp_targets = [target for target in parse_targets(server_address) if target not in uds_targets]
 
-    async def __aenter__(self):
-        if not self.server_address:
+        self.server_address = server_address or uds_address  # адрес сервиса или адреса реплик (через запятую)
+        self.embedding_format = embedding_format  # формат передачи векторов от сервиса
+        self.max_retries = max_retries  # количество повторов при перегрузке или недоступности сервиса
+        self.retry_base_delay = retry_base_delay  # начальная задержка повтора без подсказки сервиса (в секундах)
+        self.retry_max_delay = retry_max_delay  # максимальная задержка повтора (в секундах)
+        self.channels = max(1, channels)  # количество каналов (соединений HTTP/2) к каждой реплике
+        self.timeout = timeout  # срок выполнения одного вызова (в секундах)
+
+        self.balancer = ReplicaBalancer(
+            replicas=[
+                VectorizerReplica(target, channels=self.channels, options=CHANNEL_OPTIONS, priority=priority)
+                for priority, targets in enumerate((uds_targets, tcp_targets))
+                for target in targets
+            ],
+            policy=balancing,
+            health_check_interval=health_check_interval,
+            health_check_service=VECTORIZER_SERVICE_NAME,
+        )
+
+        self._opened = False
+        self._temporary = False  # каналы открыты контекстным менеджером, а не start()
+        self._context_users = 0
+
+    async def start(self):
+        """
+        Открытие долгоживущих каналов ко всем репликам (при запуске приложения) и запуск проверок готовности,
+        соединения устанавливаются в фоне
+        """
+
+        if not self.server_address or self._opened:
             return
 
-        # создание асинхронного gRPC-канала
-        self._channel = grpc.aio.insecure_channel(self.server_address)
-        self._stub = vectorizer_pb2_grpc.VectorizerServiceStub(self._channel)
+        for replica in self.balancer.replicas:
+            replica.open()
+
+        self._opened = True
+        self.balancer.start_health_checks()
+
+    async def close(self):
+        """
+        Остановка проверок готовности и закрытие каналов
+        """
+
+        self._opened = False
+        self._temporary = False
+
+        await self.balancer.stop_health_checks()
+        for replica in self.balancer.replicas:
+            await replica.close()
 
+    async def __aenter__(self):
+        # каналы, открытые при запуске приложения, используются повторно; иначе открываются на время контекста
+        if not self._opened:
+            await self.start()
+            self._temporary = True
+
+        self._context_users += 1
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._channel:
-            await self._channel.close()
+        self._context_users -= 1
+        if self._temporary and self._context_users == 0:
+            await self.close()
+
+    def replica_stats(self) -> list[dict]:
+        """
+        Состояние и счётчики реплик: доступность, выполняющиеся запросы, ошибки, средняя задержка
+        """
 
-    async def embed_text(self, text: str) -> list[float]:
+        return self.balancer.stats()
+
+    async def _call(self, method: str, request, timeout: float | None = None, retries: int | None = None):
+        """
+        Вызов RPC на выбранной балансировщиком реплике с повтором при перегрузке (RESOURCE_EXHAUSTED)
+        или недоступности (UNAVAILABLE) сервиса.
+
+        Повтор направляется на другую доступную реплику без задержки, если такая есть, иначе - после задержки.
+        Каждая попытка ограничена сроком timeout. При единственной реплике на время переподключения канала
+        вызов ожидает готовности соединения (wait_for_ready), а не завершается ошибкой сразу.
+        """
+
+        # истечение укороченного срока вызова не считается неисправностью реплики
+        short_deadline = timeout is not None and self.timeout is not None and timeout < self.timeout
+        timeout = timeout or self.timeout
+        retries = self.max_retries if retries is None else retries
+        wait_for_ready = len(self.balancer.replicas) == 1
+
+        tried: set[str] = set()
+        attempt = 0
+        while True:
+            replica = self.balancer.pick(exclude=tried)
+            tried.add(replica.target)
+
+            started = time.monotonic()
+            replica.in_flight += 1
+            try:
+                response = await getattr(replica.stub, method)(request, timeout=timeout, wait_for_ready=wait_for_ready)
+                self.balancer.record(replica, time.monotonic() - started)
+                return response
+
+            except grpc.aio.AioRpcError as ex:
+                self.balancer.record(replica, time.monotonic() - started, ex.code(), short_deadline)
+                if ex.code() not in RETRYABLE_CODES or attempt >= retries:
+                    raise
+
+                if not self.balancer.has_alternative(tried):
+                    await asyncio.sleep(retry_delay(ex, attempt, self.retry_base_delay, self.retry_max_delay))
+                attempt += 1
+
+            finally:
+                replica.in_flight -= 1
+
+    async def embed_text(self, text: str, model: str | None = None) -> list[float]:
         """
         Векторизация текста
         """
@@ -31,13 +214,17 @@ class VectorizerManager:
         if not self.server_address:
             return []
 
-        if not self._stub:
+        if not self._opened:
             raise RuntimeError("Клиент не инициализирован")
 
-        request = vectorizer_pb2.EmbedTextRequest(text=text)  # noqa
+        request = vectorizer_pb2.EmbedTextRequest(text=text, format=self.embedding_format, model=model)  # noqa
 
         try:
-            response = await self._stub.EmbedText(request)
+            response = await self._call("EmbedText", request)
+
+            if response.HasField("packed"):
+                return unpack_embeddings(response.packed)[0].tolist()
+
             return list(response.embedding)
 
         except grpc.aio.AioRpcError as ex:
@@ -46,7 +233,47 @@ class VectorizerManager:
         except Exception as ex:
             raise RuntimeError(f"Произошла ошибка: {ex}")
 
-    async def embed_text_batch(self, texts: list[str]) -> list[list[float]]:
+    async def embed_long_text(
+            self,
+            text: str,
+            return_windows: bool = False,
+            model: str | None = None,
+    ) -> tuple[list[float], np.ndarray | None]:
+        """
+        Векторизация длинного текста (например, статьи целиком): сервис разбивает текст на перекрывающиеся окна
+        и возвращает объединённый вектор, а при return_windows - также матрицу векторов окон
+        """
+
+        if not self.server_address:
+            return [], None
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.EmbedTextRequest(  # noqa
+            text=text,
+            format=self.embedding_format,
+            model=model,
+            chunking=True,
+            return_windows=return_windows,
+        )
+
+        try:
+            response = await self._call("EmbedText", request)
+
+            if response.HasField("packed"):
+                embedding = unpack_embeddings(response.packed)[0].tolist()
+            else:
+                embedding = list(response.embedding)
+
+            windows = unpack_embeddings(response.windows) if response.HasField("windows") else None
+
+            return embedding, windows
+
+        except grpc.aio.AioRpcError as ex:
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    async def embed_text_batch(self, texts: list[str], model: str | None = None) -> list[list[float]]:
         """
         Векторизация массива текстов
         """
@@ -54,17 +281,362 @@ class VectorizerManager:
         if not self.server_address:
             return []
 
-        if not self._stub:
+        return (await self.embed_text_batch_array(texts, model=model)).tolist()
+
+    async def embed_text_batch_array(
+            self,
+            texts: list[str],
+            embedding_format: int | None = None,
+            model: str | None = None,
+    ) -> np.ndarray:
+        """
+        Векторизация массива текстов в матрицу NumPy
+        """
+
+        if not self.server_address:
+            return np.empty((0, 0), dtype=np.float32)
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        if embedding_format is None:
+            embedding_format = self.embedding_format
+
+        request = vectorizer_pb2.EmbedTextBatchRequest(texts=texts, format=embedding_format, model=model)  # noqa
+
+        try:
+            response = await self._call("EmbedTextBatch", request)
+
+            if response.HasField("packed"):
+                return unpack_embeddings(response.packed)
+
+            # сервис без поддержки упакованного формата
+            if not response.embeddings:
+                return np.empty((0, 0), dtype=np.float32)
+
+            return np.array(
+                [embedding_result.embedding for embedding_result in response.embeddings],
+                dtype=np.float32
+            )
+
+        except grpc.aio.AioRpcError as ex:
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+        except Exception as ex:
+            raise RuntimeError(f"Произошла ошибка: {ex}")
+
+    async def embed_text_stream(
+            self,
+            items: AsyncIterable[tuple[str, str]] | Iterable[tuple[str, str]],
+            embedding_format: int | None = None,
+            model: str | None = None,
+    ) -> AsyncIterator[tuple[list[str], np.ndarray]]:
+        """
+        Потоковая векторизация корпуса текстов.
+
+        Принимает пары (id, текст), возвращает асинхронный итератор пакетов (список id, матрица векторов).
+        Тексты отправляются по мере чтения результатов, поэтому память не зависит от размера корпуса.
+        """
+
+        if not self.server_address:
+            return
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        if embedding_format is None:
+            embedding_format = self.embedding_format
+
+        def make_request(doc_id: str, text: str):
+            return vectorizer_pb2.EmbedTextStreamRequest(  # noqa
+                id=doc_id,
+                text=text,
+                format=embedding_format,
+                model=model,
+            )
+
+        async def requests():
+            if isinstance(items, AsyncIterable):
+                async for doc_id, text in items:
+                    yield make_request(doc_id, text)
+            else:
+                for doc_id, text in items:
+                    yield make_request(doc_id, text)
+
+        # поток целиком обрабатывается одной репликой
+        replica = self.balancer.pick()
+        call = replica.stub.EmbedTextStream(requests(), wait_for_ready=len(self.balancer.replicas) == 1)
+
+        started = time.monotonic()
+        replica.in_flight += 1
+        try:
+            async for response in call:
+                yield list(response.ids), unpack_embeddings(response.packed)
+
+            self.balancer.record(replica, time.monotonic() - started)
+
+        except grpc.aio.AioRpcError as ex:
+            self.balancer.record(replica, time.monotonic() - started, ex.code())
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+        finally:
+            replica.in_flight -= 1
+            call.cancel()
+
+    async def get_stats(self) -> dict[str, float]:
+        """
+        Получение счётчиков сервиса векторизации (кэш и т.д.)
+        """
+
+        if not self.server_address:
+            return {}
+
+        if not self._opened:
             raise RuntimeError("Клиент не инициализирован")
 
-        request = vectorizer_pb2.EmbedTextBatchRequest(texts=texts)  # noqa
+        request = vectorizer_pb2.GetStatsRequest()  # noqa
 
         try:
-            response = await self._stub.EmbedTextBatch(request)
-            return [list(embedding_result.embedding) for embedding_result in response.embeddings]
+            response = await self._call("GetStats", request)
+            return dict(response.stats)
 
         except grpc.aio.AioRpcError as ex:
             raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
 
         except Exception as ex:
             raise RuntimeError(f"Произошла ошибка: {ex}")
+
+    async def is_ready(self, timeout: float = 1.0) -> bool:
+        """
+        Проверка готовности сервиса векторизации (модель загружена и прогрета хотя бы на одной реплике)
+        """
+
+        if not self.server_address:
+            return False
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        results = await asyncio.gather(*(
+            self.balancer.check(replica, timeout=timeout) for replica in self.balancer.replicas
+        ))
+
+        return any(results)
+
+    async def index_upsert(
+            self,
+            index: str,
+            items: list[dict],
+            model: str | None = None,
+    ) -> int:
+        """
+        Добавление или замена элементов индекса сервиса векторизации.
+
+        Элемент - словарь с ключами id, text или vector, metadata (словарь строк).
+        """
+
+        if not self.server_address:
+            return 0
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.UpsertRequest(  # noqa
+            index=index,
+            items=[
+                vectorizer_pb2.IndexItem(  # noqa
+                    id=item["id"],
+                    text=item.get("text", ""),
+                    vector=item.get("vector", []),
+                    metadata=item.get("metadata", {}),
+                )
+                for item in items
+            ],
+            model=model,
+        )
+
+        try:
+            response = await self._call("Upsert", request)
+            return response.upserted
+
+        except grpc.aio.AioRpcError as ex:
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    async def index_delete(
+            self,
+            index: str,
+            ids: list[str] | None = None,
+            metadata_filter: dict[str, str] | None = None,
+    ) -> int:
+        """
+        Удаление элементов индекса сервиса векторизации по идентификаторам и (или) метаданным
+        """
+
+        if not self.server_address:
+            return 0
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.DeleteRequest(index=index, ids=ids or [], filter=metadata_filter or {})  # noqa
+
+        try:
+            response = await self._call("Delete", request)
+            return response.deleted
+
+        except grpc.aio.AioRpcError as ex:
+            if ex.code() == grpc.StatusCode.NOT_FOUND:
+                return 0
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    async def index_list(self, index: str, fields: list[str] | None = None, page_size: int = 1000) -> list[dict]:
+        """
+        Идентификаторы и метаданные (только поля fields, если заданы) всех элементов индекса
+        сервиса векторизации, запрашиваются страницами по page_size элементов
+        """
+
+        if not self.server_address:
+            return []
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        items = []
+        try:
+            while True:
+                request = vectorizer_pb2.ListRequest(  # noqa
+                    index=index, fields=fields or [], offset=len(items), limit=page_size
+                )
+                response = await self._call("List", request)
+                items.extend({"id": item.id, "metadata": dict(item.metadata)} for item in response.items)
+
+                if len(response.items) < page_size:
+                    return items
+
+        except grpc.aio.AioRpcError as ex:
+            if ex.code() == grpc.StatusCode.NOT_FOUND:
+                return []
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    async def index_search(
+            self,
+            index: str,
+            text: str = "",
+            vector: list[float] | None = None,
+            top_k: int = 5,
+            metadata_filter: dict[str, str] | None = None,
+    ) -> list[dict]:
+        """
+        Поиск ближайших элементов в индексе сервиса векторизации (по тексту или по вектору)
+        """
+
+        if not self.server_address:
+            return []
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.SearchRequest(  # noqa
+            index=index,
+            text=text,
+            vector=vector or [],
+            top_k=top_k,
+            filter=metadata_filter or {},
+        )
+
+        try:
+            response = await self._call("Search", request)
+            return [{"id": hit.id, "score": hit.score, "metadata": dict(hit.metadata)} for hit in response.hits]
+
+        except grpc.aio.AioRpcError as ex:
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    async def start_migration(
+            self,
+            index: str,
+            model: str,
+            text_field: str = "",
+            drop_source: bool = False,
+    ) -> dict:
+        """
+        Запуск переноса индекса на другую модель: новая версия индекса строится сервисом в фоне,
+        поиск до переключения псевдонима выполняется в прежней версии
+        """
+
+        if not self.server_address:
+            raise RuntimeError("Сервис векторизации не настроен")
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.StartMigrationRequest(  # noqa
+            index=index,
+            model=model,
+            text_field=text_field,
+            drop_source=drop_source,
+        )
+
+        try:
+            response = await self._call("StartMigration", request)
+            return self._migration_status(response)
+
+        except grpc.aio.AioRpcError as ex:
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    async def get_migration(self, index: str) -> dict | None:
+        """
+        Состояние, прогресс и скорость переноса индекса (None - перенос не выполнялся)
+        """
+
+        if not self.server_address:
+            return None
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.GetMigrationRequest(index=index)  # noqa
+
+        try:
+            response = await self._call("GetMigration", request)
+            return self._migration_status(response)
+
+        except grpc.aio.AioRpcError as ex:
+            if ex.code() == grpc.StatusCode.NOT_FOUND:
+                return None
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
+
+    @staticmethod
+    def _migration_status(response: vectorizer_pb2.MigrationStatus) -> dict:  # noqa
+        return {
+            field.name: getattr(response, field.name)
+            for field in response.DESCRIPTOR.fields
+        }
+
+    async def rerank(
+            self,
+            query: str,
+            candidates: list[str],
+            top_k: int = 0,
+            timeout: float | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Переранжирование кандидатов кросс-энкодером сервиса векторизации.
+
+        Возвращает пары (позиция кандидата, оценка) по убыванию оценки. Запрос не повторяется:
+        timeout - бюджет задержки, по его истечении вызывающий код использует исходный порядок кандидатов.
+        """
+
+        if not self.server_address or not candidates:
+            return []
+
+        if not self._opened:
+            raise RuntimeError("Клиент не инициализирован")
+
+        request = vectorizer_pb2.RerankRequest(query=query, candidates=candidates, top_k=top_k)  # noqa
+
+        try:
+            response = await self._call("Rerank", request, timeout=timeout, retries=0)
+            return [(hit.index, hit.score) for hit in response.hits]
+
+        except grpc.aio.AioRpcError as ex:
+            raise RuntimeError(f"Ошибка gRPC: {ex.code()}, {ex.details()}")
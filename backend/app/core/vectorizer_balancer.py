@@ -0,0 +1,273 @@
+"""
+Балансировка запросов между репликами сервиса векторизации
+"""
+
+import asyncio
+import grpc
+import itertools
+import time
+
+from grpc_health.v1 import health_pb2, health_pb2_grpc
+
+from app.core.grpc_clients import vectorizer_pb2_grpc
+from app.core.logs import logger
+
+# коды ошибок, указывающие на неисправность реплики (а не на ошибку запроса)
+REPLICA_FAILURE_CODES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+
+# сглаживание скользящей средней задержки (доля нового значения)
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class BalancingPolicy:
+    """
+    Политики выбора реплики
+    """
+
+    round_robin = "round_robin"  # по кругу
+    least_outstanding = "least_outstanding"  # с наименьшим количеством выполняющихся запросов
+
+
+def parse_targets(server_address: str | list[str] | None) -> list[str]:
+    """
+    Список адресов реплик: список или строка адресов через запятую (путь к Unix-сокету - адрес unix:<путь>)
+    """
+
+    if not server_address:
+        return []
+
+    if isinstance(server_address, str):
+        server_address = server_address.split(",")
+
+    targets = [target.strip() for target in server_address if target.strip()]
+
+    return [f"unix:{target}" if target.startswith("/") else target for target in targets]
+
+
+class VectorizerReplica:
+    """
+    Реплика сервиса векторизации: пул каналов и счётчики запросов
+    """
+
+    def __init__(self, target: str, channels: int = 1, options: list[tuple] | None = None, priority: int = 0) -> None:
+        self.target = target
+        self.priority = priority  # реплики с меньшим приоритетом выбираются, пока доступна хотя бы одна из них
+        self.channels = max(1, channels)
+        self.options = options or []
+
+        self._channels: list[grpc.aio.Channel] = []
+        self._stubs: list[vectorizer_pb2_grpc.VectorizerServiceStub] = []
+        self._health_stubs: list[health_pb2_grpc.HealthStub] = []
+        self._next_channel = itertools.count()
+
+        self.healthy = True  # результат последней проверки готовности
+        self.ejected_until = 0.0  # реплика исключена из балансировки до этого момента (time.monotonic)
+        self.ejections = 0  # количество исключений подряд (задержка возврата растёт с каждым)
+        self.consecutive_failures = 0
+
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency_ms = 0.0  # средняя задержка запроса
+
+    def open(self) -> None:
+        """
+        Открытие каналов, соединения устанавливаются в фоне
+        """
+
+        for _ in range(self.channels):
+            channel = grpc.aio.insecure_channel(self.target, options=self.options)
+            channel.get_state(try_to_connect=True)
+            self._channels.append(channel)
+            self._stubs.append(vectorizer_pb2_grpc.VectorizerServiceStub(channel))
+            self._health_stubs.append(health_pb2_grpc.HealthStub(channel))
+
+    async def close(self) -> None:
+        channels = self._channels
+        self._channels, self._stubs, self._health_stubs = [], [], []
+
+        for channel in channels:
+            await channel.close()
+
+    @property
+    def stub(self) -> vectorizer_pb2_grpc.VectorizerServiceStub:
+        """
+        Клиент сервиса на очередном канале реплики (по кругу)
+        """
+
+        return self._stubs[next(self._next_channel) % len(self._stubs)]
+
+    @property
+    def health_stub(self) -> health_pb2_grpc.HealthStub:
+        return self._health_stubs[next(self._next_channel) % len(self._health_stubs)]
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and time.monotonic() >= self.ejected_until
+
+    def stats(self) -> dict:
+        return {
+            "target": self.target,
+            "priority": self.priority,
+            "available": self.available,
+            "healthy": self.healthy,
+            "ejections": self.ejections,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ms": round(self.latency_ms, 2),
+        }
+
+
+class ReplicaBalancer:
+    """
+    Балансировщик запросов между репликами.
+
+    Реплика выбирается среди доступных реплик с наименьшим приоритетом (например, Unix-сокет на том же
+    хосте раньше TCP) по политике round_robin или least_outstanding. Реплика исключается из балансировки
+    после failure_threshold неудачных запросов подряд (UNAVAILABLE, DEADLINE_EXCEEDED) или по результату
+    проверки готовности; возвращается по истечении времени исключения, которое удваивается при повторных
+    исключениях. Истечение укороченного срока запроса (например, переранжирования) неисправностью не считается.
+    Если доступных реплик нет, запросы распределяются по всем.
+    """
+
+    def __init__(
+            self,
+            replicas: list[VectorizerReplica],
+            policy: str = BalancingPolicy.least_outstanding,
+            failure_threshold: int = 3,
+            ejection_seconds: float = 5.0,
+            max_ejection_seconds: float = 60.0,
+            health_check_interval: float = 5.0,
+            health_check_service: str = "",
+    ) -> None:
+        if policy not in (BalancingPolicy.round_robin, BalancingPolicy.least_outstanding):
+            raise ValueError(f"Неизвестная политика балансировки: {policy}")
+
+        self.replicas = replicas
+        self.policy = policy
+        self.failure_threshold = max(1, failure_threshold)
+        self.ejection_seconds = ejection_seconds
+        self.max_ejection_seconds = max_ejection_seconds
+        self.health_check_interval = health_check_interval
+        self.health_check_service = health_check_service
+
+        self._next_replica = itertools.count()
+        self._health_task: asyncio.Task | None = None
+
+    def pick(self, exclude: set[str] | None = None) -> VectorizerReplica:
+        """
+        Выбор реплики для запроса, exclude - адреса реплик, уже опробованных для этого запроса
+        """
+
+        candidates = [replica for replica in self.replicas if replica.available]
+        if exclude:
+            candidates = [replica for replica in candidates if replica.target not in exclude] or candidates
+        if not candidates:
+            # все реплики исключены: лучше попытаться, чем отказать сразу
+            candidates = self.replicas
+
+        priority = min(replica.priority for replica in candidates)
+        candidates = [replica for replica in candidates if replica.priority == priority]
+
+        # сдвиг по кругу: при равной загрузке реплики выбираются по очереди
+        offset = next(self._next_replica) % len(candidates)
+        candidates = candidates[offset:] + candidates[:offset]
+
+        if self.policy == BalancingPolicy.least_outstanding:
+            return min(candidates, key=lambda replica: replica.in_flight)
+
+        return candidates[0]
+
+    def has_alternative(self, exclude: set[str]) -> bool:
+        """
+        Есть ли доступная реплика, ещё не опробованная для запроса
+        """
+
+        return any(replica.available and replica.target not in exclude for replica in self.replicas)
+
+    def eject(self, replica: VectorizerReplica, reason: str) -> None:
+        duration = min(self.max_ejection_seconds, self.ejection_seconds * 2 ** replica.ejections)
+        replica.ejected_until = time.monotonic() + duration
+        replica.ejections += 1
+        replica.consecutive_failures = 0
+        logger.warning(f"Реплика векторизатора {replica.target} исключена на {duration:.0f} с: {reason}")
+
+    def record(
+            self,
+            replica: VectorizerReplica,
+            latency: float,
+            code: grpc.StatusCode | None = None,
+            short_deadline: bool = False,
+    ) -> None:
+        """
+        Учёт результата запроса к реплике (code - код ошибки gRPC, None - успех).
+        short_deadline - срок запроса короче обычного: его истечение не указывает на неисправность реплики
+        """
+
+        replica.requests += 1
+        replica.latency_ms += LATENCY_EWMA_ALPHA * (latency * 1000 - replica.latency_ms)
+
+        if code is None:
+            replica.consecutive_failures = 0
+            if replica.available:
+                replica.ejections = 0
+            return
+
+        replica.errors += 1
+        if code == grpc.StatusCode.DEADLINE_EXCEEDED and short_deadline:
+            return
+
+        if code in REPLICA_FAILURE_CODES:
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self.failure_threshold and replica.available:
+                self.eject(replica, f"{code.name} {replica.consecutive_failures} раз подряд")
+
+    async def check(self, replica: VectorizerReplica, timeout: float = 1.0) -> bool:
+        """
+        Проверка готовности реплики по протоколу gRPC Health Checking
+        """
+
+        request = health_pb2.HealthCheckRequest(service=self.health_check_service)  # noqa
+
+        try:
+            response = await replica.health_stub.Check(request, timeout=timeout)
+            serving = response.status == health_pb2.HealthCheckResponse.SERVING  # noqa
+
+        except grpc.aio.AioRpcError:
+            serving = False
+
+        if serving != replica.healthy:
+            state = "готова" if serving else "не готова"
+            logger.info(f"Реплика векторизатора {replica.target} {state}")
+        replica.healthy = serving
+
+        return serving
+
+    async def health_loop(self) -> None:
+        """
+        Периодическая проверка готовности всех реплик
+        """
+
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.health_check_interval)
+
+    def start_health_checks(self) -> None:
+        if self.health_check_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self.health_loop())
+
+    async def stop_health_checks(self) -> None:
+        if self._health_task is None:
+            return
+
+        self._health_task.cancel()
+        try:
+            await self._health_task
+        except asyncio.CancelledError:
+            pass
+
+        self._health_task = None
+
+    def stats(self) -> list[dict]:
+        return [replica.stats() for replica in self.replicas]
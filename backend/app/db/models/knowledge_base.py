@@ -1,8 +1,9 @@
-# from pgvector.sqlalchemy import Vector
-from sqlalchemy import Text
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import mapped_column, Mapped
 
+from app.config.app import RAGBOT_EMBEDDING_DIMS, RAGBOT_PGVECTOR_HNSW_EF_CONSTRUCTION, RAGBOT_PGVECTOR_HNSW_M
 from app.db import Base
 from app.db.models.base import TimestampMixin
 
@@ -13,20 +14,19 @@ class ProjectKnowledge(Base, TimestampMixin):
     """
 
     __tablename__ = "project_knowledge"
-    __table_args__ = {"schema": "app"}
-    '''
     __table_args__ = (
         Index(
-            "idx_embedding",
+            "idx_project_knowledge_embedding",
             "embedding",
             postgresql_using="hnsw",
-            postgresql_ops={"embedding": "vector_l2_ops"}
+            postgresql_with={"m": RAGBOT_PGVECTOR_HNSW_M, "ef_construction": RAGBOT_PGVECTOR_HNSW_EF_CONSTRUCTION},
+            postgresql_ops={"embedding": "vector_cosine_ops"}
         ),
         {"schema": "app"}
     )
-    '''
 
     id: Mapped[int] = mapped_column(primary_key=True)
     chunk: Mapped[str] = mapped_column(Text, nullable=False)
     metadata_: Mapped[dict | None] = mapped_column("metadata", JSONB)
-    # embedding: Mapped[Vector] = mapped_column(Vector(384))
+    embedding: Mapped[list[float] | None] = mapped_column(Vector(RAGBOT_EMBEDDING_DIMS))
+    embedding_hash: Mapped[str | None] = mapped_column(String(64))  # хэш текста чанка на момент векторизации
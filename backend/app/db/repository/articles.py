@@ -1,5 +1,6 @@
 from sqlalchemy import select, func, true, case, literal, union_all, cast, String
 from sqlalchemy.orm import selectinload
+from typing import AsyncIterator, Sequence
 
 from app.db.models import Articles, Aircraft, Facts, ArticlesTagsAssociation, Countries
 from app.db.repository.base import BaseRepository
@@ -256,3 +257,19 @@ class ArticlesRepository(BaseRepository):
             .filter(Articles.is_published.is_(True), Articles.is_archived.is_(False))
         )
         return (await self.session.execute(query)).mappings().all()
+
+    async def stream_published_content(self, batch_size: int = 100) -> AsyncIterator[Sequence]:
+        """
+        Потоковая выборка опубликованных статей (id, title, content) пакетами по batch_size строк
+        """
+
+        query = (
+            select(Articles.id, Articles.title, Articles.content)
+            .filter(Articles.is_published.is_(True), Articles.is_archived.is_(False))
+            .order_by(Articles.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        result = await self.session.stream(query)
+        async for rows in result.mappings().partitions(batch_size):
+            yield rows
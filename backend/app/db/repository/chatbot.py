@@ -1,4 +1,4 @@
-from sqlalchemy import select, text, func, update
+from sqlalchemy import select, text, func, update, exists
 from sqlalchemy.dialects.postgresql import insert
 from uuid import UUID
 
@@ -35,6 +35,22 @@ class ChatBotHistoryRepository(BaseRepository):
 
         return (await self.session.execute(query)).mappings().all()
 
+    async def has_history(self, chat_id: UUID, intents: list[str] | tuple[str, ...]) -> bool:
+        """
+        Есть ли в чате ответы по указанным темам
+        """
+
+        query = select(
+            exists().where(
+                Chat.chat_id == chat_id,
+                Chat.intent.in_(intents),
+                Chat.answer.is_not(None),
+                Chat.is_active.is_(True)
+            )
+        )
+
+        return bool((await self.session.execute(query)).scalar())
+
     async def count_daily_tokens(self, chat_id: UUID) -> dict[str, int]:
         """
         Подсчёт токенов, потраченных за день
@@ -1,10 +1,59 @@
+from sqlalchemy import select, func, update
+from typing import AsyncIterator, Sequence
+
 from app.db.models import ProjectKnowledge
 from app.db.repository.base import BaseRepository
 
 
 class ProjectKnowledgeRepository(BaseRepository):
     """
-    Репозиторий модели базы знаний о проекте
+    Репозиторий базы знаний о проекте
     """
 
     model = ProjectKnowledge
+
+    async def stream_chunks(self, batch_size: int = 100) -> AsyncIterator[Sequence]:
+        """
+        Потоковая выборка записей базы знаний (id, chunk, metadata, embedding_hash) пакетами по batch_size строк
+        """
+
+        query = (
+            select(
+                ProjectKnowledge.id,
+                ProjectKnowledge.chunk,
+                ProjectKnowledge.metadata_.label("metadata"),
+                ProjectKnowledge.embedding_hash,
+            )
+            .order_by(ProjectKnowledge.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        result = await self.session.stream(query)
+        async for rows in result.mappings().partitions(batch_size):
+            yield rows
+
+    async def update_embeddings(self, values: list[dict]) -> None:
+        """
+        Запись векторов чанков: values - список словарей с ключами id, embedding, embedding_hash
+        """
+
+        if values:
+            await self.session.execute(update(ProjectKnowledge), values)
+
+    async def search_nearest(self, embedding: list[float], top_k: int = 3, ef_search: int = 40) -> Sequence:
+        """
+        Поиск ближайших чанков по косинусному расстоянию (индекс HNSW), ef_search - размер списка кандидатов
+        """
+
+        # параметр действует до конца текущей транзакции
+        await self.session.execute(select(func.set_config("hnsw.ef_search", str(max(ef_search, top_k)), True)))
+
+        distance = ProjectKnowledge.embedding.cosine_distance(embedding)
+        query = (
+            select(ProjectKnowledge.id, ProjectKnowledge.chunk, (1 - distance).label("score"))
+            .filter(ProjectKnowledge.embedding.is_not(None))
+            .order_by(distance)
+            .limit(top_k)
+        )
+
+        return (await self.session.execute(query)).mappings().all()
@@ -1,16 +1,23 @@
 import asyncio
 import re
+import time
 import unicodedata
 
+from collections import deque
 from uuid import UUID
 
-from app.config.app import GIGACHAT_USER_MESSAGE_MAX_SIZE
+from app.config.app import (
+    CHATBOT_ANSWER_CACHE_ENABLED, CHATBOT_SPECULATIVE_MIN_PROJECT_SHARE, CHATBOT_SPECULATIVE_RETRIEVAL,
+    CHATBOT_SPECULATIVE_WINDOW, GIGACHAT_USER_MESSAGE_MAX_SIZE
+)
 from app.config.chatbot import ChatBotSettingsManager
-from app.core import es_manager, vectorizer_manager
+from app.core import answer_cache, es_manager, vectorizer_manager
+from app.core.answer_cache import CACHEABLE_INTENTS, CachedAnswer, prompt_fingerprints
 from app.core.db_manager import DBManager
 from app.core.gigachat import gigachat_api
 from app.core.logs import logger
 from app.core.ws_manager import WSManager
+from app.db import async_session_maker
 from app.db.models.chatbot import MessageIntent
 from app.decorators.db_errors import handle_basic_db_errors
 from app.schemas.gigachat import SGigaChatAnswer
@@ -31,6 +38,9 @@ class ChatBotServices:
 
     REGEX = re.compile(r'\s+')
 
+    # темы последних ответов LLM (True - вопрос по теме проекта) для решения об опережающем поиске чанков
+    recent_project_intents: deque[bool] = deque(maxlen=CHATBOT_SPECULATIVE_WINDOW)
+
     def __init__(
             self,
             db: DBManager | None = None,
@@ -173,38 +183,85 @@ class ChatBotServices:
 
         return pattern_match.group(0)[:24].strip() if pattern_match else MessageIntent.intent_ontopic
 
-    async def _get_ragbot_answer(self, chat_id: UUID, message: str) -> str:
+    async def _get_top_chunks(self, message: str, db: DBManager | None = None) -> list[str]:
+        """
+        Поиск ближайших чанков (клиент Elasticsearch и каналы сервиса векторизации открыты при запуске приложения
+        и общие для одновременных запросов)
+        """
+
+        return await RagBotService(es_manager, vectorizer_manager, db=db or self.db).get_top_chunks_list(message)
+
+    @classmethod
+    def _use_speculative_retrieval(cls) -> bool:
         """
-        Формирование ответа RAG-бота
+        Опережающий поиск чанков: доля вопросов по теме проекта среди последних ответов не ниже порога
         """
 
-        # поиск ближайших чанков
-        async with es_manager as es, vectorizer_manager as vectorizer:
-            chunks = await RagBotService(es, vectorizer).get_top_chunks_list(message)
+        if not CHATBOT_SPECULATIVE_RETRIEVAL:
+            return False
+
+        intents = cls.recent_project_intents
+        return not intents or sum(intents) / len(intents) >= CHATBOT_SPECULATIVE_MIN_PROJECT_SHARE
+
+    async def _speculative_top_chunks(self, message: str, timings: dict[str, float]) -> list[str] | None:
+        """
+        Поиск чанков одновременно с определением темы сообщения (в отдельной сессии базы данных,
+        так как сессия сервиса используется запросом к LLM). При ошибке - None
+        """
+
+        started = time.perf_counter()
+
+        try:
+            async with DBManager(session_factory=async_session_maker) as db:
+                chunks = await self._get_top_chunks(message, db)
+
+        except Exception as ex:
+            logger.warning(f"Опережающий поиск чанков не выполнен: {ex}")
+            return None
+
+        timings["retrieval"] = time.perf_counter() - started
+        return chunks
+
+    async def _get_ragbot_answer(
+            self, chat_id: UUID, message: str, chunks: list[str] | None = None
+    ) -> SGigaChatAnswer:
+        """
+        Формирование ответа RAG-бота (chunks - чанки, найденные заранее)
+        """
+
+        if chunks is None:
+            chunks = await self._get_top_chunks(message)
 
         # TODO: сделать обработку chunks is None
         chunks = "\n\n".join(chunks)
 
         # запрос к LLM
-        giga_chat_answer = await self._get_llm_answer(chat_id, message, chunks=chunks)
-
-        return giga_chat_answer.answer
+        return await self._get_llm_answer(chat_id, message, chunks=chunks)
 
-    async def background_task(self, chat_id: UUID, message: str) -> None:
+    async def _get_bot_answer(self, chat_id: UUID, message: str) -> tuple[SGigaChatAnswer, str]:
         """
-        Фоновая отправка сообщения в LLM и обработка результата
+        Ответ от LLM и тема сообщения
         """
 
-        try:
-            if not self.bot_settings.bot_enabled:
-                raise ValueError("⚠️ Сервис отключен")
+        timings: dict[str, float] = {}  # длительность этапов ответа (в секундах)
+        started = time.perf_counter()
+
+        # поиск чанков для RAG-бота начинается одновременно с определением темы сообщения
+        # и отменяется (или его результат не используется), если тема не относится к проекту
+        retrieval = (
+            asyncio.create_task(self._speculative_top_chunks(message, timings))
+            if self._use_speculative_retrieval() else None
+        )
 
+        try:
             # ответ от LLM
             giga_chat_answer = await self._get_llm_answer(chat_id, message)
             answer = giga_chat_answer.answer
+            timings["intent_llm"] = time.perf_counter() - started
 
             # определение intent
             intent = await self._get_answer_intent(answer)
+            self.recent_project_intents.append(intent == MessageIntent.intent_project)
 
             if intent == MessageIntent.intent_ontopic:
                 # вопрос пользователя по теме авиации, выдаётся прямой ответ
@@ -212,7 +269,24 @@ class ChatBotServices:
 
             elif intent == MessageIntent.intent_project:
                 # вопрос по теме проекта, ответ обрабатывает логика RAG-бота
-                giga_chat_answer.answer = await self._get_ragbot_answer(chat_id, message)
+                stage_started = time.perf_counter()
+                chunks = await retrieval if retrieval else None
+                timings["retrieval_wait"] = time.perf_counter() - stage_started
+
+                stage_started = time.perf_counter()
+                rag_answer = await self._get_ragbot_answer(chat_id, message, chunks)
+                timings["rag_llm"] = time.perf_counter() - stage_started
+
+                # токены ответа - сумма запросов определения темы и RAG-бота
+                giga_chat_answer = SGigaChatAnswer(
+                    answer=rag_answer.answer,
+                    prompt_tokens=giga_chat_answer.prompt_tokens + rag_answer.prompt_tokens,
+                    completion_tokens=giga_chat_answer.completion_tokens + rag_answer.completion_tokens,
+                    total_tokens=giga_chat_answer.total_tokens + rag_answer.total_tokens,
+                    precached_prompt_tokens=(
+                        giga_chat_answer.precached_prompt_tokens + rag_answer.precached_prompt_tokens
+                    ),
+                )
 
             elif intent == MessageIntent.intent_feedback:
                 # вопрос по теме обратной связи
@@ -223,6 +297,80 @@ class ChatBotServices:
                 # вопрос не по теме авиации, формируется шаблонный ответ
                 giga_chat_answer.answer = self.intent_mapper.get(intent, MessageIntent.intent_offtopic)
 
+        finally:
+            if retrieval and not retrieval.done():
+                retrieval.cancel()
+
+        timings["total"] = time.perf_counter() - started
+        logger.info(
+            f"Этапы ответа чат-бота ({intent}): "
+            + ", ".join(f"{stage} {seconds * 1000:.0f} мс" for stage, seconds in timings.items()),
+            extra={"intent": str(intent), "timings": timings},
+        )
+
+        return giga_chat_answer, intent
+
+    @staticmethod
+    async def _get_cached_answer(
+            question: str, fingerprints: dict[str, str]
+    ) -> tuple[CachedAnswer | None, list[float] | None]:
+        """
+        Поиск ответа в семантическом кэше: по точному совпадению нормализованного вопроса, затем по близости
+        векторов вопросов. Возвращает ответ и вектор вопроса (для сохранения нового ответа)
+        """
+
+        if cached := answer_cache.get_exact(question, fingerprints):
+            return cached, None
+
+        try:
+            vectors = await vectorizer_manager.embed_text_batch([question])
+            vector = vectors[0] if vectors else None
+
+        except RuntimeError as ex:
+            logger.warning(f"Векторизация вопроса для кэша ответов не выполнена: {ex}")
+            vector = None
+
+        return answer_cache.search(question, vector, fingerprints), vector
+
+    async def background_task(self, chat_id: UUID, message: str) -> None:
+        """
+        Фоновая отправка сообщения в LLM и обработка результата
+        """
+
+        try:
+            if not self.bot_settings.bot_enabled:
+                raise ValueError("⚠️ Сервис отключен")
+
+            # семантический кэш ответов используется для вопросов без предшествующей истории чата,
+            # так как ответ на вопрос с историей зависит от контекста
+            use_cache = CHATBOT_ANSWER_CACHE_ENABLED and not await self.db.chatbot.history.has_history(
+                chat_id, CACHEABLE_INTENTS
+            )
+
+            question = self._sanitize_string_optimized(message)
+            fingerprints = prompt_fingerprints(await self.bot_settings.get_settings()) if use_cache else {}
+            cached, vector = await self._get_cached_answer(question, fingerprints) if use_cache else (None, None)
+
+            if cached:
+                # ответ из кэша, без запроса к LLM
+                logger.info(f"Ответ из кэша ответов ({cached.intent}), не потрачено токенов: {cached.tokens}")
+                intent = cached.intent
+                giga_chat_answer = SGigaChatAnswer(
+                    answer=cached.answer,
+                    prompt_tokens=0,
+                    completion_tokens=0,
+                    total_tokens=0,
+                    precached_prompt_tokens=0,
+                )
+
+            else:
+                giga_chat_answer, intent = await self._get_bot_answer(chat_id, message)
+
+                if use_cache:
+                    answer_cache.put(
+                        question, vector, intent, giga_chat_answer.answer, giga_chat_answer.total_tokens, fingerprints
+                    )
+
             if not giga_chat_answer.answer:
                 logger.warning("Пустой ответ для передачи пользователю")
                 raise ValueError("⚠️ Ошибка сервиса")
@@ -0,0 +1,550 @@
+""" Инкрементальная загрузка статей и базы знаний о проекте в индекс RAG-бота """
+
+import asyncio
+import hashlib
+import re
+import time
+
+import numpy as np
+
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from app.config.app import (
+    RAGBOT_CHUNK_OVERLAP, RAGBOT_CHUNK_SIZE, RAGBOT_INDEX_NAME, RAGBOT_INGEST_BATCH_SIZE, RAGBOT_INGEST_CONCURRENCY,
+    RAGBOT_INGEST_DB_BATCH_SIZE, RAGBOT_INGEST_PROGRESS_INTERVAL, RAGBOT_RETRIEVER, RAGBOT_RETRIEVER_PGVECTOR,
+    RAGBOT_RETRIEVER_VECTORIZER
+)
+from app.core import ESManager, VectorizerManager
+from app.core.db_manager import DBManager
+from app.core.logs import logger
+
+# источники чанков
+SOURCE_ARTICLE = "article"
+SOURCE_KNOWLEDGE = "knowledge"
+
+
+@dataclass
+class Chunk:
+    """
+    Чанк источника: идентификатор - источник, идентификатор записи и номер чанка
+    """
+
+    source: str
+    source_id: str
+    number: int
+    text: str
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def id(self) -> str:
+        return f"{self.source}:{self.source_id}:{self.number}"
+
+    @property
+    def content_hash(self) -> str:
+        return content_hash(self.text)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def clean_markdown(text: str) -> str:
+    """
+    Удаление разметки Markdown (заголовки, выделение) и лишних пробелов
+    """
+
+    cleaned = re.sub(r"^\s*#+\s*", "", text or "", flags=re.MULTILINE)
+    cleaned = re.sub(r"(\*\*|__)(.*?)\1", r"\2", cleaned)
+    cleaned = re.sub(r"(\*|_)(.*?)\1", r"\2", cleaned)
+
+    return re.sub(r"\s+", " ", cleaned).strip()
+
+
+def chunk_text(text: str, size: int = RAGBOT_CHUNK_SIZE, overlap: int = RAGBOT_CHUNK_OVERLAP) -> list[str]:
+    """
+    Разбиение текста на чанки по size слов с перекрытием overlap слов
+    """
+
+    words = text.split()
+    step = max(1, size - overlap)
+
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+
+    return chunks
+
+
+def make_chunks(source: str, source_id: str, text: str, title: str = "", metadata: dict | None = None) -> list[Chunk]:
+    """
+    Чанки текста записи источника (заголовок добавляется в начало каждого чанка)
+    """
+
+    prefix = f"{title}\n" if title else ""
+    metadata = {"source": source, "source_id": source_id, **({"title": title} if title else {}), **(metadata or {})}
+
+    return [
+        Chunk(source=source, source_id=source_id, number=number, text=prefix + chunk, metadata=metadata)
+        for number, chunk in enumerate(chunk_text(text))
+    ]
+
+
+class KnowledgeIngestionService:
+    """
+    Загрузка чанков статей и базы знаний в индекс RAG-бота (Elasticsearch).
+
+    Источники читаются из базы потоком, чанки с неизменившимся хэшем содержимого пропускаются, остальные
+    векторизуются пакетами (EmbedTextBatch) с ограничением количества одновременных запросов и записываются
+    в индекс пакетами; чанки, которых больше нет в источниках, удаляются. Повторная загрузка после правки одной
+    статьи векторизует и записывает только чанки этой статьи.
+
+    Перенос на другую модель векторизации (migrate) строит новую версию индекса, пока поиск идёт
+    по псевдониму индекса в прежней версии прежней моделью, и затем атомарно переключает псевдоним.
+
+    Для поиска в PostgreSQL (RAGBOT_RETRIEVER_PGVECTOR) и если Elasticsearch не настроен, векторы записываются
+    в базу знаний (pgvector): векторизуются записи, текст которых изменился после предыдущей векторизации.
+    Для поиска в индексе сервиса векторизации (RAGBOT_RETRIEVER_VECTORIZER) чанки записываются туда
+    с текстом в метаданных.
+    """
+
+    es: ESManager | None
+    vectorizer: VectorizerManager | None
+
+    def __init__(self, db: DBManager, es: ESManager, vectorizer: VectorizerManager) -> None:
+        self.db = db
+        self.es = es
+        self.vectorizer = vectorizer
+        self.index = RAGBOT_INDEX_NAME
+        self.model: str | None = None  # модель векторизации индекса (None - модель сервиса по умолчанию)
+
+        self._index_ready = False
+        self._index_lock = asyncio.Lock()
+
+        self.stats = {
+            "chunks": 0,  # чанков в источниках
+            "unchanged": 0,  # пропущено по хэшу содержимого
+            "indexed": 0,  # векторизовано и записано
+            "deleted": 0,  # удалено чанков, которых больше нет в источниках
+            "errors": 0,  # чанков, не записанных из-за ошибок (будут повторены при следующей загрузке)
+        }
+        self._reported = 0.0
+
+    async def stream_chunks(self) -> AsyncIterator[list[Chunk]]:
+        """
+        Чанки опубликованных статей и записей базы знаний (по одному списку на запись)
+        """
+
+        async for articles in self.db.articles.stream_published_content(RAGBOT_INGEST_DB_BATCH_SIZE):
+            for article in articles:
+                yield make_chunks(
+                    SOURCE_ARTICLE, str(article["id"]), clean_markdown(article["content"]), title=article["title"]
+                )
+
+        async for rows in self.db.app.project_knowledge.stream_chunks(RAGBOT_INGEST_DB_BATCH_SIZE):
+            for row in rows:
+                metadata = {key: str(value) for key, value in (row["metadata"] or {}).items()}
+                yield make_chunks(SOURCE_KNOWLEDGE, str(row["id"]), row["chunk"], metadata=metadata)
+
+    async def load_hashes(self) -> dict[str, str]:
+        """
+        Хэши содержимого чанков, уже записанных в индекс
+        """
+
+        hashes = {}
+        async for hit in self.es.scan(self.index, _source=["content_hash"]):
+            hashes[hit["_id"]] = hit["_source"].get("content_hash", "")
+
+        return hashes
+
+    async def ensure_index(self, dims: int) -> None:
+        """
+        Создание индекса RAG-бота при первой записи (размерность вектора - по первому пакету)
+        """
+
+        async with self._index_lock:
+            if self._index_ready:
+                return
+
+            if not await self.es.es.indices.exists(index=self.index):
+                await self.es.es.indices.create(index=self.index, mappings={
+                    "_meta": {"model": self.model or ""},
+                    "properties": {
+                        "text": {"type": "text"},
+                        "vector": {"type": "dense_vector", "dims": dims, "index": True, "similarity": "cosine"},
+                        "content_hash": {"type": "keyword"},
+                        "metadata": {"type": "object", "enabled": False},
+                    }
+                })
+                logger.info(f'Индекс "{self.index}" создан')
+
+            self._index_ready = True
+
+    async def index_chunks(self, chunks: list[Chunk]) -> None:
+        """
+        Векторизация и пакетная запись чанков
+        """
+
+        try:
+            vectors = await self.vectorizer.embed_text_batch_array([chunk.text for chunk in chunks], model=self.model)
+            await self.ensure_index(vectors.shape[1])
+
+            success, errors = await self.es.bulk([
+                {
+                    "_op_type": "index",
+                    "_index": self.index,
+                    "_id": chunk.id,
+                    "_source": {
+                        "text": chunk.text,
+                        "vector": vector.tolist(),
+                        "content_hash": chunk.content_hash,
+                        "metadata": chunk.metadata,
+                    },
+                }
+                for chunk, vector in zip(chunks, vectors)
+            ])
+            self.stats["indexed"] += success
+            self.stats["errors"] += len(errors)
+
+        except RuntimeError as ex:
+            logger.error(f"Ошибка векторизации чанков: {ex}")
+            self.stats["errors"] += len(chunks)
+
+    async def delete_chunks(self, chunk_ids: list[str]) -> None:
+        """
+        Пакетное удаление чанков, которых больше нет в источниках
+        """
+
+        for offset in range(0, len(chunk_ids), RAGBOT_INGEST_BATCH_SIZE * 10):
+            batch = chunk_ids[offset:offset + RAGBOT_INGEST_BATCH_SIZE * 10]
+            success, errors = await self.es.bulk([
+                {"_op_type": "delete", "_index": self.index, "_id": chunk_id} for chunk_id in batch
+            ])
+            self.stats["deleted"] += success
+            self.stats["errors"] += len(errors)
+
+    async def run(self, force: bool = False) -> dict:
+        """
+        Загрузка: force - векторизация и запись всех чанков независимо от хэша (например, после смены модели)
+        """
+
+        # индекс выбирается так же, как источник чанков при поиске (RagBotService.get_top_chunks)
+        if RAGBOT_RETRIEVER == RAGBOT_RETRIEVER_VECTORIZER:
+            return await self.run_vectorizer(force)
+
+        if RAGBOT_RETRIEVER == RAGBOT_RETRIEVER_PGVECTOR or not self.es or not self.es.es:
+            return await self.run_pgvector(force)
+
+        return await self.run_es(force)
+
+    async def load_index_model(self) -> str | None:
+        """
+        Модель векторизации, которой построен индекс (из _meta сопоставления; None - модель по умолчанию)
+        """
+
+        if not await self.es.es.indices.exists(index=self.index):
+            return None
+
+        mappings = await self.es.es.indices.get_mapping(index=self.index)
+        mapping = mappings[next(iter(mappings))]["mappings"]
+
+        return (mapping.get("_meta") or {}).get("model") or None
+
+    async def run_es(self, force: bool = False) -> dict:
+        """
+        Загрузка в индекс Elasticsearch моделью, которой построен индекс
+        """
+
+        started = self._reported = time.perf_counter()
+        if self.model is None:
+            self.model = await self.load_index_model()
+
+        hashes = await self.load_hashes()
+        seen: set[str] = set()
+
+        # ограничение одновременных запросов векторизации: чтение источников ждёт освобождения слота
+        slots = asyncio.Semaphore(max(1, RAGBOT_INGEST_CONCURRENCY))
+        tasks: set[asyncio.Task] = set()
+
+        async def index_batch(batch: list[Chunk]) -> None:
+            try:
+                await self.index_chunks(batch)
+            finally:
+                slots.release()
+
+        async def submit(batch: list[Chunk]) -> None:
+            await slots.acquire()
+            task = asyncio.create_task(index_batch(batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        pending: list[Chunk] = []
+        async for chunks in self.stream_chunks():
+            for chunk in chunks:
+                self.stats["chunks"] += 1
+                seen.add(chunk.id)
+
+                if not force and hashes.get(chunk.id) == chunk.content_hash:
+                    self.stats["unchanged"] += 1
+                    continue
+
+                pending.append(chunk)
+                if len(pending) >= RAGBOT_INGEST_BATCH_SIZE:
+                    await submit(pending)
+                    pending = []
+                    self.report_progress(started)
+
+        if pending:
+            await submit(pending)
+        await asyncio.gather(*tasks)
+
+        await self.delete_chunks([chunk_id for chunk_id in hashes if chunk_id not in seen])
+
+        return self.finish(started, self.index)
+
+    async def resolve_index(self) -> str | None:
+        """
+        Версия индекса, на которую указывает псевдоним (индекс прежнего формата называется как псевдоним)
+        """
+
+        if await self.es.es.indices.exists_alias(name=RAGBOT_INDEX_NAME):
+            aliases = await self.es.es.indices.get_alias(name=RAGBOT_INDEX_NAME)
+            return next(iter(aliases))
+
+        if await self.es.es.indices.exists(index=RAGBOT_INDEX_NAME):
+            return RAGBOT_INDEX_NAME
+
+        return None
+
+    async def next_index_version(self) -> str:
+        """
+        Название следующей версии индекса: <псевдоним>_v<номер>
+        """
+
+        pattern = re.compile(rf"^{re.escape(RAGBOT_INDEX_NAME)}_v(\d+)$")
+        indices = await self.es.es.indices.get(index=f"{RAGBOT_INDEX_NAME}_v*", allow_no_indices=True)
+        versions = [int(match.group(1)) for match in map(pattern.match, indices) if match]
+
+        return f"{RAGBOT_INDEX_NAME}_v{max(versions, default=0) + 1}"
+
+    async def switch_alias(self, source: str | None, target: str) -> None:
+        """
+        Атомарное переключение псевдонима индекса на новую версию
+        """
+
+        actions = [{"add": {"index": target, "alias": RAGBOT_INDEX_NAME}}]
+        if source == RAGBOT_INDEX_NAME:
+            # индекс прежнего формата занимает название псевдонима и удаляется в том же действии
+            actions.append({"remove_index": {"index": source}})
+        elif source:
+            actions.append({"remove": {"index": source, "alias": RAGBOT_INDEX_NAME}})
+
+        await self.es.es.indices.update_aliases(actions=actions)
+        logger.info(f'Псевдоним индекса "{RAGBOT_INDEX_NAME}" переключён: {source} -> {target}')
+
+    async def migrate(self, model: str, drop_source: bool = False) -> dict:
+        """
+        Перенос индекса на модель model (blue/green): все чанки векторизуются новой моделью в новую версию
+        индекса, пока поиск выполняется по псевдониму в прежней версии, затем псевдоним переключается.
+        При ошибках записи новая версия удаляется, а псевдоним не переключается
+        """
+
+        if not self.es or not self.es.es:
+            raise RuntimeError("Elasticsearch не настроен")
+
+        source = await self.resolve_index()
+        self.index, self.model = await self.next_index_version(), model
+        logger.info(f'Перенос индекса "{RAGBOT_INDEX_NAME}": {source} -> {self.index}, модель {model}')
+
+        stats = await self.run_es(force=True)
+        if not stats["indexed"] or stats["errors"]:
+            await self.es.es.indices.delete(index=self.index, ignore_unavailable=True)
+            raise RuntimeError(
+                f'Перенос индекса "{RAGBOT_INDEX_NAME}" не выполнен: записано {stats["indexed"]} чанков, '
+                f'ошибок {stats["errors"]}'
+            )
+
+        await self.es.es.indices.refresh(index=self.index)
+        await self.switch_alias(source, self.index)
+
+        if drop_source and source and source != RAGBOT_INDEX_NAME:
+            await self.es.es.indices.delete(index=source, ignore_unavailable=True)
+
+        return {**stats, "source": source, "target": self.index, "model": model}
+
+    def report_progress(self, started: float) -> None:
+        """
+        Вывод прогресса загрузки не чаще RAGBOT_INGEST_PROGRESS_INTERVAL секунд
+        """
+
+        now = time.perf_counter()
+        if now - self._reported < RAGBOT_INGEST_PROGRESS_INTERVAL:
+            return
+
+        self._reported = now
+        elapsed = now - started
+        logger.info(
+            f'Загрузка индекса "{self.index}": записано {self.stats["indexed"]} из {self.stats["chunks"]} чанков, '
+            f'{self.stats["indexed"] / elapsed if elapsed else 0.0:.1f} чанков/с'
+        )
+
+    async def run_pgvector(self, force: bool = False) -> dict:
+        """
+        Векторизация записей базы знаний в PostgreSQL (pgvector): force - всех записей независимо от хэша
+        """
+
+        started = time.perf_counter()
+
+        pending: list[tuple[int, str, str]] = []
+        async for rows in self.db.app.project_knowledge.stream_chunks(RAGBOT_INGEST_DB_BATCH_SIZE):
+            for row in rows:
+                self.stats["chunks"] += 1
+                chunk_hash = content_hash(row["chunk"])
+
+                if not force and row["embedding_hash"] == chunk_hash:
+                    self.stats["unchanged"] += 1
+                    continue
+
+                pending.append((row["id"], row["chunk"], chunk_hash))
+
+        # векторизация выполняется параллельно, а запись - последовательно в одной сессии
+        slots = asyncio.Semaphore(max(1, RAGBOT_INGEST_CONCURRENCY))
+
+        async def embed_batch(batch: list[tuple[int, str, str]]) -> tuple[list, np.ndarray | None]:
+            async with slots:
+                try:
+                    return batch, await self.vectorizer.embed_text_batch_array([text for _, text, _ in batch])
+
+                except RuntimeError as ex:
+                    logger.error(f"Ошибка векторизации чанков: {ex}")
+                    return batch, None
+
+        batches = [
+            pending[offset:offset + RAGBOT_INGEST_BATCH_SIZE]
+            for offset in range(0, len(pending), RAGBOT_INGEST_BATCH_SIZE)
+        ]
+        for future in asyncio.as_completed([embed_batch(batch) for batch in batches]):
+            batch, vectors = await future
+            if vectors is None:
+                self.stats["errors"] += len(batch)
+                continue
+
+            await self.db.app.project_knowledge.update_embeddings([
+                {"id": row_id, "embedding": vector.tolist(), "embedding_hash": chunk_hash}
+                for (row_id, _, chunk_hash), vector in zip(batch, vectors)
+            ])
+            self.stats["indexed"] += len(batch)
+
+        await self.db.commit()
+
+        return self.finish(started, "app.project_knowledge")
+
+    async def upsert_vectorizer_chunks(self, chunks: list[Chunk]) -> None:
+        """
+        Пакетная запись чанков в индекс сервиса векторизации (векторизация на стороне сервиса моделью индекса)
+        """
+
+        try:
+            upserted = await self.vectorizer.index_upsert(self.index, [
+                {
+                    "id": chunk.id,
+                    "text": chunk.text,
+                    "metadata": {**chunk.metadata, "text": chunk.text, "content_hash": chunk.content_hash},
+                }
+                for chunk in chunks
+            ])
+            self.stats["indexed"] += upserted
+            self.stats["errors"] += len(chunks) - upserted
+
+        except RuntimeError as ex:
+            logger.error(f"Ошибка записи чанков в индекс сервиса векторизации: {ex}")
+            self.stats["errors"] += len(chunks)
+
+    async def load_vectorizer_hashes(self) -> dict[str, str]:
+        """
+        Хэши содержимого чанков, записанных в индекс сервиса векторизации: {идентификатор чанка: хэш}
+        """
+
+        items = await self.vectorizer.index_list(self.index, fields=["content_hash"])
+
+        return {item["id"]: item["metadata"].get("content_hash", "") for item in items}
+
+    async def delete_vectorizer_chunks(self, chunk_ids: list[str]) -> None:
+        """
+        Пакетное удаление из индекса сервиса векторизации чанков, которых больше нет в источниках
+        """
+
+        for offset in range(0, len(chunk_ids), RAGBOT_INGEST_BATCH_SIZE * 10):
+            batch = chunk_ids[offset:offset + RAGBOT_INGEST_BATCH_SIZE * 10]
+            try:
+                self.stats["deleted"] += await self.vectorizer.index_delete(self.index, ids=batch)
+            except RuntimeError as ex:
+                logger.error(f"Ошибка удаления чанков из индекса сервиса векторизации: {ex}")
+                self.stats["errors"] += len(batch)
+
+    async def run_vectorizer(self, force: bool = False) -> dict:
+        """
+        Загрузка в индекс сервиса векторизации: записываются новые и изменённые чанки (по хэшу содержимого
+        в метаданных), чанки, которых больше нет в источниках, удаляются
+        """
+
+        started = self._reported = time.perf_counter()
+
+        hashes = await self.load_vectorizer_hashes()
+        seen: set[str] = set()
+
+        slots = asyncio.Semaphore(max(1, RAGBOT_INGEST_CONCURRENCY))
+        tasks: set[asyncio.Task] = set()
+
+        async def upsert_batch(batch: list[Chunk]) -> None:
+            try:
+                await self.upsert_vectorizer_chunks(batch)
+            finally:
+                slots.release()
+
+        async def submit(batch: list[Chunk]) -> None:
+            await slots.acquire()
+            task = asyncio.create_task(upsert_batch(batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        pending: list[Chunk] = []
+        async for chunks in self.stream_chunks():
+            for chunk in chunks:
+                self.stats["chunks"] += 1
+                seen.add(chunk.id)
+
+                if not force and hashes.get(chunk.id) == chunk.content_hash:
+                    self.stats["unchanged"] += 1
+                    continue
+
+                pending.append(chunk)
+                if len(pending) >= RAGBOT_INGEST_BATCH_SIZE:
+                    await submit(pending)
+                    pending = []
+                    self.report_progress(started)
+
+        if pending:
+            await submit(pending)
+        await asyncio.gather(*tasks)
+
+        await self.delete_vectorizer_chunks([chunk_id for chunk_id in hashes if chunk_id not in seen])
+
+        return self.finish(started, f"vectorizer:{self.index}")
+
+    def finish(self, started: float, target: str) -> dict:
+        """
+        Итоговая статистика загрузки
+        """
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            **self.stats,
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(self.stats["indexed"] / elapsed, 1) if elapsed else 0.0,
+        }
+        logger.info(f'Загрузка индекса "{target}": {stats}')
+
+        return stats
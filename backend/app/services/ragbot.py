@@ -1,43 +1,228 @@
-from app.config.app import RAGBOT_INDEX_NAME
+import asyncio
+
+from app.config.app import (
+    RAGBOT_HYBRID_CANDIDATES, RAGBOT_HYBRID_SEARCH, RAGBOT_INDEX_NAME, RAGBOT_KNN_NUM_CANDIDATES,
+    RAGBOT_PGVECTOR_EF_SEARCH, RAGBOT_RERANK_CANDIDATES, RAGBOT_RERANK_TIMEOUT, RAGBOT_RETRIEVER,
+    RAGBOT_RETRIEVER_PGVECTOR, RAGBOT_RETRIEVER_VECTORIZER, RAGBOT_RRF_RANK_CONSTANT
+)
 from app.core import ESManager, VectorizerManager
+from app.core.db_manager import DBManager
+from app.core.logs import logger
+
+# версия индекса RAG-бота, на которую указывал псевдоним, и модель её векторов: (версия, модель)
+# (перечитывается, когда поиск находит чанки другой версии - псевдоним переключён переносом на другую модель)
+_index_models: dict[str, tuple[str, str | None]] = {}
+
+
+def reciprocal_rank_fusion(
+        rankings: list[list[dict]], top_k: int = 3, rank_constant: int = RAGBOT_RRF_RANK_CONSTANT
+) -> list[dict]:
+    """
+    Объединение списков чанков Reciprocal Rank Fusion: оценка чанка - сумма 1 / (rank_constant + позиция)
+    по всем спискам, в которых он найден
+    """
+
+    scores: dict[str, float] = {}
+    chunks: dict[str, dict] = {}
+
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, start=1):
+            scores[chunk["idx"]] = scores.get(chunk["idx"], 0.0) + 1 / (rank_constant + rank)
+            chunks.setdefault(chunk["idx"], chunk)
+
+    fused = sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+    return [{**chunks[idx], "score": scores[idx]} for idx in fused]
 
 
 class RagBotService:
 
     es: ESManager | None
     vect: VectorizerManager | None
+    db: DBManager | None
 
-    def __init__(self, es: ESManager | None = None, vectorizer: VectorizerManager | None = None) -> None:
+    def __init__(
+            self,
+            es: ESManager | None = None,
+            vectorizer: VectorizerManager | None = None,
+            db: DBManager | None = None,
+    ) -> None:
         self.es = es
         self.vectorizer = vectorizer
+        self.db = db
         self.index = [RAGBOT_INDEX_NAME]
 
     async def get_top_chunks(self, query_text: str, top_k: int = 3) -> list[dict]:
         """
-        Поиск наиболее подходящих чанков в Elasticsearch (с оценкой релевантности)
+        Поиск наиболее подходящих чанков (с оценкой релевантности): выборка RAGBOT_RERANK_CANDIDATES кандидатов
+        kNN-поиском и переранжирование кросс-энкодером до top_k
+        """
+
+        candidates_k = max(top_k, RAGBOT_RERANK_CANDIDATES)
+
+        if RAGBOT_RETRIEVER == RAGBOT_RETRIEVER_VECTORIZER:
+            chunks = await self.get_top_chunks_vectorizer(query_text, candidates_k)
+        elif RAGBOT_RETRIEVER == RAGBOT_RETRIEVER_PGVECTOR or not (self.es and self.es.es):
+            chunks = await self.get_top_chunks_pgvector(query_text, candidates_k)
+        else:
+            chunks = await self.get_top_chunks_es(query_text, candidates_k)
+
+        if len(chunks) <= top_k:
+            return chunks
+
+        return await self.rerank_chunks(query_text, chunks, top_k)
+
+    async def rerank_chunks(self, query_text: str, chunks: list[dict], top_k: int = 3) -> list[dict]:
+        """
+        Переранжирование чанков кросс-энкодером сервиса векторизации, при ошибке или превышении
+        бюджета задержки - первые top_k чанков в порядке kNN-поиска
+        """
+
+        try:
+            ranked = await self.vectorizer.rerank(
+                query_text,
+                [chunk["text"] for chunk in chunks],
+                top_k=top_k,
+                timeout=RAGBOT_RERANK_TIMEOUT,
+            )
+
+        except RuntimeError as ex:
+            logger.warning(f"Переранжирование чанков не выполнено: {ex}")
+            return chunks[:top_k]
+
+        if not ranked:
+            return chunks[:top_k]
+
+        return [{**chunks[position], "score": score} for position, score in ranked]
+
+    async def get_top_chunks_vectorizer(self, query_text: str, top_k: int = 3) -> list[dict]:
+        """
+        Поиск наиболее подходящих чанков в индексе сервиса векторизации (векторизация запроса на стороне сервиса)
+        """
+
+        hits = await self.vectorizer.index_search(RAGBOT_INDEX_NAME, text=query_text, top_k=top_k)
+
+        return [
+            {
+                "idx": hit["id"],  # индекс
+                "text": hit["metadata"].get("text", ""),  # текст чанка
+                "score": hit["score"]  # оценка релевантности
+            }
+            for hit in hits
+        ]
+
+    async def get_top_chunks_pgvector(
+            self, query_text: str, top_k: int = 3, ef_search: int = RAGBOT_PGVECTOR_EF_SEARCH
+    ) -> list[dict]:
         """
+        Поиск наиболее подходящих чанков базы знаний в PostgreSQL (HNSW-индекс pgvector, косинусное расстояние)
+        """
+
+        if not self.db:
+            return []
 
-        # векторизация текста запроса
         embedding = (await self.vectorizer.embed_text_batch([query_text]))[0]
+        rows = await self.db.app.project_knowledge.search_nearest(embedding, top_k=top_k, ef_search=ef_search)
 
-        # поиск в Elasticsearch
-        knn_query = {
-            "field": "vector",
-            "query_vector": embedding,
-            "k": top_k,
-            "num_candidates": top_k * 2
-        }
+        return [
+            {
+                "idx": str(row["id"]),  # индекс
+                "text": row["chunk"],  # текст чанка
+                "score": float(row["score"])  # оценка релевантности
+            }
+            for row in rows
+        ]
+
+    async def get_top_chunks_es(
+            self,
+            query_text: str,
+            top_k: int = 3,
+            hybrid: bool = RAGBOT_HYBRID_SEARCH,
+            candidates: int = RAGBOT_HYBRID_CANDIDATES,
+            num_candidates: int = RAGBOT_KNN_NUM_CANDIDATES,
+    ) -> list[dict]:
+        """
+        Поиск наиболее подходящих чанков в Elasticsearch (с оценкой релевантности).
+
+        Гибридный поиск: полнотекстовый (BM25, находит точные совпадения - коды ИКАО, названия моделей)
+        и kNN-поиск выполняются одновременно, по candidates лучших чанков каждого объединяются
+        Reciprocal Rank Fusion; num_candidates - количество кандидатов kNN-поиска на шард
+        """
+
+        k = max(top_k, candidates) if hybrid else top_k
+
+        async def knn_hits(model: str | None) -> list[dict] | None:
+            # векторизация текста запроса моделью индекса
+            embedding = (await self.vectorizer.embed_text_batch([query_text], model=model))[0]
+
+            knn_query = {
+                "field": "vector",
+                "query_vector": embedding,
+                "k": k,
+                "num_candidates": max(k, num_candidates)
+            }
+
+            return await self.search_es_hits({"knn": knn_query, "size": k, "_source": ["text", "metadata"]})
+
+        async def knn_search() -> list[dict]:
+            index, model = await self.get_index_model()
+            hits = await knn_hits(model)
+
+            # псевдоним переключён на версию с другой моделью (или размерность запроса не подошла) - повтор
+            if hits is None or any(hit["_index"] != index for hit in hits):
+                index, model = await self.get_index_model(refresh=True)
+                hits = await knn_hits(model)
+
+            return self.make_chunks(hits or [])
+
+        if not hybrid:
+            return await knn_search()
 
-        search_body = {
-            "knn": knn_query,
-            "_source": ["text", "metadata"]
-        }
+        match_query = {"query": {"match": {"text": query_text}}, "size": k, "_source": ["text", "metadata"]}
+        rankings = await asyncio.gather(knn_search(), self.search_es(match_query))
+
+        return reciprocal_rank_fusion(rankings, top_k)
+
+    async def get_index_model(self, refresh: bool = False) -> tuple[str, str | None]:
+        """
+        Версия индекса RAG-бота, на которую указывает псевдоним, и модель векторизации её чанков
+        """
+
+        cached = _index_models.get(RAGBOT_INDEX_NAME)
+        if cached and not refresh:
+            return cached
+
+        try:
+            mappings = await self.es.es.indices.get_mapping(index=RAGBOT_INDEX_NAME)
+        except Exception as ex:
+            logger.error(f"Ошибка чтения модели индекса RAG-бота: {ex}")
+            return RAGBOT_INDEX_NAME, None
+
+        index = next(iter(mappings))
+        model = (mappings[index]["mappings"].get("_meta") or {}).get("model") or None
+        _index_models[RAGBOT_INDEX_NAME] = index, model
+
+        return index, model
+
+    async def search_es_hits(self, search_body: dict) -> list[dict] | None:
+        """
+        Найденные документы индекса RAG-бота (None - ошибка поиска)
+        """
 
         response = await self.es.search(query=search_body, index=RAGBOT_INDEX_NAME)
-        hits = response["hits"]["hits"]
+        return response["hits"]["hits"] if response else None
+
+    async def search_es(self, search_body: dict) -> list[dict]:
+        """
+        Поиск чанков в индексе RAG-бота
+        """
 
+        return self.make_chunks(await self.search_es_hits(search_body) or [])
+
+    @staticmethod
+    def make_chunks(hits: list[dict]) -> list[dict]:
         # извлечение текста и прочих данных из результата
-        top_chunks = [
+        return [
             {
                 "idx": hit["_id"],  # индекс
                 "text": hit["_source"]["text"],  # текст чанка
@@ -46,11 +231,9 @@ class RagBotService:
             for hit in hits
         ]
 
-        return top_chunks
-
     async def get_top_chunks_list(self, query_text: str, top_k: int = 3) -> list[str]:
         """
-        Поиск наиболее подходящих чанков в Elasticsearch (список)
+        Поиск наиболее подходящих чанков (список)
         """
 
         chunks = await self.get_top_chunks(query_text, top_k)
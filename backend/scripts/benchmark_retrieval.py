@@ -0,0 +1,160 @@
+""" Сравнение задержки и полноты поиска чанков RAG-бота: HNSW pgvector и kNN Elasticsearch на одних и тех же чанках """
+
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+
+import numpy as np
+
+from sqlalchemy import select
+
+sys.path.append("/code")
+
+from app.config.app import RAGBOT_PGVECTOR_HNSW_EF_CONSTRUCTION, RAGBOT_PGVECTOR_HNSW_M
+from app.core import ESManager, VectorizerManager, es_manager, vectorizer_manager
+from app.core.db_manager import DBManager
+from app.db import async_session_maker
+from app.db.models import ProjectKnowledge
+
+# временный индекс Elasticsearch с чанками базы знаний
+BENCHMARK_INDEX_NAME = "rag-bot-benchmark"
+
+
+def recall(found: list, expected: list) -> float:
+    return len(set(found) & set(expected)) / len(expected) if expected else 1.0
+
+
+def report(name: str, latencies: list[float], recalls: list[float]) -> None:
+    latencies_ms = np.array(latencies) * 1000
+    benchmark_logger.info(
+        f"{name:<28} p50 {np.percentile(latencies_ms, 50):7.2f} мс  p95 {np.percentile(latencies_ms, 95):7.2f} мс  "
+        f"recall {np.mean(recalls):.3f}"
+    )
+
+
+async def load_chunks(db: DBManager) -> tuple[list[int], list[str], np.ndarray]:
+    """
+    Векторизованные чанки базы знаний
+    """
+
+    query = (
+        select(ProjectKnowledge.id, ProjectKnowledge.chunk, ProjectKnowledge.embedding)
+        .filter(ProjectKnowledge.embedding.is_not(None))
+        .order_by(ProjectKnowledge.id)
+    )
+    rows = (await db.session.execute(query)).all()
+
+    return [row.id for row in rows], [row.chunk for row in rows], np.array([row.embedding for row in rows], np.float32)
+
+
+async def create_es_index(es: ESManager, ids: list[int], vectors: np.ndarray) -> None:
+    """
+    Временный индекс Elasticsearch с теми же векторами и параметрами графа HNSW, что и в pgvector
+    """
+
+    await es.es.indices.delete(index=BENCHMARK_INDEX_NAME, ignore_unavailable=True)
+    await es.es.indices.create(index=BENCHMARK_INDEX_NAME, mappings={
+        "properties": {
+            "vector": {
+                "type": "dense_vector",
+                "dims": vectors.shape[1],
+                "index": True,
+                "similarity": "cosine",
+                "index_options": {
+                    "type": "hnsw",
+                    "m": RAGBOT_PGVECTOR_HNSW_M,
+                    "ef_construction": RAGBOT_PGVECTOR_HNSW_EF_CONSTRUCTION,
+                },
+            },
+        }
+    })
+
+    await es.bulk([
+        {"_op_type": "index", "_index": BENCHMARK_INDEX_NAME, "_id": str(chunk_id), "_source": {"vector": vector}}
+        for chunk_id, vector in zip(ids, vectors.tolist())
+    ])
+    await es.es.indices.refresh(index=BENCHMARK_INDEX_NAME)
+
+
+async def benchmark(
+        db: DBManager,
+        es: ESManager,
+        vectorizer: VectorizerManager,
+        queries: int,
+        top_k: int,
+        ef_search: list[int],
+        num_candidates: list[int],
+) -> None:
+    ids, texts, vectors = await load_chunks(db)
+    if not ids:
+        benchmark_logger.error("Нет векторизованных чанков базы знаний (scripts/ingest_ragbot.py без Elasticsearch)")
+        return
+
+    # запросы - начала случайных чанков, эталон - точный поиск по косинусной близости
+    sample = random.Random(0).sample(range(len(texts)), min(queries, len(texts)))
+    query_vectors = await vectorizer.embed_text_batch_array([" ".join(texts[i].split()[:12]) for i in sample])
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = (query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)) @ normalized.T
+    expected = [[ids[i] for i in np.argsort(-row)[:top_k]] for row in scores]
+
+    benchmark_logger.info(f"Чанков: {len(ids)}, размерность: {vectors.shape[1]}, запросов: {len(sample)}, k: {top_k}")
+
+    for ef in ef_search:
+        latencies, recalls = [], []
+        for query_vector, query_expected in zip(query_vectors.tolist(), expected):
+            started = time.perf_counter()
+            rows = await db.app.project_knowledge.search_nearest(query_vector, top_k=top_k, ef_search=ef)
+            latencies.append(time.perf_counter() - started)
+            recalls.append(recall([row["id"] for row in rows], query_expected))
+        await db.rollback()
+
+        report(f"pgvector ef_search={ef}", latencies, recalls)
+
+    if not es.es:
+        benchmark_logger.warning("Elasticsearch не настроен, сравнение только для pgvector")
+        return
+
+    await create_es_index(es, ids, vectors)
+    try:
+        for candidates in num_candidates:
+            latencies, recalls = [], []
+            for query_vector, query_expected in zip(query_vectors.tolist(), expected):
+                knn = {"field": "vector", "query_vector": query_vector, "k": top_k, "num_candidates": candidates}
+
+                started = time.perf_counter()
+                response = await es.search(query={"knn": knn, "_source": False}, index=BENCHMARK_INDEX_NAME)
+                latencies.append(time.perf_counter() - started)
+                recalls.append(recall([int(hit["_id"]) for hit in response["hits"]["hits"]], query_expected))
+
+            report(f"es num_candidates={candidates}", latencies, recalls)
+
+    finally:
+        await es.es.indices.delete(index=BENCHMARK_INDEX_NAME, ignore_unavailable=True)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200, help="количество запросов")
+    parser.add_argument("--top-k", type=int, default=10, help="количество искомых чанков")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160], help="значения ef_search")
+    parser.add_argument("--num-candidates", type=int, nargs="+", default=[10, 20, 40, 80, 160], help="значения ES")
+    args = parser.parse_args()
+
+    async with DBManager(session_factory=async_session_maker) as db, es_manager as es, vectorizer_manager as vectorizer:
+        await benchmark(db, es, vectorizer, args.queries, args.top_k, args.ef_search, args.num_candidates)
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+
+benchmark_logger = logging.getLogger()
+
+if __name__ == "__main__":
+    asyncio.run(main())
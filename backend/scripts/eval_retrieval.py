@@ -0,0 +1,119 @@
+"""
+Оценка поиска чанков RAG-бота в Elasticsearch: recall@k и задержка kNN-поиска и гибридного поиска (BM25 + kNN, RRF)
+при разном количестве кандидатов.
+
+Набор запросов - JSONL-файл со строками {"query": "...", "relevant": ["article:<id>", "knowledge:<id>:0"]}:
+relevant - идентификаторы чанков или записей источников (все чанки записи считаются релевантными).
+Без набора запросами служат заголовки статей индекса, релевантны чанки соответствующей статьи.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append("/code")
+
+from app.config.app import RAGBOT_INDEX_NAME
+from app.core import ESManager, es_manager, vectorizer_manager
+from app.services.ragbot import RagBotService
+
+
+def load_dataset(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def title_dataset(es: ESManager, queries: int) -> list[dict]:
+    """
+    Набор запросов из заголовков статей индекса RAG-бота
+    """
+
+    titles = {}
+    async for hit in es.scan(RAGBOT_INDEX_NAME, _source=["metadata"]):
+        metadata = hit["_source"].get("metadata") or {}
+        if metadata.get("title"):
+            titles[f'{metadata["source"]}:{metadata["source_id"]}'] = metadata["title"]
+
+    sample = random.Random(0).sample(sorted(titles), min(queries, len(titles)))
+
+    return [{"query": titles[source], "relevant": [source]} for source in sample]
+
+
+def recall(found: list[str], relevant: list[str]) -> float:
+    """
+    Доля релевантных чанков (записей источников), найденных среди found
+    """
+
+    matched = [item for item in relevant if any(idx == item or idx.startswith(f"{item}:") for idx in found)]
+
+    return len(matched) / len(relevant) if relevant else 1.0
+
+
+async def evaluate(service: RagBotService, dataset: list[dict], top_k: int, **params) -> tuple[float, float, float]:
+    """
+    Средний recall@k и задержка (p50, p95, в миллисекундах) на наборе запросов
+    """
+
+    latencies, recalls = [], []
+    for item in dataset:
+        started = time.perf_counter()
+        chunks = await service.get_top_chunks_es(item["query"], top_k=top_k, **params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(recall([chunk["idx"] for chunk in chunks], item["relevant"]))
+
+    return float(np.mean(recalls)), float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="JSONL-файл с запросами и релевантными чанками")
+    parser.add_argument("--queries", type=int, default=100, help="количество запросов из заголовков статей")
+    parser.add_argument("--top-k", type=int, default=5, help="количество искомых чанков")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 50, 100], help="чанков поиска для RRF")
+    parser.add_argument("--num-candidates", type=int, nargs="+", default=[10, 100, 500], help="кандидатов kNN на шард")
+    args = parser.parse_args()
+
+    async with es_manager as es, vectorizer_manager as vectorizer:
+        if not es.es:
+            eval_logger.error("Elasticsearch не настроен")
+            sys.exit(1)
+
+        dataset = load_dataset(args.dataset) if args.dataset else await title_dataset(es, args.queries)
+        if not dataset:
+            eval_logger.error("Пустой набор запросов")
+            sys.exit(1)
+
+        service = RagBotService(es, vectorizer)
+        eval_logger.info(f"Запросов: {len(dataset)}, k: {args.top_k}")
+
+        settings = [{"hybrid": False, "num_candidates": num} for num in args.num_candidates] + [
+            {"hybrid": True, "candidates": candidates, "num_candidates": num}
+            for candidates in args.candidates for num in args.num_candidates
+        ]
+
+        for params in settings:
+            mean_recall, p50, p95 = await evaluate(service, dataset, args.top_k, **params)
+
+            mode = f'hybrid candidates={params["candidates"]}' if params["hybrid"] else "knn"
+            eval_logger.info(
+                f'{mode:<24} num_candidates={params["num_candidates"]:<5} recall@{args.top_k} {mean_recall:.3f}  '
+                f"p50 {p50:7.2f} мс  p95 {p95:7.2f} мс"
+            )
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+
+eval_logger = logging.getLogger()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+""" Инкрементальная загрузка статей и базы знаний о проекте в индекс RAG-бота """
+
+import argparse
+import asyncio
+import logging
+import sys
+
+sys.path.append("/code")
+
+from app.core import es_manager, vectorizer_manager
+from app.core.db_manager import DBManager
+from app.db import async_session_maker
+from app.services.ingestion import KnowledgeIngestionService
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--force", action="store_true", help="векторизовать все чанки независимо от изменений (после смены модели)"
+    )
+    args = parser.parse_args()
+
+    async with DBManager(session_factory=async_session_maker) as db, es_manager as es, vectorizer_manager as vectorizer:
+        stats = await KnowledgeIngestionService(db, es, vectorizer).run(force=args.force)
+
+    ingest_logger.info(
+        f'Чанков: {stats["chunks"]}, без изменений: {stats["unchanged"]}, записано: {stats["indexed"]}, '
+        f'удалено: {stats["deleted"]}, ошибок: {stats["errors"]} '
+        f'за {stats["seconds"]:.1f} с ({stats["chunks_per_second"]:.1f} чанков/с)'
+    )
+
+    if stats["errors"]:
+        sys.exit(1)
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+
+ingest_logger = logging.getLogger()
+
+if __name__ == "__main__":
+    asyncio.run(main())
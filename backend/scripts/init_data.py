@@ -45,7 +45,7 @@ BASE_ARTICLES_PATH = "./scripts/articles"
 extensions = [
     # "citext",
     "uuid-ossp",
-    # "vector",
+    "vector",
 ]
 
 # схемы базы данных,
@@ -13,7 +13,7 @@ from pathlib import Path
 sys.path.append("/code")
 
 from app.config.app import ARTICLES_INDEX_NAME
-from app.core import ESManager, es_manager
+from app.core import ESManager, VectorizerManager, es_manager, vectorizer_manager
 from app.db.models import Countries, Articles, Aircraft
 from scripts.init_data import DataUtils
 
@@ -238,9 +238,9 @@ async def read_json(file: str) -> list:
         return json.load(f)
 
 
-async def index_articles(manager: ESManager):
+async def index_articles(manager: ESManager, vectorizer: VectorizerManager | None = None):
     """
-    Индексация статей
+    Индексация статей (с вектором содержимого, если доступен сервис векторизации)
     """
 
     index_name = ARTICLES_INDEX_NAME
@@ -278,6 +278,15 @@ async def index_articles(manager: ESManager):
             doc_id = doc["_id"]
             source_data = doc["_source"]
 
+            if vectorizer:
+                # вектор статьи целиком: сервис векторизации объединяет векторы перекрывающихся окон текста
+                try:
+                    content_vector, _ = await vectorizer.embed_long_text(source_data["content"])
+                    if content_vector:
+                        source_data["content_vector"] = content_vector
+                except RuntimeError as ex:
+                    init_es_logger.error(f"Ошибка векторизации документа ID {doc_id}", extra={"error": str(ex)})
+
             # индексация документа через ESManager
             success = await manager.index_document(index=index_name, doc_id=doc_id, document=source_data)
 
@@ -299,8 +308,8 @@ async def main() -> None:
         init_es_logger.warning("Строка подключения к Elasticsearch отсутствует")
         sys.exit(0)
 
-    async with es_manager as es:
-        await index_articles(es)
+    async with es_manager as es, vectorizer_manager as vectorizer:
+        await index_articles(es, vectorizer)
         # TODO: добавить индексацию фактов об авиации
 
 
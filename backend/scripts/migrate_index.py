@@ -0,0 +1,96 @@
+""" Перенос индекса сервиса векторизации или индекса RAG-бота в Elasticsearch на другую модель (blue/green) """
+
+import argparse
+import asyncio
+import logging
+import sys
+
+sys.path.append("/code")
+
+from app.config.app import RAGBOT_INDEX_NAME
+from app.core import VectorizerManager, es_manager, vectorizer_manager
+from app.core.db_manager import DBManager
+from app.db import async_session_maker
+from app.services.ingestion import KnowledgeIngestionService
+
+# интервал опроса состояния переноса (в секундах)
+POLL_INTERVAL = 2.0
+
+
+async def migrate(vectorizer: VectorizerManager, index: str, model: str, drop_source: bool) -> bool:
+    """
+    Запуск переноса и вывод прогресса до переключения псевдонима индекса на новую версию
+    """
+
+    status = await vectorizer.start_migration(index, model, drop_source=drop_source)
+    migrate_logger.info(f'Перенос индекса "{index}": {status["source"]} -> {status["target"]}, модель {model}')
+
+    while status["state"] == "running":
+        await asyncio.sleep(POLL_INTERVAL)
+        status = await vectorizer.get_migration(index)
+
+        migrate_logger.info(
+            f'Проход {status["passes"]}: {status["processed"]} из {status["total"]}, '
+            f'{status["texts_per_second"]:.1f} текстов/с, осталось ~{status["eta_seconds"]:.0f} с'
+        )
+
+    if status["state"] != "completed":
+        migrate_logger.error(f'Перенос индекса "{index}" не выполнен: {status["error"]}')
+        return False
+
+    migrate_logger.info(
+        f'Индекс "{index}" переключён на {status["target"]}: {status["processed"]} текстов '
+        f'за {status["elapsed_seconds"]:.1f} с ({status["texts_per_second"]:.1f} текстов/с)'
+    )
+    return True
+
+
+async def migrate_es(vectorizer: VectorizerManager, model: str, drop_source: bool) -> bool:
+    """
+    Построение новой версии индекса RAG-бота в Elasticsearch новой моделью и переключение псевдонима
+    (прогресс и скорость выводятся во время загрузки)
+    """
+
+    async with DBManager(session_factory=async_session_maker) as db, es_manager as es:
+        try:
+            stats = await KnowledgeIngestionService(db, es, vectorizer).migrate(model, drop_source=drop_source)
+
+        except RuntimeError as ex:
+            migrate_logger.error(str(ex))
+            return False
+
+    migrate_logger.info(
+        f'Индекс "{RAGBOT_INDEX_NAME}" переключён на {stats["target"]}: {stats["indexed"]} чанков '
+        f'за {stats["seconds"]:.1f} с ({stats["chunks_per_second"]:.1f} чанков/с)'
+    )
+    return True
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", required=True, help="модель новой версии индекса (из MODELS сервиса векторизации)")
+    parser.add_argument("--index", default=RAGBOT_INDEX_NAME, help="псевдоним индекса")
+    parser.add_argument("--drop-source", action="store_true", help="удалить прежнюю версию после переключения")
+    parser.add_argument("--es", action="store_true", help="перенести индекс RAG-бота в Elasticsearch")
+    args = parser.parse_args()
+
+    async with vectorizer_manager as vectorizer:
+        if args.es:
+            migrated = await migrate_es(vectorizer, args.model, args.drop_source)
+        else:
+            migrated = await migrate(vectorizer, args.index, args.model, args.drop_source)
+
+    if not migrated:
+        sys.exit(1)
+
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)],
+)
+
+migrate_logger = logging.getLogger()
+
+if __name__ == "__main__":
+    asyncio.run(main())
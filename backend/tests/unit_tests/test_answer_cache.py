@@ -0,0 +1,88 @@
+import numpy as np
+
+from app.core.answer_cache import SemanticAnswerCache, normalize_question, prompt_fingerprints, question_anchors
+from app.schemas.chatbot import SChatBotSettings
+
+ONTOPIC = "intent_ontopic"
+PROJECT = "intent_project"
+
+
+def fingerprints(system_prompt: str = "system", rag_prompt: str = "rag") -> dict[str, str]:
+    return prompt_fingerprints(SChatBotSettings(model="GigaChat", system_prompt=system_prompt, rag_prompt=rag_prompt))
+
+
+def test_normalize_question():
+    assert normalize_question("  Какая скорость  Ан-225?! ") == "какая скорость ан 225"
+    assert normalize_question("Ёмкость баков") == normalize_question("емкость БАКОВ")
+
+
+def test_exact_and_semantic_hits():
+    cache = SemanticAnswerCache(threshold=0.9)
+    prints = fingerprints()
+
+    cache.put("Какая скорость Ан-225?", np.array([1.0, 0.0]), ONTOPIC, "850 км/ч", 120, prints)
+
+    assert cache.get_exact("какая скорость ан 225", prints).answer == "850 км/ч"
+    assert cache.get_exact("Кто создал Ан-225?", prints) is None
+
+    assert cache.search("Скорость Ан-225", np.array([0.99, 0.05]), prints).answer == "850 км/ч"
+    assert cache.search("Скорость Ан-225", np.array([0.5, 0.5]), prints) is None
+    assert cache.search("Скорость Ан-225", None, prints) is None
+
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1 and stats["semantic_hits"] == 1 and stats["misses"] == 2
+    assert stats["saved_tokens"] == 240
+
+
+def test_lexical_guard():
+    cache = SemanticAnswerCache(threshold=0.9)
+    prints = fingerprints()
+
+    assert question_anchors("Скорость Ту-144 в 1975 году?") == {"144", "1975"}
+
+    cache.put("Какая крейсерская скорость Ту-144?", np.array([1.0, 0.0]), ONTOPIC, "2300 км/ч", 100, prints)
+    cache.put("Какая крейсерская скорость Ту-154?", np.array([0.98, 0.2]), ONTOPIC, "900 км/ч", 100, prints)
+
+    # векторы вопросов почти совпадают, но модели разные: ответ выбирается по совпадению слов с цифрами
+    assert cache.search("Крейсерская скорость Ту-154", np.array([1.0, 0.0]), prints).answer == "900 км/ч"
+    assert cache.search("Крейсерская скорость Ту 144", np.array([1.0, 0.0]), prints).answer == "2300 км/ч"
+    assert cache.search("Крейсерская скорость Ту-134", np.array([1.0, 0.0]), prints) is None
+    assert cache.search("Крейсерская скорость Ту", np.array([1.0, 0.0]), prints) is None
+
+
+def test_not_cacheable_intent():
+    cache = SemanticAnswerCache()
+    cache.put("Привет", np.array([1.0, 0.0]), "intent_greeting", "Приветствую", 10, fingerprints())
+
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_invalidation_by_intent():
+    cache = SemanticAnswerCache(threshold=0.9)
+    prints = fingerprints()
+
+    cache.put("вопрос об авиации", np.array([1.0, 0.0]), ONTOPIC, "ответ", 10, prints)
+    cache.put("вопрос о проекте", np.array([0.0, 1.0]), PROJECT, "ответ RAG", 10, prints)
+
+    # изменение промта RAG-бота делает устаревшими только ответы по теме проекта
+    changed = fingerprints(rag_prompt="new rag")
+    assert cache.get_exact("вопрос о проекте", changed) is None
+    assert cache.get_exact("вопрос об авиации", changed).answer == "ответ"
+    assert cache.get_stats()["invalidated"] == 1
+
+    # изменение системного промта - все ответы
+    assert cache.search(
+        "вопрос об авиации", np.array([1.0, 0.0]), fingerprints(system_prompt="new system", rag_prompt="new rag")
+    ) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_max_entries():
+    cache = SemanticAnswerCache(max_entries=2)
+    prints = fingerprints()
+
+    for number in range(3):
+        cache.put(f"вопрос {number}", np.array([1.0, float(number)]), ONTOPIC, f"ответ {number}", 1, prints)
+
+    assert cache.get_stats()["entries"] == 2
+    assert cache.get_exact("вопрос 0", prints) is None
@@ -0,0 +1,277 @@
+import numpy as np
+
+from types import SimpleNamespace
+
+from app.config.app import RAGBOT_RETRIEVER_PGVECTOR, RAGBOT_RETRIEVER_VECTORIZER
+from app.services import ingestion
+from app.services.ingestion import (
+    Chunk, KnowledgeIngestionService, chunk_text, clean_markdown, content_hash, make_chunks
+)
+
+
+class FakeES:
+
+    def __init__(self, documents: dict[str, dict] | None = None):
+        self.es = self
+        self.indices = self
+        self.documents = documents or {}
+
+    async def exists(self, index: str) -> bool:
+        return True
+
+    async def get_mapping(self, index: str) -> dict:
+        return {index: {"mappings": {"_meta": {"model": "test-model"}}}}
+
+    async def scan(self, index: str, query: dict | None = None, **kwargs):
+        for doc_id, source in self.documents.items():
+            yield {"_id": doc_id, "_source": source}
+
+    async def bulk(self, actions: list[dict]) -> tuple[int, list]:
+        for action in actions:
+            if action["_op_type"] == "delete":
+                self.documents.pop(action["_id"])
+            else:
+                self.documents[action["_id"]] = action["_source"]
+        return len(actions), []
+
+
+class FakeVersionedES(FakeES):
+    """
+    Индексы с псевдонимом rag-bot (изначально - индекс прежнего формата с названием псевдонима)
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.indexes: dict[str, dict] = {}
+        self.mappings: dict[str, dict] = {}
+        self.alias = None
+
+    def resolve(self, index: str) -> str:
+        return self.alias if index == "rag-bot" and self.alias else index
+
+    async def exists(self, index: str) -> bool:
+        return self.resolve(index) in self.indexes
+
+    async def exists_alias(self, name: str) -> bool:
+        return self.alias is not None
+
+    async def get_alias(self, name: str) -> dict:
+        return {self.alias: {"aliases": {name: {}}}}
+
+    async def get(self, index: str, allow_no_indices: bool) -> dict:
+        return {name: {} for name in self.indexes if name.startswith("rag-bot_v")}
+
+    async def create(self, index: str, mappings: dict) -> None:
+        self.indexes[index], self.mappings[index] = {}, mappings
+
+    async def get_mapping(self, index: str) -> dict:
+        return {self.resolve(index): {"mappings": self.mappings[self.resolve(index)]}}
+
+    async def refresh(self, index: str) -> None:
+        pass
+
+    async def delete(self, index: str, ignore_unavailable: bool) -> None:
+        self.indexes.pop(index, None)
+
+    async def update_aliases(self, actions: list[dict]) -> None:
+        for action in actions:
+            if "add" in action:
+                self.alias = action["add"]["index"]
+            elif "remove_index" in action:
+                self.indexes.pop(action["remove_index"]["index"])
+
+    async def scan(self, index: str, query: dict | None = None, **kwargs):
+        for doc_id, source in self.indexes.get(self.resolve(index), {}).items():
+            yield {"_id": doc_id, "_source": source}
+
+    async def bulk(self, actions: list[dict]) -> tuple[int, list]:
+        for action in actions:
+            documents = self.indexes[self.resolve(action["_index"])]
+            if action["_op_type"] == "delete":
+                documents.pop(action["_id"])
+            else:
+                documents[action["_id"]] = action["_source"]
+        return len(actions), []
+
+
+class FakeVectorizer:
+
+    def __init__(self):
+        self.texts = []
+        self.models = set()
+        self.items: dict[str, dict] = {}
+
+    async def embed_text_batch_array(self, texts: list[str], model: str | None = None) -> np.ndarray:
+        self.texts.extend(texts)
+        self.models.add(model)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    async def index_upsert(self, index: str, items: list[dict]) -> int:
+        self.texts.extend(item["text"] for item in items)
+        self.items.update({item["id"]: item["metadata"] for item in items})
+        return len(items)
+
+    async def index_search(self, index: str, text: str, top_k: int, metadata_filter: dict[str, str]) -> list[dict]:
+        hits = [
+            {"id": item_id, "score": 1.0, "metadata": metadata}
+            for item_id, metadata in self.items.items()
+            if metadata_filter.items() <= metadata.items()
+        ]
+        return hits[:top_k]
+
+    async def index_list(self, index: str, fields: list[str] | None = None) -> list[dict]:
+        return [
+            {"id": item_id, "metadata": {key: value for key, value in metadata.items() if key in fields}}
+            for item_id, metadata in self.items.items()
+        ]
+
+    async def index_delete(self, index: str, ids: list[str]) -> int:
+        deleted = [item_id for item_id in ids if item_id in self.items]
+        for item_id in deleted:
+            del self.items[item_id]
+        return len(deleted)
+
+
+class FakeKnowledge:
+
+    def __init__(self, rows: list[dict]):
+        self.rows = {row["id"]: row for row in rows}
+        self.app = SimpleNamespace(project_knowledge=self)
+
+    async def stream_chunks(self, batch_size: int = 100):
+        yield [dict(row) for row in self.rows.values()]
+
+    async def update_embeddings(self, values: list[dict]) -> None:
+        for value in values:
+            self.rows[value["id"]].update(value)
+
+    async def commit(self) -> None:
+        pass
+
+
+class FakeIngestion(KnowledgeIngestionService):
+
+    def __init__(self, articles: dict[str, str], es: FakeES, vectorizer: FakeVectorizer):
+        super().__init__(db=None, es=es, vectorizer=vectorizer)
+        self.articles = articles
+
+    async def stream_chunks(self):
+        for article_id, text in self.articles.items():
+            yield make_chunks("article", article_id, text)
+
+
+def test_chunk_text():
+    words = [f"w{i}" for i in range(10)]
+
+    assert chunk_text("", size=4, overlap=1) == []
+    assert chunk_text("a b c", size=4, overlap=1) == ["a b c"]
+    assert chunk_text(" ".join(words), size=4, overlap=1) == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert chunk_text(" ".join(words), size=4, overlap=0) == ["w0 w1 w2 w3", "w4 w5 w6 w7", "w8 w9"]
+
+
+def test_clean_markdown():
+    assert clean_markdown("# Заголовок\n\nТекст **жирный**  и *курсив*") == "Заголовок Текст жирный и курсив"
+
+
+def test_chunk_id_and_hash():
+    chunk = Chunk(source="article", source_id="1", number=2, text="текст")
+    same = Chunk(source="article", source_id="1", number=2, text="текст")
+
+    assert chunk.id == "article:1:2"
+    assert chunk.content_hash == same.content_hash
+    assert chunk.content_hash != Chunk(source="article", source_id="1", number=2, text="другой").content_hash
+
+
+async def test_incremental_run():
+    es, vectorizer = FakeES(), FakeVectorizer()
+
+    stats = await FakeIngestion({"1": "первая статья", "2": "вторая статья"}, es, vectorizer).run()
+    assert stats["indexed"] == 2 and stats["unchanged"] == 0
+    assert set(es.documents) == {"article:1:0", "article:2:0"}
+
+    # изменена одна статья, другая удалена
+    vectorizer.texts.clear()
+    stats = await FakeIngestion({"1": "первая статья (правка)", "3": "третья статья"}, es, vectorizer).run()
+    assert stats["indexed"] == 2 and stats["unchanged"] == 0 and stats["deleted"] == 1
+    assert sorted(vectorizer.texts) == ["первая статья (правка)", "третья статья"]
+    assert set(es.documents) == {"article:1:0", "article:3:0"}
+
+    # чанки векторизуются моделью, которой построен индекс
+    assert vectorizer.models == {"test-model"}
+
+    # без изменений
+    vectorizer.texts.clear()
+    stats = await FakeIngestion({"1": "первая статья (правка)", "3": "третья статья"}, es, vectorizer).run()
+    assert stats["indexed"] == 0 and stats["unchanged"] == 2 and vectorizer.texts == []
+
+    stats = await FakeIngestion({"1": "первая статья (правка)", "3": "третья статья"}, es, vectorizer).run(force=True)
+    assert stats["indexed"] == 2
+
+
+async def test_pgvector_run():
+    db, vectorizer = FakeKnowledge([
+        {"id": 1, "chunk": "первый чанк", "metadata": None, "embedding_hash": content_hash("первый чанк")},
+        {"id": 2, "chunk": "второй чанк", "metadata": None, "embedding_hash": None},
+    ]), FakeVectorizer()
+
+    # Elasticsearch не настроен: векторы записываются в базу знаний
+    stats = await KnowledgeIngestionService(db=db, es=None, vectorizer=vectorizer).run()
+    assert stats["indexed"] == 1 and stats["unchanged"] == 1
+    assert vectorizer.texts == ["второй чанк"]
+    assert db.rows[2]["embedding_hash"] == content_hash("второй чанк") and len(db.rows[2]["embedding"]) == 4
+
+
+async def test_pgvector_run_with_es(monkeypatch):
+    monkeypatch.setattr(ingestion, "RAGBOT_RETRIEVER", RAGBOT_RETRIEVER_PGVECTOR)
+    db, es, vectorizer = FakeKnowledge([
+        {"id": 1, "chunk": "первый чанк", "metadata": None, "embedding_hash": None},
+    ]), FakeES(), FakeVectorizer()
+
+    # Elasticsearch настроен, но поиск идёт в pgvector: векторы записываются в базу знаний
+    stats = await KnowledgeIngestionService(db=db, es=es, vectorizer=vectorizer).run()
+    assert stats["indexed"] == 1 and es.documents == {}
+    assert db.rows[1]["embedding_hash"] == content_hash("первый чанк")
+
+
+async def test_vectorizer_run(monkeypatch):
+    monkeypatch.setattr(ingestion, "RAGBOT_RETRIEVER", RAGBOT_RETRIEVER_VECTORIZER)
+    es, vectorizer = FakeES(), FakeVectorizer()
+
+    stats = await FakeIngestion({"1": "первая статья", "2": "вторая статья"}, es, vectorizer).run()
+    assert stats["indexed"] == 2 and stats["deleted"] == 0 and es.documents == {}
+    assert vectorizer.items["article:1:0"]["text"] == "первая статья"
+
+    # неизменённые чанки не записываются повторно
+    vectorizer.texts.clear()
+    stats = await FakeIngestion({"1": "первая статья", "2": "вторая статья"}, es, vectorizer).run()
+    assert stats["indexed"] == 0 and stats["unchanged"] == 2 and vectorizer.texts == []
+
+    # статья изменена, другая удалена: записывается изменённый чанк, чанк удалённой статьи удаляется
+    stats = await FakeIngestion({"1": "первая статья (правка)"}, es, vectorizer).run()
+    assert stats["indexed"] == 1 and stats["deleted"] == 1
+    assert set(vectorizer.items) == {"article:1:0"}
+    assert vectorizer.items["article:1:0"]["text"] == "первая статья (правка)"
+
+
+async def test_es_migration():
+    es, vectorizer = FakeVersionedES(), FakeVectorizer()
+    articles = {"1": "первая статья", "2": "вторая статья"}
+
+    await FakeIngestion(articles, es, vectorizer).run()
+    assert set(es.indexes) == {"rag-bot"} and vectorizer.models == {None}
+
+    # новая версия строится новой моделью, псевдоним заменяет индекс прежнего формата
+    vectorizer.models.clear()
+    stats = await FakeIngestion(articles, es, vectorizer).migrate("new-model")
+    assert stats["indexed"] == 2 and stats["source"] == "rag-bot" and stats["target"] == "rag-bot_v1"
+    assert es.alias == "rag-bot_v1" and set(es.indexes) == {"rag-bot_v1"}
+    assert vectorizer.models == {"new-model"}
+
+    # загрузка после переноса пишет через псевдоним моделью новой версии
+    vectorizer.models.clear()
+    stats = await FakeIngestion({**articles, "3": "третья статья"}, es, vectorizer).run()
+    assert stats["indexed"] == 1 and "article:3:0" in es.indexes["rag-bot_v1"]
+    assert vectorizer.models == {"new-model"}
+
+    stats = await FakeIngestion(articles, es, vectorizer).migrate("other-model", drop_source=True)
+    assert es.alias == "rag-bot_v2" and set(es.indexes) == {"rag-bot_v2"} and stats["deleted"] == 0
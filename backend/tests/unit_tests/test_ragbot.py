@@ -0,0 +1,80 @@
+from app.services.ragbot import RagBotService, reciprocal_rank_fusion
+
+
+class FakeES:
+
+    def __init__(self, knn: list[str], match: list[str]):
+        self.es = self
+        self.indices = self
+        self.hits = {"knn": knn, "query": match}
+        self.queries = []
+        self.version, self.model = "rag-bot_v1", "model-1"  # версия индекса, на которую указывает псевдоним
+
+    async def get_mapping(self, index: str) -> dict:
+        return {self.version: {"mappings": {"_meta": {"model": self.model}}}}
+
+    async def search(self, query: dict, index: str) -> dict:
+        self.queries.append(query)
+        kind = "knn" if "knn" in query else "query"
+        return {"hits": {"hits": [
+            {"_index": self.version, "_id": idx, "_source": {"text": f"text {idx}"}, "_score": 1.0 / rank}
+            for rank, idx in enumerate(self.hits[kind][:query["size"]], start=1)
+        ]}}
+
+
+class FakeVectorizer:
+
+    def __init__(self):
+        self.models = []
+
+    async def embed_text_batch(self, texts: list[str], model: str | None = None) -> list[list[float]]:
+        self.models.append(model)
+        return [[1.0, 0.0] for _ in texts]
+
+
+def chunks(*ids: str) -> list[dict]:
+    return [{"idx": idx, "text": idx, "score": 0.0} for idx in ids]
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([chunks("a", "b", "c", "d"), chunks("c", "a")], top_k=3, rank_constant=60)
+
+    # "a" и "c" найдены обоими поисками
+    assert [chunk["idx"] for chunk in fused] == ["a", "c", "b"]
+    assert fused[0]["score"] == 1 / 61 + 1 / 62
+
+    assert reciprocal_rank_fusion([], top_k=3) == []
+
+
+async def test_hybrid_search():
+    es = FakeES(knn=["a", "b", "c"], match=["x", "a"])
+    service = RagBotService(es, FakeVectorizer())
+
+    found = await service.get_top_chunks_es("Ан-225", top_k=2, hybrid=True, candidates=10, num_candidates=5)
+    assert [chunk["idx"] for chunk in found] == ["a", "x"]
+
+    knn = next(query["knn"] for query in es.queries if "knn" in query)
+    assert knn["k"] == 10 and knn["num_candidates"] == 10
+
+    es.queries.clear()
+    found = await service.get_top_chunks_es("Ан-225", top_k=2, hybrid=False, num_candidates=100)
+    assert [chunk["idx"] for chunk in found] == ["a", "b"]
+    assert len(es.queries) == 1 and es.queries[0]["knn"]["num_candidates"] == 100
+
+
+async def test_query_model_follows_alias():
+    es, vectorizer = FakeES(knn=["a", "b"], match=[]), FakeVectorizer()
+    service = RagBotService(es, vectorizer)
+
+    await service.get_top_chunks_es("Ан-225", top_k=2, hybrid=False)
+    assert vectorizer.models == ["model-1"]
+
+    # псевдоним переключён на версию с другой моделью: запрос векторизуется заново её моделью
+    es.version, es.model = "rag-bot_v2", "model-2"
+    vectorizer.models.clear()
+    found = await service.get_top_chunks_es("Ан-225", top_k=2, hybrid=False)
+    assert vectorizer.models == ["model-1", "model-2"] and [chunk["idx"] for chunk in found] == ["a", "b"]
+
+    vectorizer.models.clear()
+    await service.get_top_chunks_es("Ан-225", top_k=2, hybrid=False)
+    assert vectorizer.models == ["model-2"]
@@ -0,0 +1,107 @@
+import grpc
+import time
+
+from app.core.vectorizer_balancer import BalancingPolicy, ReplicaBalancer, VectorizerReplica, parse_targets
+
+
+def make_balancer(policy: str = BalancingPolicy.least_outstanding, replicas: int = 3) -> ReplicaBalancer:
+    return ReplicaBalancer(
+        replicas=[VectorizerReplica(f"replica-{i}:50051") for i in range(replicas)],
+        policy=policy,
+        failure_threshold=2,
+        ejection_seconds=10,
+    )
+
+
+def test_parse_targets():
+    assert parse_targets(None) == []
+    assert parse_targets("a:1") == ["a:1"]
+    assert parse_targets("a:1, b:2,") == ["a:1", "b:2"]
+    assert parse_targets(["a:1", "b:2"]) == ["a:1", "b:2"]
+    assert parse_targets("/run/vectorizer/grpc.sock,unix:/tmp/v.sock") == [
+        "unix:/run/vectorizer/grpc.sock", "unix:/tmp/v.sock"
+    ]
+
+
+def test_round_robin():
+    balancer = make_balancer(BalancingPolicy.round_robin)
+
+    picked = [balancer.pick().target for _ in range(6)]
+    assert sorted(picked) == sorted([replica.target for replica in balancer.replicas] * 2)
+
+
+def test_least_outstanding():
+    balancer = make_balancer()
+    balancer.replicas[0].in_flight = 5
+    balancer.replicas[1].in_flight = 1
+    balancer.replicas[2].in_flight = 3
+
+    assert balancer.pick() is balancer.replicas[1]
+
+
+def test_pick_excludes_tried_replicas():
+    balancer = make_balancer()
+
+    for _ in range(3):
+        assert balancer.pick(exclude={"replica-0:50051", "replica-1:50051"}) is balancer.replicas[2]
+
+    # все реплики опробованы - выбор среди всех доступных
+    assert balancer.pick(exclude={replica.target for replica in balancer.replicas}) in balancer.replicas
+
+
+def test_ejection_and_return():
+    balancer = make_balancer()
+    replica = balancer.replicas[0]
+
+    # ошибка запроса не исключает реплику
+    balancer.record(replica, 0.01, grpc.StatusCode.INVALID_ARGUMENT)
+    balancer.record(replica, 0.01, grpc.StatusCode.INVALID_ARGUMENT)
+    assert replica.available
+
+    # неисправность реплики failure_threshold раз подряд исключает её
+    balancer.record(replica, 0.01, grpc.StatusCode.UNAVAILABLE)
+    assert replica.available
+    balancer.record(replica, 0.01, grpc.StatusCode.UNAVAILABLE)
+    assert not replica.available
+    assert all(balancer.pick() is not replica for _ in range(6))
+
+    # по истечении времени исключения реплика возвращается, повторное исключение - вдвое дольше
+    replica.ejected_until = time.monotonic()
+    assert replica.available
+    balancer.record(replica, 0.01, grpc.StatusCode.DEADLINE_EXCEEDED)
+    balancer.record(replica, 0.01, grpc.StatusCode.DEADLINE_EXCEEDED)
+    assert replica.ejected_until - time.monotonic() > 15
+
+    assert replica.stats()["errors"] == 6
+
+
+def test_short_deadline_is_not_failure():
+    balancer = make_balancer()
+    replica = balancer.replicas[0]
+
+    # истечение укороченного срока (переранжирование) не исключает исправную реплику
+    for _ in range(5):
+        balancer.record(replica, 0.5, grpc.StatusCode.DEADLINE_EXCEEDED, short_deadline=True)
+    assert replica.available
+    assert replica.stats()["errors"] == 5
+
+
+def test_all_replicas_unavailable():
+    balancer = make_balancer()
+    for replica in balancer.replicas:
+        replica.healthy = False
+
+    # доступных реплик нет - запрос всё равно направляется на одну из них
+    assert balancer.pick() in balancer.replicas
+    assert not balancer.has_alternative(set())
+
+
+def test_prefer_lower_priority():
+    balancer = make_balancer()
+    balancer.replicas[2].priority = -1  # например, Unix-сокет на том же хосте
+
+    assert all(balancer.pick() is balancer.replicas[2] for _ in range(6))
+
+    # недоступная предпочтительная реплика - выбор среди остальных
+    balancer.replicas[2].healthy = False
+    assert all(balancer.pick() is not balancer.replicas[2] for _ in range(6))
@@ -0,0 +1,237 @@
+""" Контроль допуска запросов: ограничение выполняемой работы и очереди по приоритетам """
+
+import asyncio
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+# сглаживание скользящих средних (доля нового значения)
+EWMA_ALPHA = 0.1
+
+
+class Priority:
+    """
+    Приоритеты запросов (меньше - важнее)
+    """
+
+    interactive = 0  # одиночные запросы пользователей
+    bulk = 1  # пакетная векторизация, индексация
+
+    names = {interactive: "interactive", bulk: "bulk"}
+
+
+class AdmissionRejected(RuntimeError):
+    """
+    Очередь запросов заполнена или время ожидания истекло
+    """
+
+    def __init__(self, message: str, retry_after_ms: int) -> None:
+        super().__init__(message)
+        self.retry_after_ms = retry_after_ms
+
+
+class _Waiter:
+    __slots__ = ("cost", "future", "enqueued")
+
+    def __init__(self, cost: int) -> None:
+        self.cost = cost
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued = time.monotonic()
+
+
+class AdmissionController:
+    """
+    Контроль допуска.
+
+    Стоимость запроса - количество текстов. Одновременно выполняется работа суммарной стоимостью
+    не больше max_in_flight, из них пакетные запросы - не больше bulk_max_in_flight, чтобы у интерактивных
+    запросов всегда оставался запас. Остальные запросы ждут в очереди своего приоритета; освободившаяся
+    ёмкость сначала отдаётся интерактивным запросам. Если очередь приоритета заполнена или ожидание
+    превысило max_wait_ms, запрос отклоняется сразу, с оценкой времени, через которое стоит повторить.
+    """
+
+    def __init__(
+            self,
+            max_in_flight: int = 256,
+            bulk_max_in_flight: int = 192,
+            queue_limits: dict[int, int] | None = None,
+            max_wait_ms: float = 2000,
+            min_retry_after_ms: float = 100,
+            max_retry_after_ms: float = 5000,
+    ) -> None:
+        self.max_in_flight = max(0, max_in_flight)
+        self.bulk_max_in_flight = max(1, min(bulk_max_in_flight, self.max_in_flight or bulk_max_in_flight))
+        self.queue_limits = queue_limits or {Priority.interactive: 1024, Priority.bulk: 64}
+        self.max_wait = max_wait_ms / 1000 if max_wait_ms > 0 else None
+        self.min_retry_after_ms = min_retry_after_ms
+        self.max_retry_after_ms = max_retry_after_ms
+
+        self.in_flight = 0
+        self.in_flight_by_priority = {priority: 0 for priority in Priority.names}
+        self._queues: dict[int, deque[_Waiter]] = {priority: deque() for priority in Priority.names}
+
+        # метрики
+        self.admitted = {priority: 0 for priority in Priority.names}
+        self.rejected = {priority: 0 for priority in Priority.names}
+        self.wait_ms = {priority: 0.0 for priority in Priority.names}  # среднее время ожидания в очереди
+        self.wait_ms_max = {priority: 0.0 for priority in Priority.names}
+        self.service_ms_per_text = 0.0  # среднее время выполнения в расчёте на один текст
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0
+
+    def _limit(self, priority: int) -> int:
+        return self.bulk_max_in_flight if priority == Priority.bulk else self.max_in_flight
+
+    def _fits(self, priority: int, cost: int) -> bool:
+        if self.in_flight + cost > self.max_in_flight:
+            return False
+
+        return priority != Priority.bulk or self.in_flight_by_priority[priority] + cost <= self.bulk_max_in_flight
+
+    def _grant(self, priority: int, cost: int) -> None:
+        self.in_flight += cost
+        self.in_flight_by_priority[priority] += cost
+        self.admitted[priority] += 1
+
+    def _dispatch(self) -> None:
+        """
+        Выдача освободившейся ёмкости ожидающим запросам в порядке приоритета
+        """
+
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            while queue:
+                waiter = queue[0]
+                if waiter.future.done():
+                    queue.popleft()
+                    continue
+
+                if not self._fits(priority, waiter.cost):
+                    # запросы более низкого приоритета не обгоняют ожидающий запрос
+                    return
+
+                queue.popleft()
+                self._grant(priority, waiter.cost)
+                waiter.future.set_result(None)
+
+    def retry_after_ms(self, priority: int) -> int:
+        """
+        Оценка времени освобождения ёмкости: работа в очереди приоритета и выше, делённая на ёмкость
+        """
+
+        queued = sum(
+            waiter.cost
+            for queue_priority, queue in self._queues.items() if queue_priority <= priority
+            for waiter in queue
+        )
+        estimate = self.service_ms_per_text * (queued + self.in_flight) / max(1, self._limit(priority))
+
+        return int(min(self.max_retry_after_ms, max(self.min_retry_after_ms, estimate)))
+
+    def _record_wait(self, priority: int, waited_ms: float) -> None:
+        self.wait_ms[priority] += EWMA_ALPHA * (waited_ms - self.wait_ms[priority])
+        self.wait_ms_max[priority] = max(self.wait_ms_max[priority], waited_ms)
+
+    def _release(self, priority: int, cost: int, started: float) -> None:
+        self.in_flight -= cost
+        self.in_flight_by_priority[priority] -= cost
+
+        service_ms = (time.monotonic() - started) * 1000 / cost
+        self.service_ms_per_text += EWMA_ALPHA * (service_ms - self.service_ms_per_text)
+
+        self._dispatch()
+
+    def _abandon(self, priority: int, waiter: _Waiter) -> None:
+        """
+        Уход запроса из очереди без выполнения
+        """
+
+        if waiter.future.done():
+            # ёмкость выдана одновременно с уходом запроса - возвращаем её
+            self._release(priority, waiter.cost, time.monotonic())
+            return
+
+        waiter.future.cancel()
+        self._queues[priority].remove(waiter)
+        # ушедший запрос мог задерживать очередь более низкого приоритета
+        self._dispatch()
+
+    async def _acquire(self, priority: int, cost: int, wait: bool) -> None:
+        queue = self._queues[priority]
+
+        # без очереди, если ёмкость есть и никто не ждёт с тем же или более высоким приоритетом
+        no_waiters = not any(self._queues[p] for p in self._queues if p <= priority)
+        if no_waiters and self._fits(priority, cost):
+            self._grant(priority, cost)
+            self._record_wait(priority, 0.0)
+            return
+
+        if not wait and len(queue) >= self.queue_limits.get(priority, 0):
+            self.rejected[priority] += 1
+            raise AdmissionRejected(
+                f"Очередь {Priority.names[priority]} заполнена",
+                self.retry_after_ms(priority),
+            )
+
+        waiter = _Waiter(cost)
+        queue.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), None if wait else self.max_wait)
+
+        except TimeoutError:
+            self._abandon(priority, waiter)
+            self.rejected[priority] += 1
+            raise AdmissionRejected(
+                f"Время ожидания в очереди {Priority.names[priority]} истекло",
+                self.retry_after_ms(priority),
+            )
+
+        except asyncio.CancelledError:
+            # клиент отменил запрос во время ожидания
+            self._abandon(priority, waiter)
+            raise
+
+        finally:
+            self._record_wait(priority, (time.monotonic() - waiter.enqueued) * 1000)
+
+    @asynccontextmanager
+    async def admit(self, priority: int, cost: int = 1, wait: bool = False) -> AsyncIterator[None]:
+        """
+        Допуск запроса стоимостью cost текстов; при wait запрос ждёт без ограничения времени и размера очереди
+        (для потоков, которые и так притормаживаются управлением потоком HTTP/2)
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        # запрос дороже допустимой ёмкости выполняется, когда он один
+        cost = max(1, min(cost, self._limit(priority)))
+
+        await self._acquire(priority, cost, wait)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(priority, cost, started)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Метрики контроля допуска
+        """
+
+        stats: dict[str, float] = {"admission_in_flight": self.in_flight}
+        for priority, name in Priority.names.items():
+            stats[f"admission_{name}_queue"] = len(self._queues[priority])
+            stats[f"admission_{name}_in_flight"] = self.in_flight_by_priority[priority]
+            stats[f"admission_{name}_admitted"] = self.admitted[priority]
+            stats[f"admission_{name}_rejected"] = self.rejected[priority]
+            stats[f"admission_{name}_wait_ms"] = self.wait_ms[priority]
+            stats[f"admission_{name}_wait_ms_max"] = self.wait_ms_max[priority]
+
+        return stats
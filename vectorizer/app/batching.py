@@ -0,0 +1,164 @@
+""" Динамическая сборка одиночных запросов векторизации в пакеты (micro-batching) """
+
+import asyncio
+
+import numpy as np
+
+from typing import Awaitable, Callable, List
+
+from app.logs import app_logger
+
+# обработчик пакета: (ключ пакета, например название модели; тексты) -> матрица векторов
+BatchHandler = Callable[[str, List[str]], Awaitable[np.ndarray]]
+BatchItem = tuple[str, str, asyncio.Future]
+
+
+class MicroBatcher:
+    """
+    Планировщик пакетной векторизации.
+
+    Конкурентные одиночные запросы складываются в очередь, фоновая задача собирает из них пакет
+    (не больше max_batch_size текстов и не дольше max_wait_ms с момента первого запроса в пакете),
+    векторизует его одним вызовом handler на каждый ключ (модель) и раздаёт результаты ожидающим запросам.
+    Одновременно обрабатывается не больше max_concurrent пакетов: пока все исполнители заняты,
+    запросы копятся в очереди и следующий пакет получается крупнее.
+    """
+
+    def __init__(
+            self,
+            handler: BatchHandler,
+            max_batch_size: int = 32,
+            max_wait_ms: float = 5.0,
+            max_concurrent: int = 1,
+    ) -> None:
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_concurrent = max(1, max_concurrent)
+        self._queue: asyncio.Queue[BatchItem] | None = None
+        self._task: asyncio.Task | None = None
+
+    def _ensure_started(self) -> None:
+        """
+        Запуск фоновой задачи сборки пакетов при первом запросе
+        """
+
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Остановка фоновой задачи, отмена ожидающих запросов
+        """
+
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+        while self._queue and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+        self._task = None
+        self._queue = None
+
+    async def submit(self, text: str, key: str = "") -> np.ndarray:
+        """
+        Постановка текста в очередь на векторизацию и ожидание результата
+        """
+
+        self._ensure_started()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((key, text, future))
+
+        return await future
+
+    async def _collect(self) -> list[BatchItem]:
+        """
+        Сборка пакета: ожидание первого запроса, затем добор до max_batch_size в пределах max_wait
+        """
+
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # сначала забираем всё, что уже лежит в очереди
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except TimeoutError:
+                break
+
+        return batch
+
+    async def _process(self, batch: list[BatchItem]) -> None:
+        """
+        Векторизация пакета и раздача результатов
+        """
+
+        # группировка по ключу, запросы, отменённые клиентом за время ожидания, в модель не передаются
+        groups: dict[str, list[tuple[str, asyncio.Future]]] = {}
+        for key, text, future in batch:
+            if not future.done():
+                groups.setdefault(key, []).append((text, future))
+
+        for key, items in groups.items():
+            try:
+                embeddings = await self.handler(key, [text for text, _ in items])
+                if len(embeddings) != len(items):
+                    raise RuntimeError("Количество векторов не совпадает с количеством текстов")
+
+            except Exception as ex:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(ex)
+                continue
+
+            for (_, future), embedding in zip(items, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+
+    async def _run(self) -> None:
+        """
+        Цикл сборки и обработки пакетов
+        """
+
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        tasks: set[asyncio.Task] = set()
+
+        async def process(batch: list[BatchItem]) -> None:
+            try:
+                await self._process(batch)
+            except Exception as ex:
+                app_logger.exception(f"Ошибка пакетной векторизации: {ex}")
+            finally:
+                semaphore.release()
+
+        try:
+            while True:
+                # пакет собирается только при наличии свободного исполнителя
+                await semaphore.acquire()
+                batch = await self._collect()
+                task = asyncio.create_task(process(batch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        finally:
+            for task in tasks:
+                task.cancel()
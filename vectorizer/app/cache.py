@@ -0,0 +1,140 @@
+""" Кэш векторов запросов в памяти (LRU + TTL) """
+
+import hashlib
+import time
+import unicodedata
+
+import numpy as np
+
+from collections import OrderedDict
+
+# оценка накладных расходов на одну запись кэша (ключ, кортеж, заголовок массива NumPy), в байтах
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class EmbeddingCache:
+    """
+    Ограниченный кэш векторов.
+
+    Ключ - (название модели, хэш нормализованного текста). Вытеснение - по давности использования (LRU)
+    при превышении количества записей или объёма памяти, а также по истечении времени жизни записи (TTL).
+    """
+
+    def __init__(self, max_items: int = 10_000, max_memory_mb: float = 64, ttl_seconds: float = 3600) -> None:
+        self.max_items = max(0, max_items)
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.ttl = ttl_seconds
+        self._data: OrderedDict[tuple[str, bytes], tuple[np.ndarray, float]] = OrderedDict()
+        self.memory_bytes = 0
+
+        # счётчики для подбора размера кэша
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0 and self.max_memory_bytes > 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Нормализация текста: Unicode NFC, схлопывание пробельных символов
+        """
+
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def make_key(cls, model_name: str, text: str) -> tuple[str, bytes]:
+        """
+        Ключ кэша: (название модели, хэш нормализованного текста)
+        """
+
+        return model_name, hashlib.blake2b(cls.normalize(text).encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _entry_size(vector: np.ndarray) -> int:
+        return vector.nbytes + ENTRY_OVERHEAD_BYTES
+
+    def get(self, model_name: str, text: str) -> np.ndarray | None:
+        """
+        Получение вектора из кэша
+        """
+
+        if not self.enabled:
+            return None
+
+        key = self.make_key(model_name, text)
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        vector, expires_at = entry
+        if self.ttl and expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, model_name: str, text: str, vector: np.ndarray) -> None:
+        """
+        Сохранение вектора в кэш с вытеснением давно не использованных записей
+        """
+
+        if not self.enabled:
+            return
+
+        key = self.make_key(model_name, text)
+        if key in self._data:
+            self._remove(key)
+
+        # копия, чтобы запись кэша не удерживала в памяти всю матрицу пакета
+        vector = np.array(vector, dtype=np.float32, copy=True)
+        vector.flags.writeable = False
+
+        size = self._entry_size(vector)
+        if size > self.max_memory_bytes:
+            return
+
+        self._data[key] = (vector, time.monotonic() + self.ttl)
+        self.memory_bytes += size
+
+        while len(self._data) > self.max_items or self.memory_bytes > self.max_memory_bytes:
+            oldest_key = next(iter(self._data))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: tuple[str, bytes]) -> None:
+        vector, _ = self._data.pop(key)
+        self.memory_bytes -= self._entry_size(vector)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.memory_bytes = 0
+
+    def stats(self) -> dict[str, float]:
+        """
+        Счётчики кэша
+        """
+
+        requests = self.hits + self.misses
+
+        return {
+            "cache_items": len(self._data),
+            "cache_memory_bytes": self.memory_bytes,
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_evictions": self.evictions,
+            "cache_expirations": self.expirations,
+            "cache_hit_ratio": self.hits / requests if requests else 0.0,
+        }
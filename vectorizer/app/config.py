@@ -36,6 +36,15 @@ class ModelLib:
     sentence_transformers = SentenceTransformers
 
 
+class ModelQuantization:
+    """
+    Режимы квантизации модели
+    """
+
+    none = "none"  # исходная модель (fp32)
+    int8 = "int8"  # динамически квантизованная int8 ONNX-модель (только для Sentence Transformers)
+
+
 class Settings(BaseSettings):
     """
     Настройки приложения
@@ -52,10 +61,96 @@ class Settings(BaseSettings):
     MODEL_NAME: str = ModelLib.fastembed.paraphrase_multilingual_MiniLM_L12_v2
     # MODEL_NAME: str = ModelLib.sentence_transformers.all_MiniLM_L6_v2
     MODEL_CACHE_DIR: str | None = "./models/cache"
+    # Квантизация модели по умолчанию MODEL_NAME (модели MODELS загружаются без квантизации):
+    # none или int8 (ONNX-модель создаётся один раз и сохраняется в MODEL_CACHE_DIR)
+    MODEL_QUANTIZATION: str = ModelQuantization.none
+    # Набор инструкций процессора для int8-модели: arm64, avx2, avx512, avx512_vnni
+    MODEL_QUANTIZATION_CONFIG: str = "avx2"
+
+    # Дополнительные модели, доступные по названию в запросах: {"название модели": "библиотека"},
+    # загружаются при первом обращении
+    MODELS: dict[str, str] = {}
+    # Бюджет памяти загруженных моделей (в мегабайтах, 0 - без ограничения),
+    # при превышении выгружаются давно не использовавшиеся модели
+    MODELS_MEMORY_BUDGET_MB: float = 0
+
+    # Размер корзины текстов близкой длины, векторизуемых одним вызовом модели
+    EMBED_BUCKET_SIZE: int = 32
+
+    # Параметры разбиения длинных текстов на перекрывающиеся окна (режим chunking)
+    CHUNK_WINDOW_TOKENS: int = 0  # размер окна в токенах (0 - максимальная длина последовательности модели)
+    CHUNK_OVERLAP_TOKENS: int = 32  # перекрытие соседних окон в токенах
+    CHUNK_MAX_WINDOWS: int = 64  # максимальное количество окон на текст (остаток текста отбрасывается)
+
+    # Параметры переранжирования кандидатов поиска (RPC Rerank), None - переранжирование отключено
+    # (многоязычный кросс-энкодер: cross-encoder/mmarco-mMiniLMv2-L12-H384-v1)
+    RERANK_MODEL: str | None = None
+    RERANK_MODEL_LIB: str = ModelLib.sentence_transformers.name
+    RERANK_BATCH_SIZE: int = 16  # количество пар (запрос, кандидат) в одном вызове модели
+    RERANK_MAX_LENGTH: int = 256  # максимальная длина пары в токенах (Sentence Transformers)
+    RERANK_MAX_CANDIDATES: int = 100  # максимальное количество кандидатов в запросе
 
     # Параметры gRPC сервера
     GRPC_HOST: str = "0.0.0.0"
     GRPC_PORT: int = 50051
+    # Unix-сокет для клиентов на том же хосте, дополнительно к TCP (None - не используется)
+    GRPC_UDS_PATH: str | None = None
+    GRPC_SHUTDOWN_GRACE_SECONDS: float = 10.0  # время завершения текущих запросов при остановке
+    GRPC_MIN_PING_INTERVAL_SECONDS: float = 10.0  # минимальный интервал keepalive-пингов клиента
+
+    # Параметры прогрева модели перед переводом сервиса в состояние готовности
+    WARMUP_BATCH_SIZE: int = 32  # количество текстов прогрева (0 - прогрев отключен)
+    WARMUP_TEXT: str = "Прогрев модели векторизации перед обработкой запросов"  # фраза для текстов прогрева
+
+    # Количество процессов gRPC сервера, принимающих соединения на одном порту (SO_REUSEPORT),
+    # каждый процесс загружает собственные экземпляры моделей
+    SERVER_PROCESSES: int = 1
+
+    # Количество потоков вычислений внутри одного вызова модели (0 - по умолчанию библиотеки, обычно все ядра);
+    # при нескольких процессах или исполнителях разумно ядра / (процессы * исполнители)
+    INTRA_OP_THREADS: int = 0
+
+    # Параметры пула исполнителей инференса
+    INFERENCE_POOL: str = "thread"  # тип пула: thread (потоки, одна модель) или process (процессы, модель в каждом)
+    INFERENCE_WORKERS: int = 1  # количество исполнителей
+
+    # Параметры сборки одиночных запросов EmbedText в пакеты (1 - сборка отключена)
+    EMBED_BATCH_MAX_SIZE: int = 32  # максимальный размер пакета
+    EMBED_BATCH_MAX_WAIT_MS: float = 5.0  # максимальное время ожидания добора пакета (в миллисекундах)
+
+    # Параметры контроля допуска (стоимость запроса - количество текстов, 0 в ADMISSION_MAX_IN_FLIGHT - отключен)
+    ADMISSION_MAX_IN_FLIGHT: int = 256  # максимальное количество текстов в обработке
+    ADMISSION_BULK_MAX_IN_FLIGHT: int = 192  # из них текстов пакетных запросов (остаток - запас интерактивных)
+    ADMISSION_QUEUE_INTERACTIVE: int = 1024  # максимальная очередь интерактивных запросов (EmbedText, Search)
+    ADMISSION_QUEUE_BULK: int = 64  # максимальная очередь пакетных запросов (EmbedTextBatch, Upsert)
+    ADMISSION_MAX_WAIT_MS: float = 2000  # максимальное время ожидания в очереди (в миллисекундах)
+    ADMISSION_RETRY_AFTER_MS: float = 100  # минимальная рекомендуемая задержка повтора отклонённого запроса
+    ADMISSION_INTERACTIVE_MAX_TEXTS: int = 8  # EmbedTextBatch с таким количеством текстов считается интерактивным
+
+    # Параметры потоковой векторизации EmbedTextStream
+    EMBED_STREAM_BATCH_SIZE: int = 64  # размер пакета векторизации
+    EMBED_STREAM_MAX_PENDING: int = 2  # максимальное количество прочитанных, но не обработанных пакетов
+
+    # Параметры кэша векторов (0 записей - кэш отключен)
+    EMBED_CACHE_MAX_ITEMS: int = 10_000  # максимальное количество записей
+    EMBED_CACHE_MAX_MEMORY_MB: float = 64  # максимальный объём памяти (в мегабайтах)
+    EMBED_CACHE_TTL_SECONDS: float = 3600  # время жизни записи (0 - без ограничения)
+
+    # Каталог постоянного хранилища векторов текстов пакетной векторизации по ключу (модель, sha256 текста),
+    # при переиндексации векторизуются только новые и изменённые тексты (None - хранилище отключено)
+    EMBED_STORE_DIR: str | None = "./data/embeddings"
+
+    # Параметры индекса приближённого поиска векторов
+    INDEX_DIR: str | None = "./data/index"  # каталог хранения индексов (None - только в памяти)
+    INDEX_DTYPE: str = "float32"  # тип хранения векторов: float32 или int8
+    INDEX_TRAIN_MIN: int = 4096  # минимальное количество векторов для разбиения на списки IVF (до - точный поиск)
+    INDEX_NLIST: int = 0  # количество списков IVF (0 - 4 * sqrt(количество векторов))
+    INDEX_NPROBE: int = 8  # количество просматриваемых при поиске списков
+
+    # Параметры переноса индекса на другую модель (RPC StartMigration)
+    MIGRATION_BATCH_SIZE: int = 64  # количество текстов, векторизуемых за один вызов
+    MIGRATION_MAX_PASSES: int = 5  # максимальное количество проходов до переключения псевдонима
+    MIGRATION_TEXT_FIELD: str = "text"  # поле метаданных с текстом записи
 
     # Параметры RabbitMQ
     RMQ_CONN: str | None = None
@@ -0,0 +1,986 @@
+""" Индекс приближённого поиска ближайших векторов (IVF) с хранением в отображаемых в память файлах """
+
+import fcntl
+import json
+import math
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+
+from contextlib import contextmanager
+from typing import IO, Iterator, Sequence
+
+from app.logs import app_logger
+
+INDEX_DTYPE_FLOAT32 = "float32"
+INDEX_DTYPE_INT8 = "int8"
+
+# допустимые названия индексов (название используется как имя каталога)
+INDEX_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+INDEX_META_FILE = "index.json"
+INDEX_JOURNAL_FILE = "index.{generation}.journal"  # журнал идентификаторов и значений метаданных (JSON-строки)
+JOURNAL_COMPACT_MIN = 65536  # записей журнала, до которых он не сжимается
+INDEX_LOCK_FILE = "index.lock"
+ALIASES_FILE = "aliases.json"  # псевдонимы индексов в каталоге хранения: {"псевдоним": "название индекса"}
+ALIASES_LOCK_FILE = "aliases.lock"
+WRITE_LOCKS_DIR = ".write-locks"  # блокировки записи по псевдонимам (приостановка записи при переключении)
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 40  # размер обучающей выборки на один список
+ASSIGN_CHUNK_SIZE = 8192  # строк за один шаг распределения по спискам
+
+
+class IndexNotFoundError(ValueError):
+    """
+    Индекс с указанным названием не существует
+    """
+
+
+class MetadataColumn:
+    """
+    Столбец метаданных: значения хранятся кодами (int32) для векторной фильтрации, -1 - значение не задано
+    """
+
+    def __init__(self, capacity: int = 0, values: list[str] | None = None, codes: Sequence[int] = ()) -> None:
+        self.values: list[str] = values or []
+        self.lookup = {value: code for code, value in enumerate(self.values)}
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.codes[:len(codes)] = codes
+
+    def encode(self, value: str) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class VectorIndex:
+    """
+    Индекс векторов для поиска по косинусному сходству.
+
+    Векторы нормализуются при добавлении и хранятся плотной матрицей (float32 или int8 с масштабом на вектор),
+    при указанном каталоге - в файлах .npy, отображаемых в память, поэтому после перезапуска индекс
+    не перестраивается. Пока векторов меньше train_min, поиск точный; затем векторы разбиваются k-means
+    на списки (IVF), и при поиске просматриваются только nprobe списков с ближайшими центроидами.
+    Удаление переносит последнюю строку на место удалённой, поэтому матрица остаётся без пропусков.
+
+    Идентификаторы и значения метаданных дописываются в журнал (коды метаданных хранятся в файлах .npy),
+    а описание index.json содержит только размер и длину журнала, поэтому сохранение после изменения
+    не зависит от размера индекса; журнал переписывается целиком, когда в нём накапливается вдвое
+    больше записей, чем нужно для текущего состояния.
+
+    Один каталог индекса могут использовать несколько процессов сервиса: изменения выполняются
+    под файловой блокировкой, а перед чтением и изменением индекс дочитывает журнал, если описание
+    было перезаписано другим процессом.
+    """
+
+    def __init__(
+            self,
+            path: str | None = None,
+            dtype: str = INDEX_DTYPE_FLOAT32,
+            nprobe: int = 8,
+            train_min: int = 4096,
+            nlist: int = 0,
+    ) -> None:
+        if dtype not in (INDEX_DTYPE_FLOAT32, INDEX_DTYPE_INT8):
+            raise ValueError(f"Неизвестный тип хранения векторов: {dtype}")
+
+        self.path = path
+        self.dtype = dtype
+        self.nprobe = max(1, nprobe)
+        self.train_min = max(1, train_min)
+        self.nlist = nlist  # количество списков IVF (0 - по размеру индекса)
+        self.lock = threading.RLock()
+
+        self.dim = 0
+        self.model = ""  # модель векторизации текстов индекса
+        self.size = 0
+        self.ids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.metadata: dict[str, MetadataColumn] = {}
+
+        self.vectors = np.empty((0, 0), dtype=dtype)
+        self.scales = np.empty(0, dtype=np.float32)
+        self.assign = np.empty(0, dtype=np.int32)
+        self.centroids: np.ndarray | None = None
+        self.trained_size = 0
+        self.centroids_version: int | None = 0  # номер обучения (другие процессы перечитывают центроиды по нему)
+        self._centroids_dirty = False
+
+        # журнал: поколение (меняется при переписывании), закреплённая описанием длина в байтах и записях
+        self.generation = 0
+        self._journal_size = 0
+        self._journal_records = 0
+        self._journal: list[str] = []  # записи текущего изменения, ещё не дописанные в журнал
+        self._legacy = False  # описание прежнего формата (с идентификаторами), журнал создаётся при сохранении
+
+        self._version: tuple[int, int] | None = None  # версия прочитанного описания (inode, время изменения)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return self.vectors.shape[0]
+
+    # хранение
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _resize_array(self, name: str, array: np.ndarray, shape: tuple, fill: float = 0) -> np.ndarray:
+        """
+        Создание массива новой ёмкости (в файле, отображаемом в память, если задан каталог индекса)
+        """
+
+        if self.path is None:
+            resized = np.full(shape, fill, dtype=array.dtype)
+        else:
+            tmp_path = self._file(f"{name}.npy.tmp")
+            resized = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=array.dtype, shape=shape)
+            if fill:
+                resized[...] = fill
+
+        count = min(array.shape[0], shape[0])
+        resized[:count] = array[:count]
+
+        if self.path is not None:
+            resized.flush()
+            # отображение остаётся действительным после переименования файла
+            os.replace(tmp_path, self._file(f"{name}.npy"))
+
+        return resized
+
+    def _reserve(self, count: int) -> None:
+        """
+        Увеличение ёмкости хранилища (удвоением) до count строк
+        """
+
+        if count <= self.capacity:
+            return
+
+        capacity = max(count, self.capacity * 2, 1024)
+        self.vectors = self._resize_array("vectors", self.vectors, (capacity, self.dim))
+        self.scales = self._resize_array("scales", self.scales, (capacity,), fill=1.0)
+        self.assign = self._resize_array("assign", self.assign, (capacity,))
+        for position, column in enumerate(self.metadata.values()):
+            column.codes = self._resize_array(f"metadata.{position}", column.codes, (capacity,), fill=-1)
+
+    def _journal_file(self, generation: int) -> str:
+        return self._file(INDEX_JOURNAL_FILE.format(generation=generation))
+
+    def _log(self, *record) -> None:
+        """
+        Запись журнала текущего изменения: ("a", id) - добавление строки, ("d", строка) - удаление строки
+        с переносом последней, ("c", ключ) - новый столбец метаданных, ("v", ключ, значение) - новое значение
+        """
+
+        if self.path is not None:
+            self._journal.append(json.dumps(record, ensure_ascii=False))
+
+    def _encode_value(self, key: str, value: str) -> int:
+        """
+        Код значения метаданных (столбец и значение создаются при первом использовании)
+        """
+
+        column = self.metadata.get(key)
+        if column is None:
+            column = MetadataColumn()
+            column.codes = self._resize_array(
+                f"metadata.{len(self.metadata)}", column.codes, (self.capacity,), fill=-1
+            )
+            self.metadata[key] = column
+            self._log("c", key)
+
+        if value not in column.lookup:
+            self._log("v", key, value)
+
+        return column.encode(value)
+
+    def _append_journal(self) -> None:
+        """
+        Дописывание записей текущего изменения в журнал
+        """
+
+        data = "".join(f"{record}\n" for record in self._journal).encode("utf-8")
+        path = self._journal_file(self.generation)
+
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            # хвост, не закреплённый описанием (запись прервана), отбрасывается
+            f.truncate(self._journal_size)
+            f.seek(self._journal_size)
+            f.write(data)
+
+        self._journal_size += len(data)
+        self._journal_records += len(self._journal)
+
+    def _rewrite_journal(self) -> None:
+        """
+        Запись журнала нового поколения только с записями текущего состояния
+        """
+
+        records = [json.dumps(["a", doc_id], ensure_ascii=False) for doc_id in self.ids]
+        for key, column in self.metadata.items():
+            records.append(json.dumps(["c", key], ensure_ascii=False))
+            records.extend(json.dumps(["v", key, value], ensure_ascii=False) for value in column.values)
+        data = "".join(f"{record}\n" for record in records).encode("utf-8")
+
+        self.generation += 1
+        tmp_path = self._file(f"{INDEX_JOURNAL_FILE.format(generation=self.generation)}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._journal_file(self.generation))
+
+        # коды метаданных индекса прежнего формата переносятся из описания в файлы
+        for position, column in enumerate(self.metadata.values()):
+            if not isinstance(column.codes, np.memmap):
+                column.codes = self._resize_array(f"metadata.{position}", column.codes, (self.capacity,), fill=-1)
+
+        self._journal_size = len(data)
+        self._journal_records = len(records)
+        self._legacy = False
+
+    def save(self) -> None:
+        """
+        Сохранение индекса: сброс отображаемых файлов, дописывание журнала и атомарная запись описания
+        """
+
+        if self.path is None:
+            return
+
+        for array in (self.vectors, self.scales, self.assign, *(column.codes for column in self.metadata.values())):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+        if self._centroids_dirty:
+            tmp_path = self._file("centroids.npy.tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, self.centroids)
+            os.replace(tmp_path, self._file("centroids.npy"))
+            self._centroids_dirty = False
+
+        stale_journal = None
+        required = self.size + sum(len(column.values) + 1 for column in self.metadata.values())
+        if self._legacy or self._journal_records + len(self._journal) > max(JOURNAL_COMPACT_MIN, 2 * required):
+            stale_journal = self._journal_file(self.generation)
+            self._rewrite_journal()
+        elif self._journal:
+            self._append_journal()
+        self._journal = []
+
+        meta = {
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "model": self.model,
+            "size": self.size,
+            "trained_size": self.trained_size if self.centroids is not None else 0,
+            "centroids": self.centroids_version,
+            "generation": self.generation,
+            "journal": self._journal_size,
+            "records": self._journal_records,
+        }
+
+        tmp_path = self._file(f"{INDEX_META_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self._file(INDEX_META_FILE))
+        self._version = self._meta_version()
+
+        if stale_journal:
+            try:
+                os.remove(stale_journal)
+            except FileNotFoundError:
+                pass
+
+    def _meta_version(self) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(self._file(INDEX_META_FILE))
+        except FileNotFoundError:
+            return None
+
+        # описание всегда записывается в новый файл, поэтому меняется и inode
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _read_meta(self) -> dict:
+        with open(self._file(INDEX_META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read_header(self, meta: dict) -> None:
+        """
+        Размеры индекса, отображение массивов в память и центроиды (если индекс был переобучен)
+        """
+
+        self.dim = meta["dim"]
+        self.model = meta["model"]
+        self.size = meta["size"]
+
+        # файлы массивов заменяются при увеличении ёмкости, поэтому отображаются заново
+        if self.dim:
+            self.vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+            self.scales = np.load(self._file("scales.npy"), mmap_mode="r+")
+            self.assign = np.load(self._file("assign.npy"), mmap_mode="r+")
+
+        centroids_version = meta.get("centroids", 0)
+        if centroids_version != self.centroids_version:
+            self.centroids = None
+            self.trained_size = 0
+            if meta["trained_size"] and os.path.exists(self._file("centroids.npy")):
+                self.centroids = np.load(self._file("centroids.npy"))
+                self.trained_size = meta["trained_size"]
+            self.centroids_version = centroids_version
+
+    def _read_journal(self, meta: dict) -> None:
+        """
+        Применение записей журнала, добавленных после прочитанной части
+        """
+
+        with open(self._journal_file(self.generation), "rb") as f:
+            f.seek(self._journal_size)
+            data = f.read(meta["journal"] - self._journal_size)
+
+        for line in data.decode("utf-8").splitlines():
+            op, *args = json.loads(line)
+            if op == "a":
+                self.rows[args[0]] = len(self.ids)
+                self.ids.append(args[0])
+            elif op == "d":
+                row = args[0]
+                del self.rows[self.ids[row]]
+                last_id = self.ids.pop()
+                if row < len(self.ids):
+                    self.ids[row] = last_id
+                    self.rows[last_id] = row
+            elif op == "c":
+                self.metadata[args[0]] = MetadataColumn()
+            elif op == "v":
+                self.metadata[args[0]].encode(args[1])
+
+        for position, column in enumerate(self.metadata.values()):
+            column.codes = np.load(self._file(f"metadata.{position}.npy"), mmap_mode="r+")
+
+        self._journal_size = meta["journal"]
+        self._journal_records = meta["records"]
+
+    def _read(self) -> None:
+        """
+        Чтение индекса из каталога (векторы и коды метаданных отображаются в память без чтения в ОЗУ)
+        """
+
+        version = self._meta_version()
+        meta = self._read_meta()
+
+        self.dtype = meta["dtype"]
+        self.centroids_version = None
+        self._read_header(meta)
+
+        self._journal = []
+        if "ids" in meta:
+            # прежний формат: идентификаторы и метаданные в описании
+            self.ids = meta["ids"]
+            self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+            self.metadata = {
+                key: MetadataColumn(self.capacity, column["values"], column["codes"])
+                for key, column in meta["metadata"].items()
+            }
+            self.generation = self._journal_size = self._journal_records = 0
+            self._legacy = True
+        else:
+            self.ids, self.rows, self.metadata = [], {}, {}
+            self.generation = meta["generation"]
+            self._journal_size = self._journal_records = 0
+            self._legacy = False
+            self._read_journal(meta)
+
+        self._version = version
+
+    def refresh(self) -> None:
+        """
+        Дочитывание журнала, если описание было перезаписано другим процессом
+        """
+
+        if self.path is None:
+            return
+
+        version = self._meta_version()
+        if version is None or version == self._version:
+            return
+
+        try:
+            meta = self._read_meta()
+            if "ids" in meta or meta["generation"] != self.generation or meta["journal"] < self._journal_size:
+                self._read()
+                return
+
+            self._read_header(meta)
+            self._read_journal(meta)
+            self._version = version
+
+        except FileNotFoundError:
+            # журнал переписан другим процессом между чтением описания и журнала
+            self._read()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+        Блокировка индекса на изменение (в том числе между процессами) с перечитыванием актуального состояния
+        """
+
+        with self.lock:
+            if self.path is None:
+                yield
+                return
+
+            with open(self._file(INDEX_LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @classmethod
+    def load(cls, path: str, **params) -> "VectorIndex":
+        """
+        Загрузка индекса из каталога
+        """
+
+        index = cls(path=path, **params)
+        index._read()
+
+        return index
+
+    # векторы
+
+    def _encode(self, matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Преобразование нормализованных векторов к типу хранения: (векторы, масштабы)
+        """
+
+        if self.dtype == INDEX_DTYPE_INT8:
+            scales = np.abs(matrix).max(axis=1) / 127
+            scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+            return np.round(matrix / scales[:, None]).astype(np.int8), scales
+
+        return matrix, np.ones(matrix.shape[0], dtype=np.float32)
+
+    def _decode(self, rows: np.ndarray | slice) -> np.ndarray:
+        """
+        Векторы строк индекса в float32
+        """
+
+        if self.dtype == INDEX_DTYPE_INT8:
+            return self.vectors[rows].astype(np.float32) * self.scales[rows, None]
+
+        return np.asarray(self.vectors[rows])
+
+    def _scores(self, query: np.ndarray, rows: np.ndarray | None) -> np.ndarray:
+        """
+        Косинусное сходство запроса со строками индекса (со всеми, если rows не задан)
+        """
+
+        vectors = self.vectors[:self.size] if rows is None else self.vectors[rows]
+        scales = self.scales[:self.size] if rows is None else self.scales[rows]
+        scores = vectors @ query
+
+        return scores * scales if self.dtype == INDEX_DTYPE_INT8 else scores
+
+    def _nearest_lists(self, matrix: np.ndarray) -> np.ndarray:
+        return np.argmax(matrix @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _needs_training(self) -> bool:
+        if self.size < self.train_min:
+            return False
+
+        # переобучение при двукратном росте индекса с момента последнего обучения
+        return self.centroids is None or self.size >= 2 * self.trained_size
+
+    def train(self) -> None:
+        """
+        Разбиение векторов на списки IVF (сферический k-means на выборке) и распределение всех строк по спискам
+        """
+
+        with self.lock:
+            size = self.size
+            nlist = min(size, self.nlist or max(1, int(4 * math.sqrt(size))))
+            rng = np.random.default_rng(0)
+
+            sample_rows = np.sort(rng.choice(size, min(size, nlist * KMEANS_SAMPLES_PER_LIST), replace=False))
+            sample = self._decode(sample_rows)
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+
+            for _ in range(KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                counts = np.bincount(labels, minlength=nlist)
+
+                # суммы векторов списков: сортировка по спискам и сложение отрезков
+                order = np.argsort(labels, kind="stable")
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                sums = np.zeros_like(centroids)
+                present = counts > 0
+                sums[present] = np.add.reduceat(sample[order], starts[present], axis=0)
+
+                # пустые списки получают случайную точку выборки
+                empty = np.flatnonzero(counts == 0)
+                sums[empty] = sample[rng.choice(len(sample), len(empty))]
+                centroids = _normalize(sums).astype(np.float32)
+
+            self.centroids = centroids
+            for start in range(0, size, ASSIGN_CHUNK_SIZE):
+                end = min(start + ASSIGN_CHUNK_SIZE, size)
+                self.assign[start:end] = self._nearest_lists(self._decode(slice(start, end)))
+
+            self.trained_size = size
+            self.centroids_version += 1
+            self._centroids_dirty = True
+            app_logger.info(f"Vector index trained: {size} vectors, {nlist} lists")
+
+    # изменение
+
+    def upsert(
+            self,
+            ids: Sequence[str],
+            vectors: Sequence[Sequence[float]] | np.ndarray,
+            metadata: Sequence[dict[str, str]] | None = None,
+            model: str = "",
+    ) -> int:
+        """
+        Добавление или замена векторов по идентификаторам (метаданные заменяются целиком)
+        """
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("Количество векторов не совпадает с количеством идентификаторов")
+
+        if not len(ids):
+            return 0
+
+        metadata = metadata or [{}] * len(ids)
+
+        with self._writing():
+            if self.size == 0:
+                # пустой индекс принимает размерность и модель первых векторов
+                if self.dim != matrix.shape[1]:
+                    self.dim = matrix.shape[1]
+                    self.vectors = np.empty((0, self.dim), dtype=self.dtype)
+                    # центроиды прежней размерности непригодны для распределения новых векторов
+                    self.centroids = None
+                    self.trained_size = 0
+                    self.centroids_version += 1
+                self.model = model
+
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Размерность векторов {matrix.shape[1]} не совпадает с индексом ({self.dim})")
+
+            if model and self.model and model != self.model:
+                raise ValueError(f"Индекс построен моделью {self.model}, а не {model}")
+
+            self._reserve(self.size + len(ids))
+
+            rows = np.empty(len(ids), dtype=np.int64)
+            for i, doc_id in enumerate(ids):
+                row = self.rows.get(doc_id)
+                if row is None:
+                    row = self.rows[doc_id] = self.size
+                    self.ids.append(doc_id)
+                    self.size += 1
+                    self._log("a", doc_id)
+                rows[i] = row
+
+            normalized = _normalize(matrix).astype(np.float32)
+            self.vectors[rows], self.scales[rows] = self._encode(normalized)
+            self.assign[rows] = self._nearest_lists(normalized) if self.centroids is not None else 0
+
+            for column in self.metadata.values():
+                column.codes[rows] = -1
+            for row, item_metadata in zip(rows, metadata):
+                for key, value in item_metadata.items():
+                    code = self._encode_value(key, value)
+                    self.metadata[key].codes[row] = code
+
+            if self._needs_training():
+                self.train()
+
+            self.save()
+
+        return len(ids)
+
+    def _filter_mask(self, metadata_filter: dict[str, str]) -> np.ndarray | None:
+        """
+        Маска строк, метаданные которых совпадают со всеми значениями фильтра (None - совпадений нет)
+        """
+
+        mask = np.ones(self.size, dtype=bool)
+        for key, value in metadata_filter.items():
+            column = self.metadata.get(key)
+            code = column.lookup.get(value) if column else None
+            if code is None:
+                return None
+            mask &= column.codes[:self.size] == code
+
+        return mask
+
+    def delete(self, ids: Sequence[str] = (), metadata_filter: dict[str, str] | None = None) -> int:
+        """
+        Удаление векторов по идентификаторам и (или) по фильтру метаданных
+        """
+
+        with self._writing():
+            rows = {self.rows[doc_id] for doc_id in ids if doc_id in self.rows}
+
+            if metadata_filter:
+                mask = self._filter_mask(metadata_filter)
+                if mask is not None:
+                    rows.update(np.flatnonzero(mask).tolist())
+
+            # удаление с конца: перенесённая последняя строка никогда не ожидает удаления
+            for row in sorted(rows, reverse=True):
+                last = self.size - 1
+                del self.rows[self.ids[row]]
+
+                if row != last:
+                    self.vectors[row] = self.vectors[last]
+                    self.scales[row] = self.scales[last]
+                    self.assign[row] = self.assign[last]
+                    for column in self.metadata.values():
+                        column.codes[row] = column.codes[last]
+                    self.ids[row] = self.ids[last]
+                    self.rows[self.ids[row]] = row
+
+                for column in self.metadata.values():
+                    column.codes[last] = -1
+                self.ids.pop()
+                self.size -= 1
+                self._log("d", row)
+
+            if rows:
+                self.save()
+
+        return len(rows)
+
+    # поиск
+
+    def get_metadata(self, row: int, fields: Sequence[str] | None = None) -> dict[str, str]:
+        return {
+            key: column.values[column.codes[row]]
+            for key, column in self.metadata.items()
+            if column.codes[row] >= 0 and (not fields or key in fields)
+        }
+
+    def items(
+            self,
+            offset: int = 0,
+            limit: int | None = None,
+            fields: Sequence[str] | None = None,
+    ) -> list[tuple[str, dict[str, str]]]:
+        """
+        Идентификаторы и метаданные векторов индекса в порядке записи: limit векторов начиная с offset
+        (None - до конца индекса), только поля метаданных fields (None - все)
+        """
+
+        with self.lock:
+            self.refresh()
+            stop = len(self.ids) if limit is None else offset + limit
+            return [(self.ids[row], self.get_metadata(row, fields)) for row in range(offset, min(stop, len(self.ids)))]
+
+    def search(
+            self,
+            query_vector: Sequence[float] | np.ndarray,
+            top_k: int = 5,
+            metadata_filter: dict[str, str] | None = None,
+            nprobe: int = 0,
+    ) -> list[tuple[str, float, dict[str, str]]]:
+        """
+        Поиск top-k ближайших векторов
+
+        :return: Список кортежей (идентификатор, косинусное сходство, метаданные) по убыванию сходства.
+        """
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+
+        with self.lock:
+            self.refresh()
+
+            if self.size == 0 or top_k <= 0:
+                return []
+
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Размерность запроса {query.shape[0]} не совпадает с индексом ({self.dim})")
+
+            norm = float(np.linalg.norm(query))
+            if norm == 0:
+                return []
+            query = query / norm
+
+            mask = None
+            if metadata_filter:
+                mask = self._filter_mask(metadata_filter)
+                if mask is None:
+                    return []
+
+            nprobe = nprobe or self.nprobe
+            if self.centroids is not None and nprobe < len(self.centroids):
+                probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+                probe_mask = np.isin(self.assign[:self.size], probe)
+                if mask is not None:
+                    probe_mask &= mask
+
+                # при избирательном фильтре в ближайших списках может не хватить строк - тогда точный поиск
+                if np.count_nonzero(probe_mask) >= top_k:
+                    mask = probe_mask
+
+            rows = np.flatnonzero(mask) if mask is not None else None
+            scores = self._scores(query, rows)
+
+            count = scores.shape[0]
+            if top_k < count:
+                top = np.argpartition(-scores, top_k - 1)[:top_k]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            result = []
+            for i in top:
+                row = int(rows[i]) if rows is not None else int(i)
+                result.append((self.ids[row], float(scores[i]), self.get_metadata(row)))
+
+            return result
+
+
+class IndexStore:
+    """
+    Набор именованных индексов, каждый хранится в собственном подкаталоге root (в памяти, если root не задан).
+
+    Псевдоним индекса указывает на одно из названий: запросы по псевдониму выполняются в индексе,
+    на который он указывает, а переключение псевдонима на новую версию индекса атомарно
+    (файл псевдонимов перезаписывается целиком и перечитывается другими процессами сервиса при изменении).
+    """
+
+    def __init__(
+            self,
+            root: str | None = None,
+            dtype: str = INDEX_DTYPE_FLOAT32,
+            nprobe: int = 8,
+            train_min: int = 4096,
+            nlist: int = 0,
+    ) -> None:
+        self.root = root
+        self.dtype = dtype
+        self.params = {"nprobe": nprobe, "train_min": train_min, "nlist": nlist}
+        self._indexes: dict[str, VectorIndex] = {}
+        self._lock = threading.Lock()
+
+        self.aliases: dict[str, str] = {}
+        self._aliases_version: tuple[int, int] | None = None
+
+    def load(self) -> None:
+        """
+        Загрузка сохранённых индексов и псевдонимов
+        """
+
+        if not self.root or not os.path.isdir(self.root):
+            return
+
+        with self._lock:
+            self._read_aliases()
+
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if INDEX_NAME_PATTERN.match(name) and os.path.exists(os.path.join(path, INDEX_META_FILE)):
+                try:
+                    self._indexes[name] = VectorIndex.load(path, **self.params)
+                    app_logger.info(f"Vector index loaded: {name}, {len(self._indexes[name])} vectors")
+                except (OSError, ValueError, KeyError) as ex:
+                    app_logger.error(f"Ошибка загрузки индекса {name}: {ex}")
+
+    # псевдонимы
+
+    def _read_aliases(self) -> None:
+        """
+        Перечитывание псевдонимов, если файл был перезаписан (вызывается под блокировкой)
+        """
+
+        if not self.root:
+            return
+
+        try:
+            stat = os.stat(os.path.join(self.root, ALIASES_FILE))
+        except FileNotFoundError:
+            self.aliases, self._aliases_version = {}, None
+            return
+
+        version = stat.st_ino, stat.st_mtime_ns
+        if version != self._aliases_version:
+            with open(os.path.join(self.root, ALIASES_FILE), encoding="utf-8") as f:
+                self.aliases = json.load(f)
+            self._aliases_version = version
+
+    def resolve(self, name: str) -> str:
+        """
+        Название индекса с учётом псевдонимов
+        """
+
+        with self._lock:
+            self._read_aliases()
+            return self.aliases.get(name, name)
+
+    def set_alias(self, alias: str, name: str) -> None:
+        """
+        Переключение псевдонима на индекс name (псевдоним, совпадающий с названием, удаляется)
+        """
+
+        for value in (alias, name):
+            if not INDEX_NAME_PATTERN.match(value):
+                raise ValueError(f"Недопустимое название индекса: {value}")
+
+        with self._lock:
+            if self.root:
+                self._write_alias(alias, name)
+            else:
+                self.aliases.pop(alias, None)
+                if alias != name:
+                    self.aliases[alias] = name
+
+        app_logger.info(f"Index alias switched: {alias} -> {name}")
+
+    def _write_alias(self, alias: str, name: str) -> None:
+        """
+        Атомарная перезапись файла псевдонимов под файловой блокировкой (вызывается под блокировкой)
+        """
+
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ALIASES_LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._read_aliases()
+                aliases = {key: value for key, value in self.aliases.items() if key != alias}
+                if alias != name:
+                    aliases[alias] = name
+
+                tmp_path = os.path.join(self.root, f"{ALIASES_FILE}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(aliases, f, ensure_ascii=False)
+                os.replace(tmp_path, os.path.join(self.root, ALIASES_FILE))
+                self._read_aliases()
+
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def lock_writes(self, name: str, exclusive: bool = False) -> IO | None:
+        """
+        Блокировка записи в индекс между процессами сервиса (блокирующий вызов, выполняется вне цикла событий):
+        запись берёт разделяемую блокировку, переключение псевдонима - исключительную, которая ждёт
+        начатые записи всех процессов и задерживает новые. Блокировка общая для псевдонима и индекса,
+        на который он указывает
+        """
+
+        if not self.root:
+            return None
+
+        with self._lock:
+            self._read_aliases()
+            key = next((alias for alias, target in self.aliases.items() if target == name), name)
+
+        os.makedirs(os.path.join(self.root, WRITE_LOCKS_DIR), exist_ok=True)
+        lock_file = open(os.path.join(self.root, WRITE_LOCKS_DIR, f"{key}.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        except BaseException:
+            lock_file.close()
+            raise
+
+        return lock_file
+
+    @staticmethod
+    def unlock_writes(lock_file: IO | None) -> None:
+        if lock_file is None:
+            return
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            lock_file.close()
+
+    def next_version(self, alias: str) -> str:
+        """
+        Название следующей версии индекса: <псевдоним>.v<номер>
+        """
+
+        pattern = re.compile(rf"^{re.escape(alias)}\.v(\d+)$")
+
+        with self._lock:
+            names = set(self._indexes)
+            if self.root and os.path.isdir(self.root):
+                names.update(os.listdir(self.root))
+
+        versions = [int(match.group(1)) for match in map(pattern.match, names) if match]
+        return f"{alias}.v{max(versions, default=0) + 1}"
+
+    # индексы
+
+    def get(self, name: str, create: bool = False) -> VectorIndex:
+        """
+        Получение индекса по названию или псевдониму (с созданием, если create)
+        """
+
+        if not INDEX_NAME_PATTERN.match(name):
+            raise ValueError(f"Недопустимое название индекса: {name}")
+
+        with self._lock:
+            self._read_aliases()
+            name = self.aliases.get(name, name)
+
+            index = self._indexes.get(name)
+            if index is not None:
+                return index
+
+            path = os.path.join(self.root, name) if self.root else None
+
+            # индекс мог быть создан другим процессом сервиса
+            if path and os.path.exists(os.path.join(path, INDEX_META_FILE)):
+                index = self._indexes[name] = VectorIndex.load(path, **self.params)
+                return index
+
+            if not create:
+                raise IndexNotFoundError(f"Индекс не найден: {name}")
+
+            if path:
+                os.makedirs(path, exist_ok=True)
+
+            index = self._indexes[name] = VectorIndex(path=path, dtype=self.dtype, **self.params)
+            return index
+
+    def drop(self, name: str) -> None:
+        """
+        Удаление индекса, на который не указывает ни один псевдоним
+        """
+
+        with self._lock:
+            self._read_aliases()
+            if name in self.aliases.values():
+                raise ValueError(f"На индекс {name} указывает псевдоним")
+
+            self._indexes.pop(name, None)
+            if self.root and INDEX_NAME_PATTERN.match(name):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+        app_logger.info(f"Vector index dropped: {name}")
+
+    def stats(self) -> dict[str, float]:
+        """
+        Счётчики индексов
+        """
+
+        return {
+            "indexes": len(self._indexes),
+            "index_aliases": len(self.aliases),
+            "index_vectors": sum(len(index) for index in self._indexes.values()),
+        }
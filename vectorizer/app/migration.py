@@ -0,0 +1,261 @@
+""" Перенос индекса на другую модель векторизации без остановки поиска (blue/green) """
+
+import asyncio
+import time
+
+import numpy as np
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.index import IndexStore, VectorIndex
+from app.logs import app_logger
+
+
+class MigrationState:
+    """
+    Состояния переноса индекса
+    """
+
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class MigrationError(ValueError):
+    """
+    Индекс невозможно перенести на другую модель
+    """
+
+
+@asynccontextmanager
+async def index_write_lock(indexes: IndexStore, name: str, exclusive: bool = False) -> AsyncIterator[None]:
+    """
+    Файловая блокировка записи в индекс (IndexStore.lock_writes), ожидание выполняется вне цикла событий
+    """
+
+    acquiring = asyncio.ensure_future(asyncio.to_thread(indexes.lock_writes, name, exclusive))
+
+    def release_acquired(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            indexes.unlock_writes(future.result())
+
+    try:
+        lock_file = await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        # блокировка, полученная после отмены ожидания, сразу освобождается
+        acquiring.add_done_callback(release_acquired)
+        raise
+
+    try:
+        yield
+    finally:
+        indexes.unlock_writes(lock_file)
+
+
+class IndexMigration:
+    """
+    Перенос индекса alias на модель model.
+
+    Новая версия индекса (<псевдоним>.v<номер>) строится в фоне пакетной векторизацией текстов из поля
+    метаданных text_field, а до её готовности поиск и запись выполняются в прежней версии прежней моделью.
+    Построение идёт проходами: проход сравнивает тексты обеих версий, векторизует только новые и изменённые
+    записи и удаляет из новой версии удалённые, поэтому записи, сделанные во время переноса, переносятся
+    следующим проходом. Когда проход не находит изменений (или после max_passes проходов), завершающий проход
+    и переключение псевдонима выполняются при приостановленной записи в индекс: в этом процессе - до
+    завершения начатых записей, в других процессах сервиса - исключительной файловой блокировкой записи
+    (IndexStore.lock_writes), которую запись берёт разделяемой.
+    """
+
+    def __init__(
+            self,
+            indexes: IndexStore,
+            alias: str,
+            model: str,
+            embed: Callable[[list[str], str], Awaitable[list[np.ndarray]]],
+            text_field: str = "text",
+            batch_size: int = 64,
+            max_passes: int = 5,
+            drop_source: bool = False,
+    ) -> None:
+        self.indexes = indexes
+        self.alias = alias
+        self.model = model
+        self.embed = embed  # пакетная векторизация текстов моделью
+        self.text_field = text_field
+        self.batch_size = max(1, batch_size)
+        self.max_passes = max(1, max_passes)
+        self.drop_source = drop_source
+
+        self.source = indexes.resolve(alias)
+        self.target = indexes.next_version(alias)
+
+        self.state = MigrationState.running
+        self.error = ""
+        self.total = 0  # количество записей к векторизации (растёт, если индекс меняется во время переноса)
+        self.processed = 0  # векторизовано и записано в новую версию
+        self.passes = 0
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+
+        # запись в индекс во время переноса и приостановка записи на время переключения
+        self._writers = 0
+        self._switching = False
+        self._condition = asyncio.Condition()
+
+    @property
+    def running(self) -> bool:
+        return self.state == MigrationState.running
+
+    @asynccontextmanager
+    async def writing(self) -> AsyncIterator[None]:
+        """
+        Запись в переносимый индекс: ожидает окончания переключения псевдонима
+        """
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._switching)
+            self._writers += 1
+
+        try:
+            yield
+
+        finally:
+            async with self._condition:
+                self._writers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def switching(self) -> AsyncIterator[None]:
+        """
+        Приостановка записи в индекс (в том числе в других процессах сервиса): новые записи ожидают,
+        начатые завершаются
+        """
+
+        async with self._condition:
+            self._switching = True
+            await self._condition.wait_for(lambda: self._writers == 0)
+
+        try:
+            # запись других процессов сервиса: ожидание начатых и приостановка новых
+            async with index_write_lock(self.indexes, self.alias, exclusive=True):
+                yield
+
+        finally:
+            async with self._condition:
+                self._switching = False
+                self._condition.notify_all()
+
+    async def run(self) -> None:
+        """
+        Построение новой версии индекса и переключение на неё псевдонима
+        """
+
+        app_logger.info(f"Index migration started: {self.alias} ({self.source} -> {self.target}, model {self.model})")
+
+        try:
+            source = self.indexes.get(self.source)
+            target = self.indexes.get(self.target, create=True)
+
+            while self.passes < self.max_passes and await self._sync(source, target):
+                pass
+
+            async with self.switching():
+                await self._sync(source, target)
+                await asyncio.to_thread(self.indexes.set_alias, self.alias, self.target)
+
+            self.state = MigrationState.completed
+            app_logger.info(
+                f"Index migration completed: {self.alias} -> {self.target}, {self.processed} texts "
+                f"in {self.elapsed:.1f}s ({self.texts_per_second:.1f} texts/s)"
+            )
+
+            if self.drop_source:
+                await asyncio.to_thread(self.indexes.drop, self.source)
+
+        except Exception as ex:
+            self.state = MigrationState.failed
+            self.error = str(ex)
+            app_logger.error(f"Ошибка переноса индекса {self.alias}: {ex}")
+
+        finally:
+            self.finished = time.perf_counter()
+
+    async def _sync(self, source: VectorIndex, target: VectorIndex) -> int:
+        """
+        Проход переноса: векторизация новых и изменённых записей, удаление удалённых.
+        Возвращает количество изменений новой версии индекса
+        """
+
+        self.passes += 1
+
+        source_items = await asyncio.to_thread(source.items)
+        target_items = await asyncio.to_thread(target.items)
+        target_texts = {doc_id: metadata.get(self.text_field) for doc_id, metadata in target_items}
+
+        without_text = [doc_id for doc_id, metadata in source_items if self.text_field not in metadata]
+        if without_text:
+            raise MigrationError(
+                f"Записи без текста в метаданных {self.text_field}: {len(without_text)} (например, {without_text[0]})"
+            )
+
+        changed = [
+            (doc_id, metadata) for doc_id, metadata in source_items
+            if target_texts.get(doc_id) != metadata[self.text_field]
+        ]
+        source_ids = {doc_id for doc_id, _ in source_items}
+        removed = [doc_id for doc_id in target_texts if doc_id not in source_ids]
+
+        self.total = self.processed + len(changed)
+
+        for offset in range(0, len(changed), self.batch_size):
+            batch = changed[offset:offset + self.batch_size]
+            vectors = await self.embed([metadata[self.text_field] for _, metadata in batch], self.model)
+            await asyncio.to_thread(
+                target.upsert,
+                [doc_id for doc_id, _ in batch],
+                vectors,
+                [metadata for _, metadata in batch],
+                self.model,
+            )
+            self.processed += len(batch)
+
+        if removed:
+            await asyncio.to_thread(target.delete, removed)
+
+        return len(changed) + len(removed)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> float:
+        """
+        Оценка оставшегося времени по средней скорости векторизации
+        """
+
+        if not self.running or not self.processed:
+            return 0.0
+
+        return (self.total - self.processed) / self.texts_per_second
+
+    def status(self) -> dict:
+        return {
+            "index": self.alias,
+            "source": self.source,
+            "target": self.target,
+            "model": self.model,
+            "state": self.state,
+            "total": self.total,
+            "processed": self.processed,
+            "passes": self.passes,
+            "texts_per_second": self.texts_per_second,
+            "elapsed_seconds": self.elapsed,
+            "eta_seconds": self.eta_seconds,
+            "error": self.error,
+        }
@@ -1,17 +1,79 @@
+import fcntl
 import math
 import numpy as np
+import os
+import re
 
 from fastembed import TextEmbedding
 from sentence_transformers import SentenceTransformer
 
 from typing import List
 
-from app.config import app_settings, ModelLib
+from app.config import app_settings, ModelLib, ModelQuantization
 from app.logs import app_logger
+from app.similarity import SimilarityEngine
+
+# максимальная длина последовательности, если модель её не сообщает (в токенах)
+DEFAULT_MAX_SEQ_LENGTH = 128
+
+
+def quantized_model_dir(model_name: str, quantization_config: str) -> str:
+    """
+    Каталог int8 ONNX-варианта модели в кэше моделей
+    """
+
+    return os.path.join(
+        app_settings.MODEL_CACHE_DIR or ".",
+        "onnx-int8",
+        f"{model_name.replace('/', '--')}-{quantization_config}",
+    )
+
+
+def load_quantized_sentence_transformer(model_name: str, quantization_config: str) -> SentenceTransformer:
+    """
+    Загрузка динамически квантизованной int8 ONNX-модели Sentence Transformers.
+
+    При первом запуске модель экспортируется в ONNX, квантизуется и сохраняется в кэш моделей,
+    последующие запуски загружают готовую модель. Экспорт выполняется под файловой блокировкой,
+    чтобы несколько процессов сервиса не создавали модель одновременно.
+    """
+
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    model_dir = quantized_model_dir(model_name, quantization_config)
+    file_name = f"onnx/model_qint8_{quantization_config}.onnx"
+
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        if not os.path.exists(os.path.join(model_dir, file_name)):
+            app_logger.info(f"Exporting int8 ONNX model: {model_name} ({quantization_config})")
+            model = SentenceTransformer(model_name_or_path=model_name, backend="onnx")
+            model.save(model_dir)
+            export_dynamic_quantized_onnx_model(model, quantization_config, model_dir)
+
+    model_kwargs = {"file_name": file_name}
+    if app_settings.INTRA_OP_THREADS:
+        import onnxruntime
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = app_settings.INTRA_OP_THREADS
+        model_kwargs["session_options"] = session_options
+
+    return SentenceTransformer(model_name_or_path=model_dir, backend="onnx", model_kwargs=model_kwargs)
+
+
+def model_quantization(model_name: str) -> str:
+    """
+    Режим квантизации модели: MODEL_QUANTIZATION относится только к модели по умолчанию MODEL_NAME,
+    дополнительные модели и модели переноса индексов загружаются без квантизации
+    """
+
+    return app_settings.MODEL_QUANTIZATION if model_name == app_settings.MODEL_NAME else ModelQuantization.none
 
 
 class EmbeddingModel:
-    def __init__(self, model_name: str, model_lib: str):
+    def __init__(self, model_name: str, model_lib: str, quantization: str | None = None):
 
         self.model = None
         self.model_lib = None
@@ -19,13 +81,29 @@ class EmbeddingModel:
 
         app_logger.info(f"Initializing embedding model: {model_name}")
 
-        if model_lib == ModelLib.fastembed.name:
+        quantization = quantization or model_quantization(model_name)
+
+        if quantization == ModelQuantization.int8:
+            if model_lib != ModelLib.sentence_transformers.name:
+                raise ValueError(f"Квантизация int8 поддерживается только для {ModelLib.sentence_transformers.name}")
+
+            self.model = load_quantized_sentence_transformer(model_name, app_settings.MODEL_QUANTIZATION_CONFIG)
+
+        elif quantization != ModelQuantization.none:
+            raise ValueError(f"Неизвестный режим квантизации: {quantization}")
+
+        elif model_lib == ModelLib.fastembed.name:
             self.model = TextEmbedding(
                 model_name=model_name,
                 cache_dir=app_settings.MODEL_CACHE_DIR,
+                threads=app_settings.INTRA_OP_THREADS or None,
             )
 
         elif model_lib == ModelLib.sentence_transformers.name:
+            if app_settings.INTRA_OP_THREADS:
+                import torch
+                torch.set_num_threads(app_settings.INTRA_OP_THREADS)
+
             self.model = SentenceTransformer(
                 model_name_or_path=model_name,
                 # cache_folder=app_settings.MODEL_CACHE_DIR,
@@ -56,22 +134,210 @@ class EmbeddingModel:
         else:
             return []
 
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+    def _embed_raw(self, texts: List[str]) -> np.ndarray:
         """
-        Пакетная векторизация текста
+        Векторизация текстов моделью в исходном порядке
         """
 
         if self.model_lib == ModelLib.fastembed.name:
-            embeddings_generator = self.model.embed(texts)
-            return [embedding.tolist() for embedding in embeddings_generator]
+            embeddings = list(self.model.embed(texts, batch_size=max(1, len(texts))))
 
         elif self.model_lib == ModelLib.sentence_transformers.name:
             embeddings = self.model.encode(texts, convert_to_numpy=True)
-            embeddings = np.array(embeddings)
-            return [embedding.tolist() for embedding in embeddings]
 
         else:
-            return []
+            return np.empty((0, 0), dtype=np.float32)
+
+        if len(embeddings) == 0:
+            return np.empty((0, 0), dtype=np.float32)
+
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def count_tokens(self, texts: List[str]) -> List[int]:
+        """
+        Количество токенов в текстах (без учёта дополнения до длины пакета).
+        Если токенизатор модели недоступен, используется количество слов.
+        """
+
+        try:
+            if self.model_lib == ModelLib.fastembed.name:
+                tokenizer = getattr(self.model.model, "tokenizer", None)
+                if tokenizer is not None:
+                    # токенизатор FastEmbed дополняет пакет до самого длинного текста, поэтому считается маска
+                    return [sum(encoding.attention_mask) for encoding in tokenizer.encode_batch(texts)]
+
+            elif self.model_lib == ModelLib.sentence_transformers.name:
+                tokenizer = getattr(self.model, "tokenizer", None)
+                if tokenizer is not None:
+                    return [len(ids) for ids in tokenizer(texts, truncation=True)["input_ids"]]
+
+        except Exception as ex:
+            app_logger.warning(f"Ошибка подсчёта токенов: {ex}")
+
+        return [len(text.split()) for text in texts]
+
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Пакетная векторизация текста в матрицу float32.
+
+        Одинаковые тексты векторизуются один раз. Уникальные тексты сортируются по количеству токенов
+        и векторизуются корзинами по EMBED_BUCKET_SIZE текстов, чтобы короткие тексты не дополнялись
+        до длины самого длинного текста пакета. Порядок результата совпадает с порядком texts.
+        """
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # дедупликация: индекс уникального текста для каждой позиции исходного пакета
+        unique_positions: dict[str, int] = {}
+        inverse = [unique_positions.setdefault(text, len(unique_positions)) for text in texts]
+        unique_texts = list(unique_positions)
+
+        bucket_size = max(1, app_settings.EMBED_BUCKET_SIZE)
+
+        if len(unique_texts) == 1:
+            order = [0]
+        else:
+            lengths = self.count_tokens(unique_texts)
+            order = sorted(range(len(unique_texts)), key=lengths.__getitem__)
+
+        buckets = [
+            self._embed_raw([unique_texts[i] for i in order[start:start + bucket_size]])
+            for start in range(0, len(order), bucket_size)
+        ]
+        if any(bucket.size == 0 for bucket in buckets):
+            return np.empty((0, 0), dtype=np.float32)
+
+        # восстановление порядка уникальных текстов, затем - исходного порядка с дубликатами
+        unique_embeddings = np.empty((len(unique_texts), buckets[0].shape[1]), dtype=np.float32)
+        unique_embeddings[order] = np.concatenate(buckets)
+
+        return unique_embeddings[inverse]
+
+    def max_tokens(self) -> int:
+        """
+        Максимальное количество токенов текста, обрабатываемое моделью без усечения (без служебных токенов)
+        """
+
+        max_length = None
+        if self.model_lib == ModelLib.fastembed.name:
+            tokenizer = getattr(self.model.model, "tokenizer", None)
+            truncation = getattr(tokenizer, "truncation", None)
+            max_length = truncation.get("max_length") if truncation else None
+
+        elif self.model_lib == ModelLib.sentence_transformers.name:
+            max_length = getattr(self.model, "max_seq_length", None)
+
+        # служебные токены начала и конца последовательности
+        return max(1, (max_length or DEFAULT_MAX_SEQ_LENGTH) - 2)
+
+    def token_offsets(self, text: str) -> List[tuple[int, int]]:
+        """
+        Позиции токенов текста (начало, конец) без усечения и служебных токенов.
+        Если токенизатор модели недоступен, токенами считаются слова.
+        """
+
+        try:
+            if self.model_lib == ModelLib.fastembed.name:
+                tokenizer = getattr(self, "_window_tokenizer", None)
+                if tokenizer is None:
+                    from tokenizers import Tokenizer
+
+                    # копия токенизатора модели без усечения и дополнения (исходный используется при векторизации)
+                    tokenizer = Tokenizer.from_str(self.model.model.tokenizer.to_str())
+                    tokenizer.no_truncation()
+                    tokenizer.no_padding()
+                    self._window_tokenizer = tokenizer
+
+                encoding = tokenizer.encode(text)
+                return [
+                    offset for offset, special in zip(encoding.offsets, encoding.special_tokens_mask) if not special
+                ]
+
+            elif self.model_lib == ModelLib.sentence_transformers.name:
+                encoding = self.model.tokenizer(
+                    text,
+                    add_special_tokens=False,
+                    return_offsets_mapping=True,
+                    truncation=False,
+                )
+                return [tuple(offset) for offset in encoding["offset_mapping"]]
+
+        except Exception as ex:
+            app_logger.warning(f"Ошибка токенизации текста: {ex}")
+
+        return [match.span() for match in re.finditer(r"\S+", text)]
+
+    def split_windows(self, text: str) -> tuple[List[str], List[int]]:
+        """
+        Разбиение текста на перекрывающиеся окна по CHUNK_WINDOW_TOKENS токенов
+
+        :return: Тексты окон и количество токенов в каждом окне.
+        """
+
+        window = app_settings.CHUNK_WINDOW_TOKENS or self.max_tokens()
+        step = max(1, window - max(0, app_settings.CHUNK_OVERLAP_TOKENS))
+
+        offsets = self.token_offsets(text)
+        if len(offsets) <= window:
+            return [text], [max(1, len(offsets))]
+
+        windows, counts = [], []
+        for start in range(0, len(offsets), step):
+            end = min(start + window, len(offsets))
+            windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+            counts.append(end - start)
+
+            if end == len(offsets) or len(windows) >= app_settings.CHUNK_MAX_WINDOWS:
+                break
+
+        return windows, counts
+
+    def embed_chunked(
+            self,
+            texts: List[str],
+            return_windows: bool = False,
+    ) -> tuple[np.ndarray, List[np.ndarray] | None]:
+        """
+        Векторизация длинных текстов: разбиение на перекрывающиеся окна, векторизация окон всех текстов
+        одним пакетом и объединение векторов окон каждого текста (среднее, взвешенное по количеству токенов)
+
+        :return: Матрица объединённых векторов и, если return_windows, матрицы векторов окон каждого текста.
+        """
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32), [] if return_windows else None
+
+        windows, owners, weights = [], [], []
+        for i, text in enumerate(texts):
+            text_windows, counts = self.split_windows(text)
+            windows.extend(text_windows)
+            owners.extend([i] * len(text_windows))
+            weights.extend(counts)
+
+        embeddings = self.embed_batch_array(windows)
+        if embeddings.size == 0:
+            return np.empty((0, 0), dtype=np.float32), [] if return_windows else None
+
+        owners = np.asarray(owners)
+        weights = np.asarray(weights, dtype=np.float32)
+
+        pooled = np.zeros((len(texts), embeddings.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, embeddings * weights[:, None])
+        pooled /= np.bincount(owners, weights=weights, minlength=len(texts))[:, None].astype(np.float32)
+
+        per_text = None
+        if return_windows:
+            per_text = np.split(embeddings, np.cumsum(np.bincount(owners, minlength=len(texts)))[:-1])
+
+        return pooled, per_text
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Пакетная векторизация текста
+        """
+
+        return self.embed_batch_array(texts).tolist()
 
     @staticmethod
     def cosine_similarity(vector1: List[float], vector2: List[float]) -> float:
@@ -133,7 +399,7 @@ class EmbeddingModel:
     def find_most_similar_by_vector(
             self,
             query_vector: List[float],
-            candidates: List[List[float]],
+            candidates: List[List[float]] | np.ndarray | SimilarityEngine,
             top_k: int = 5,
             similarity_func: str = "cosine"
     ) -> List[tuple]:
@@ -141,7 +407,8 @@ class EmbeddingModel:
         Поиск наиболее похожих векторов из списка кандидатов к заданному вектору запроса
 
         :param query_vector: Вектор запроса.
-        :param candidates: Список векторов-кандидатов.
+        :param candidates: Список векторов-кандидатов (или матрица NumPy), либо готовый SimilarityEngine -
+            для повторных запросов к одному набору кандидатов без повторной нормализации матрицы.
         :param top_k: Количество наиболее похожих результатов для возврата.
         :param similarity_func: Функция сходства ("cosine" или "euclidean").
         :return: Список кортежей (индекс_кандидата, значение_сходства), отсортированный по убыванию сходства.
@@ -150,24 +417,9 @@ class EmbeddingModel:
         if not self.model:
             return []
 
-        similarities = []
-
-        for i, candidate_vector in enumerate(candidates):
-            if similarity_func == "cosine":
-                score = self.cosine_similarity(query_vector, candidate_vector)
-            elif similarity_func == "euclidean":
-                # возврат отрицательного евклидово расстояния,
-                # чтобы сортировка по убыванию работала как "наиболее близкие"
-                score = -self.euclidean_distance(query_vector, candidate_vector)
-            else:
-                raise ValueError(f"Неизвестная функция сходства: {similarity_func}")
-
-            similarities.append((i, score))
-
-        # сортировка по значению сходства в порядке убывания
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        engine = candidates if isinstance(candidates, SimilarityEngine) else SimilarityEngine(candidates)
 
-        return similarities[:top_k]
+        return engine.top_k(query_vector, top_k, similarity_func)
 
     def find_most_similar_by_text(
             self,
@@ -191,8 +443,8 @@ class EmbeddingModel:
         if not self.model:
             return []
 
-        query_vector = self.embed(query_text)
-        candidate_vectors = self.embed_batch(candidate_texts)
+        query_vector = self.embed_batch_array([query_text])[0]
+        candidate_vectors = self.embed_batch_array(candidate_texts)
 
         similarities_with_indices = self.find_most_similar_by_vector(
             query_vector, candidate_vectors, top_k, similarity_func
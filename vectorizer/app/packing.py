@@ -0,0 +1,78 @@
+""" Упаковка векторов в бинарный формат ответа (PackedEmbeddings) """
+
+import numpy as np
+
+from typing import Sequence
+
+from proto import vectorizer_pb2
+
+EmbeddingFormat = vectorizer_pb2.EmbeddingFormat  # noqa
+
+# типы данных упакованных форматов (little-endian)
+FORMAT_DTYPES = {
+    EmbeddingFormat.FORMAT_FLOAT32: np.dtype("<f4"),
+    EmbeddingFormat.FORMAT_FLOAT16: np.dtype("<f2"),
+    EmbeddingFormat.FORMAT_INT8: np.dtype("i1"),
+}
+
+
+def to_matrix(embeddings: np.ndarray | Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Сборка векторов в матрицу float32
+    """
+
+    if isinstance(embeddings, np.ndarray):
+        return np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+
+    if not len(embeddings):
+        return np.empty((0, 0), dtype=np.float32)
+
+    return np.stack(embeddings).astype(np.float32, copy=False)
+
+
+def pack_embeddings(embeddings: np.ndarray | Sequence[np.ndarray], fmt: int) -> vectorizer_pb2.PackedEmbeddings:  # noqa
+    """
+    Упаковка матрицы векторов в заданный формат
+    """
+
+    if fmt not in FORMAT_DTYPES:
+        raise ValueError(f"Неизвестный формат упаковки векторов: {fmt}")
+
+    matrix = to_matrix(embeddings)
+    count, dim = matrix.shape if matrix.size else (matrix.shape[0], 0)
+    scales: list[float] = []
+
+    if fmt == EmbeddingFormat.FORMAT_INT8:
+        # симметричное квантование с масштабом на каждый вектор
+        max_abs = np.abs(matrix).max(axis=1) if dim else np.zeros(count, dtype=np.float32)
+        scale = np.where(max_abs == 0, 1.0, max_abs / 127.0).astype(np.float32)
+        data = np.clip(np.rint(matrix / scale[:, None]), -127, 127).astype(FORMAT_DTYPES[fmt])
+        scales = scale.tolist()
+    else:
+        data = matrix.astype(FORMAT_DTYPES[fmt], copy=False)
+
+    return vectorizer_pb2.PackedEmbeddings(  # noqa
+        format=fmt,
+        count=count,
+        dim=dim,
+        data=data.tobytes(),
+        scales=scales,
+    )
+
+
+def unpack_embeddings(packed: vectorizer_pb2.PackedEmbeddings) -> np.ndarray:  # noqa
+    """
+    Распаковка векторов в матрицу NumPy (для float32 - без копирования)
+    """
+
+    dtype = FORMAT_DTYPES.get(packed.format)
+    if dtype is None:
+        raise ValueError(f"Неизвестный формат упаковки векторов: {packed.format}")
+
+    matrix = np.frombuffer(packed.data, dtype=dtype).reshape(packed.count, packed.dim)
+
+    if packed.format == EmbeddingFormat.FORMAT_INT8:
+        scales = np.asarray(packed.scales, dtype=np.float32)
+        return matrix.astype(np.float32) * scales[:, None]
+
+    return matrix
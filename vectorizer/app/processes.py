@@ -0,0 +1,156 @@
+""" Запуск нескольких процессов gRPC сервера на одном порту (SO_REUSEPORT) """
+
+import asyncio
+import multiprocessing
+import signal
+import time
+
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable
+
+from app.logs import app_logger
+
+# интервал проверки процессов сервера (в секундах)
+MONITOR_INTERVAL_SECONDS = 1.0
+# время ожидания завершения процесса после SIGTERM (в секундах)
+STOP_TIMEOUT_SECONDS = 30.0
+# процесс, завершившийся раньше этого времени после запуска, считается упавшим при запуске (в секундах)
+QUICK_EXIT_SECONDS = 60.0
+# начальная и максимальная задержка перезапуска после падения при запуске (удваивается с каждым падением подряд)
+RESTART_BACKOFF_SECONDS = 1.0
+RESTART_BACKOFF_MAX_SECONDS = 60.0
+# количество падений при запуске подряд в одном слоте, после которого группа процессов останавливается
+MAX_QUICK_EXITS = 5
+
+
+def run_server_process(serve: Callable[..., Any], *args) -> None:
+    """
+    Точка входа процесса сервера: запуск serve(*args), SIGTERM завершает сервер штатно
+    """
+
+    async def main():
+        task = asyncio.create_task(serve(*args))
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+class ServerProcesses:
+    """
+    Группа процессов gRPC сервера.
+
+    Каждый процесс создаёт собственный сервер на общем порту (SO_REUSEPORT) и загружает собственные модели,
+    поэтому токенизация и обработка запросов не ограничены GIL одного процесса. Завершившиеся процессы
+    перезапускаются: после падения при запуске - с экспоненциальной задержкой, после MAX_QUICK_EXITS таких
+    падений подряд группа останавливается (ошибка конфигурации или окружения перезапуском не исправляется).
+    """
+
+    def __init__(self, target: Callable[..., Any], args: tuple = (), processes: int = 2) -> None:
+        self.target = target
+        self.args = args
+        self.processes = max(1, processes)
+        self.restarts = 0
+
+        # fork после импорта gRPC небезопасен, поэтому процессы создаются через spawn
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: list[BaseProcess | None] = [None] * self.processes
+
+        # по слотам процессов: время запуска, количество падений при запуске подряд, время отложенного перезапуска
+        self._started_at = [0.0] * self.processes
+        self._quick_exits = [0] * self.processes
+        self._restart_at: list[float | None] = [None] * self.processes
+
+    def _start_worker(self, number: int) -> None:
+        worker = self._context.Process(
+            target=run_server_process,
+            args=(self.target, *self.args),
+            name=f"vectorizer-{number}",
+        )
+        worker.start()
+        self._workers[number] = worker
+        self._started_at[number] = time.monotonic()
+        self._restart_at[number] = None
+        app_logger.info(f"Server process {worker.name} started, pid {worker.pid}")
+
+    def start(self) -> None:
+        for number in range(self.processes):
+            self._start_worker(number)
+
+    def _schedule_restart(self, number: int, worker: BaseProcess) -> None:
+        """
+        Планирование перезапуска завершившегося процесса: сразу после штатной работы,
+        с задержкой RESTART_BACKOFF_SECONDS * 2^(n-1) после n-го падения при запуске подряд
+        """
+
+        now = time.monotonic()
+        if now - self._started_at[number] < QUICK_EXIT_SECONDS:
+            self._quick_exits[number] += 1
+        else:
+            self._quick_exits[number] = 0
+
+        quick_exits = self._quick_exits[number]
+        if quick_exits >= MAX_QUICK_EXITS:
+            raise RuntimeError(
+                f"Server process {worker.name} exited with code {worker.exitcode} "
+                f"{quick_exits} times in a row shortly after start"
+            )
+
+        delay = min(RESTART_BACKOFF_SECONDS * 2 ** (quick_exits - 1), RESTART_BACKOFF_MAX_SECONDS) if quick_exits else 0
+        self._restart_at[number] = now + delay
+        app_logger.error(f"Server process {worker.name} exited with code {worker.exitcode}, restarting in {delay:.1f}s")
+
+    async def monitor(self) -> None:
+        """
+        Наблюдение за процессами сервера и перезапуск завершившихся
+        """
+
+        while True:
+            await asyncio.sleep(MONITOR_INTERVAL_SECONDS)
+
+            for number, worker in enumerate(self._workers):
+                if worker is None or worker.is_alive():
+                    continue
+
+                if self._restart_at[number] is None:
+                    self._schedule_restart(number, worker)
+
+                if time.monotonic() >= self._restart_at[number]:
+                    self.restarts += 1
+                    self._start_worker(number)
+
+    def stop(self) -> None:
+        """
+        Штатное завершение процессов сервера (SIGTERM), по истечении времени ожидания - принудительное
+        """
+
+        for worker in self._workers:
+            if worker is not None and worker.is_alive():
+                worker.terminate()
+
+        for worker in self._workers:
+            if worker is None:
+                continue
+
+            worker.join(STOP_TIMEOUT_SECONDS)
+            if worker.is_alive():
+                app_logger.error(f"Server process {worker.name} did not stop, killing")
+                worker.kill()
+                worker.join()
+
+    async def run(self) -> None:
+        """
+        Запуск процессов сервера и наблюдение за ними до отмены
+        """
+
+        self.start()
+        try:
+            await self.monitor()
+        finally:
+            await asyncio.to_thread(self.stop)
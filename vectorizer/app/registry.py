@@ -0,0 +1,208 @@
+""" Реестр моделей векторизации: ленивая загрузка и выгрузка по бюджету памяти """
+
+import gc
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from app.logs import app_logger
+from app.models import EmbeddingModel
+
+
+class UnknownModelError(ValueError):
+    """
+    Модель отсутствует в списке доступных
+    """
+
+
+@dataclass
+class ModelEntry:
+    """
+    Загруженная модель
+    """
+
+    model: EmbeddingModel
+    size_bytes: int = 0  # оценка занимаемой памяти
+    in_use: int = 0  # количество выполняющихся вызовов
+    pinned: bool = False  # модель не выгружается
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def get_rss_bytes() -> int:
+    """
+    Текущий объём резидентной памяти процесса (Linux), 0 - если недоступно
+    """
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ModelRegistry:
+    """
+    Реестр моделей векторизации.
+
+    Модели загружаются при первом обращении по имени. Если после загрузки суммарная оценка памяти
+    превышает бюджет, выгружаются давно не использовавшиеся модели, у которых нет выполняющихся вызовов.
+    Модель по умолчанию загружается сразу и не выгружается.
+    """
+
+    def __init__(
+            self,
+            default_model: str,
+            default_lib: str,
+            models: dict[str, str] | None = None,
+            memory_budget_mb: float = 0,
+            preloaded: dict[str, EmbeddingModel] | None = None,
+            loader: Callable[[str, str], EmbeddingModel] = EmbeddingModel,
+    ) -> None:
+        self.default_model = default_model
+        self.available = {default_model: default_lib, **(models or {})}
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.loader = loader
+
+        self._models: OrderedDict[str, ModelEntry] = OrderedDict()
+        self._lock = threading.Lock()  # защита состояния реестра
+        self._load_lock = threading.Lock()  # модели загружаются по одной
+
+        self.loads = 0
+        self.unloads = 0
+
+        for name, model in (preloaded or {}).items():
+            self.available.setdefault(name, model.model_lib)
+            self._models[name] = ModelEntry(model=model, pinned=True)
+
+        if default_model not in self._models:
+            entry = self._load(default_model)
+            entry.pinned = True
+            self._models[default_model] = entry
+
+    def resolve(self, name: str | None) -> str:
+        """
+        Название модели с учётом модели по умолчанию
+        """
+
+        name = name or self.default_model
+        if name not in self.available:
+            raise UnknownModelError(f"Модель не найдена: {name}")
+
+        return name
+
+    def _load(self, name: str) -> ModelEntry:
+        """
+        Загрузка модели с оценкой занимаемой памяти (по приросту резидентной памяти процесса)
+        """
+
+        rss_before = get_rss_bytes()
+        model = self.loader(name, self.available[name])
+        size_bytes = max(0, get_rss_bytes() - rss_before)
+        self.loads += 1
+
+        if not model.model:
+            raise RuntimeError(f"Модель не загружена: {name}")
+
+        app_logger.info(f"Model loaded: {name}, ~{size_bytes / 1024 / 1024:.0f} MB")
+        return ModelEntry(model=model, size_bytes=size_bytes)
+
+    def _evict(self) -> None:
+        """
+        Выгрузка давно не использовавшихся свободных моделей при превышении бюджета памяти
+        """
+
+        if not self.memory_budget_bytes:
+            return
+
+        total = sum(entry.size_bytes for entry in self._models.values())
+        for name in list(self._models):
+            if total <= self.memory_budget_bytes:
+                break
+
+            entry = self._models[name]
+            if entry.pinned or entry.in_use:
+                continue
+
+            del self._models[name]
+            total -= entry.size_bytes
+            self.unloads += 1
+            app_logger.info(f"Model unloaded: {name}")
+
+        gc.collect()
+
+    def acquire(self, name: str | None = None) -> tuple[str, EmbeddingModel]:
+        """
+        Получение модели для вызова (с загрузкой при необходимости)
+        """
+
+        name = self.resolve(name)
+
+        with self._lock:
+            if entry := self._models.get(name):
+                entry.in_use += 1
+                self._models.move_to_end(name)
+                return name, entry.model
+
+        with self._load_lock:
+            # модель могла быть загружена другим потоком, пока ожидалась блокировка
+            with self._lock:
+                if entry := self._models.get(name):
+                    entry.in_use += 1
+                    self._models.move_to_end(name)
+                    return name, entry.model
+
+            entry = self._load(name)
+            entry.in_use = 1
+
+            with self._lock:
+                self._models[name] = entry
+                self._evict()
+
+        return name, entry.model
+
+    def release(self, name: str) -> None:
+        """
+        Завершение вызова модели
+        """
+
+        with self._lock:
+            if entry := self._models.get(name):
+                entry.in_use = max(0, entry.in_use - 1)
+                entry.last_used = time.monotonic()
+
+    def call(self, name: str | None, method: str, *args) -> Any:
+        """
+        Вызов метода модели по имени
+        """
+
+        name, model = self.acquire(name)
+        try:
+            return getattr(model, method)(*args)
+        finally:
+            self.release(name)
+
+    def get_model(self, name: str | None = None) -> EmbeddingModel:
+        """
+        Загруженная модель по имени (без учёта вызова)
+        """
+
+        name, model = self.acquire(name)
+        self.release(name)
+        return model
+
+    def stats(self) -> dict[str, float]:
+        """
+        Счётчики реестра моделей
+        """
+
+        with self._lock:
+            return {
+                "models_loaded": len(self._models),
+                "models_memory_bytes": sum(entry.size_bytes for entry in self._models.values()),
+                "models_loads": self.loads,
+                "models_unloads": self.unloads,
+            }
@@ -0,0 +1,131 @@
+""" Переранжирование кандидатов поиска кросс-энкодером """
+
+import threading
+import time
+
+import numpy as np
+
+from typing import List
+
+from app.config import app_settings, ModelLib
+from app.logs import app_logger
+
+
+class RerankerNotConfiguredError(RuntimeError):
+    """
+    Модель переранжирования не задана в настройках
+    """
+
+
+class RerankDeadlineExceeded(TimeoutError):
+    """
+    Срок запроса переранжирования истёк до завершения оценки кандидатов
+    """
+
+
+class CrossEncoderModel:
+    """
+    Кросс-энкодер: оценивает релевантность пары (запрос, кандидат) совместным проходом модели,
+    что точнее косинусного сходства векторов, но дороже - поэтому применяется только к top-N кандидатам.
+    """
+
+    def __init__(self, model_name: str, model_lib: str):
+
+        self.model = None
+        self.model_lib = None
+        self.model_name = None
+
+        # счётчики вызовов
+        self.calls = 0
+        self.candidates = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+        app_logger.info(f"Initializing rerank model: {model_name}")
+
+        if model_lib == ModelLib.fastembed.name:
+            from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+            self.model = TextCrossEncoder(
+                model_name=model_name,
+                cache_dir=app_settings.MODEL_CACHE_DIR,
+                threads=app_settings.INTRA_OP_THREADS or None,
+            )
+
+        elif model_lib == ModelLib.sentence_transformers.name:
+            from sentence_transformers import CrossEncoder
+
+            if app_settings.INTRA_OP_THREADS:
+                import torch
+                torch.set_num_threads(app_settings.INTRA_OP_THREADS)
+
+            self.model = CrossEncoder(model_name, max_length=app_settings.RERANK_MAX_LENGTH, device="cpu")
+
+        else:
+            raise ValueError(f"Неизвестная библиотека модели переранжирования: {model_lib}")
+
+        self.model_lib = model_lib
+        self.model_name = model_name
+
+        app_logger.info("Rerank model loaded successfully")
+
+    def _score_raw(self, query: str, candidates: List[str]) -> np.ndarray:
+        """
+        Оценка пакета кандидатов одним вызовом модели
+        """
+
+        if self.model_lib == ModelLib.fastembed.name:
+            scores = list(self.model.rerank(query, candidates, batch_size=max(1, len(candidates))))
+        else:
+            scores = self.model.predict(
+                [(query, candidate) for candidate in candidates],
+                batch_size=max(1, len(candidates)),
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+
+        return np.asarray(scores, dtype=np.float32).reshape(-1)
+
+    def score(self, query: str, candidates: List[str], deadline: float | None = None) -> np.ndarray:
+        """
+        Оценки релевантности кандидатов запросу (чем больше, тем релевантнее) в порядке candidates.
+
+        Кандидаты сортируются по длине и оцениваются пакетами по RERANK_BATCH_SIZE, чтобы короткие
+        тексты не дополнялись до длины самого длинного кандидата. По истечении срока deadline (time.monotonic)
+        оценка прекращается перед очередным пакетом: клиент уже не ждёт результата.
+        """
+
+        if not candidates:
+            return np.empty(0, dtype=np.float32)
+
+        start = time.perf_counter()
+
+        batch_size = max(1, app_settings.RERANK_BATCH_SIZE)
+        order = sorted(range(len(candidates)), key=lambda i: len(candidates[i]))
+
+        scores = np.empty(len(candidates), dtype=np.float32)
+        for offset in range(0, len(order), batch_size):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise RerankDeadlineExceeded("Срок запроса переранжирования истёк")
+
+            positions = order[offset:offset + batch_size]
+            scores[positions] = self._score_raw(query, [candidates[i] for i in positions])
+
+        with self._lock:
+            self.calls += 1
+            self.candidates += len(candidates)
+            self.seconds += time.perf_counter() - start
+
+        return scores
+
+    def stats(self) -> dict[str, float]:
+        """
+        Счётчики переранжирования
+        """
+
+        with self._lock:
+            return {
+                "rerank_calls": self.calls,
+                "rerank_candidates": self.candidates,
+                "rerank_ms_per_candidate": self.seconds * 1000 / self.candidates if self.candidates else 0.0,
+            }
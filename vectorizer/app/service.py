@@ -1,38 +1,387 @@
+import asyncio
 import grpc
+import multiprocessing
+import numpy as np
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator
+
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
 
 from proto import vectorizer_pb2_grpc, vectorizer_pb2
 
+from app.admission import AdmissionController, AdmissionRejected, Priority
+from app.batching import MicroBatcher
+from app.cache import EmbeddingCache
 from app.config import app_settings
+from app.index import IndexNotFoundError, IndexStore
 from app.logs import app_logger
-from app.models import EmbeddingModel
+from app.migration import IndexMigration, index_write_lock
+from app.models import EmbeddingModel, model_quantization
+from app.packing import pack_embeddings
+from app.registry import UnknownModelError
+from app.rerank import CrossEncoderModel, RerankDeadlineExceeded, RerankerNotConfiguredError
+from app.store import EmbeddingStore
+from app.workers import InferencePool
+
+# название сервиса для проверки готовности по протоколу gRPC Health Checking
+SERVICE_NAME = vectorizer_pb2.DESCRIPTOR.services_by_name["VectorizerService"].full_name  # noqa
+
+# ключ метаданных с рекомендуемой задержкой повтора отклонённого запроса (в миллисекундах)
+RETRY_PUSHBACK_KEY = "grpc-retry-pushback-ms"
+
+
+class ServiceNotReadyError(RuntimeError):
+    """
+    Сервис ещё не загрузил модель и не завершил прогрев
+    """
+
+
+def make_warmup_texts(batch_size: int) -> list[str]:
+    """
+    Тексты прогрева разной длины (от одного слова до нескольких предложений)
+    """
+
+    phrase = app_settings.WARMUP_TEXT.split() or ["warmup"]
+    return [" ".join(phrase * (i + 1))[:2000] for i in range(batch_size)]
 
 
 class VectorizerService(vectorizer_pb2_grpc.VectorizerServiceServicer):
-    def __init__(self):
-        # инициализация модели векторизации
-        self.embedding_model = EmbeddingModel(model_name=app_settings.MODEL_NAME, model_lib=app_settings.MODEL_LIB)
+    def __init__(self, embedding_model: EmbeddingModel | None = None):
+        # пул исполнителей и реестр моделей создаются в start(), после запуска gRPC сервера
+        self.pool: InferencePool | None = None
+        self._embedding_model = embedding_model
+
+        # кросс-энкодер переранжирования загружается в start(), вызовы выполняются по одному в отдельном потоке
+        self.reranker: CrossEncoderModel | None = None
+        self._rerank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+        # длительности этапов запуска (в секундах)
+        self.startup: dict[str, float] = {}
+
+        # сборка конкурентных запросов EmbedText в пакеты
+        self.batcher = MicroBatcher(
+            handler=self._embed_batch_async,
+            max_batch_size=app_settings.EMBED_BATCH_MAX_SIZE,
+            max_wait_ms=app_settings.EMBED_BATCH_MAX_WAIT_MS,
+            max_concurrent=app_settings.INFERENCE_WORKERS,
+        )
+
+        # контроль допуска: ограничение обрабатываемых текстов и очереди по приоритетам
+        self.admission = AdmissionController(
+            max_in_flight=app_settings.ADMISSION_MAX_IN_FLIGHT,
+            bulk_max_in_flight=app_settings.ADMISSION_BULK_MAX_IN_FLIGHT,
+            queue_limits={
+                Priority.interactive: app_settings.ADMISSION_QUEUE_INTERACTIVE,
+                Priority.bulk: app_settings.ADMISSION_QUEUE_BULK,
+            },
+            max_wait_ms=app_settings.ADMISSION_MAX_WAIT_MS,
+            min_retry_after_ms=app_settings.ADMISSION_RETRY_AFTER_MS,
+        )
+
+        # индексы приближённого поиска векторов
+        self.indexes = IndexStore(
+            root=app_settings.INDEX_DIR,
+            dtype=app_settings.INDEX_DTYPE,
+            nprobe=app_settings.INDEX_NPROBE,
+            train_min=app_settings.INDEX_TRAIN_MIN,
+            nlist=app_settings.INDEX_NLIST,
+        )
+
+        # переносы индексов на другую модель по псевдониму индекса (завершённые хранятся до следующего переноса)
+        self.migrations: dict[str, IndexMigration] = {}
+        self._migration_tasks: set[asyncio.Task] = set()
+
+        # кэш векторов повторяющихся запросов
+        self.cache = EmbeddingCache(
+            max_items=app_settings.EMBED_CACHE_MAX_ITEMS,
+            max_memory_mb=app_settings.EMBED_CACHE_MAX_MEMORY_MB,
+            ttl_seconds=app_settings.EMBED_CACHE_TTL_SECONDS,
+        )
+
+        # постоянное хранилище векторов пакетной векторизации (квантизация меняет векторы модели)
+        self.store = EmbeddingStore(root=app_settings.EMBED_STORE_DIR, variant=model_quantization)
+
+    @property
+    def ready(self) -> bool:
+        return self.pool is not None and "warmup_seconds" in self.startup
 
-    def EmbedText(self, request: vectorizer_pb2.EmbedTextRequest, context) -> vectorizer_pb2.EmbedTextResponse:  # noqa
+    async def start(self) -> None:
+        """
+        Загрузка модели по умолчанию и прогрев, выполняются вне цикла событий
+        """
+
+        started = time.perf_counter()
+        self.pool = await asyncio.to_thread(
+            InferencePool,
+            model_name=app_settings.MODEL_NAME,
+            model_lib=app_settings.MODEL_LIB,
+            pool_type=app_settings.INFERENCE_POOL,
+            workers=app_settings.INFERENCE_WORKERS,
+            embedding_model=self._embedding_model,
+            models=app_settings.MODELS,
+            memory_budget_mb=app_settings.MODELS_MEMORY_BUDGET_MB,
+        )
+        self.startup["model_load_seconds"] = time.perf_counter() - started
+        app_logger.info(f"Model loaded in {self.startup['model_load_seconds']:.2f}s")
+
+        started = time.perf_counter()
+        await asyncio.to_thread(self.indexes.load)
+        self.startup["index_load_seconds"] = time.perf_counter() - started
+
+        if app_settings.RERANK_MODEL:
+            started = time.perf_counter()
+            try:
+                self.reranker = await asyncio.to_thread(
+                    CrossEncoderModel, app_settings.RERANK_MODEL, app_settings.RERANK_MODEL_LIB
+                )
+                self.startup["rerank_load_seconds"] = time.perf_counter() - started
+
+            # сервис работает без кросс-энкодера: Rerank отвечает FAILED_PRECONDITION, клиенты сохраняют порядок поиска
+            except Exception as ex:
+                app_logger.error(f"Ошибка загрузки модели переранжирования {app_settings.RERANK_MODEL}: {ex}")
+                self.reranker = None
+
+        started = time.perf_counter()
+        await self.warmup()
+        self.startup["warmup_seconds"] = time.perf_counter() - started
+        app_logger.info(f"Model warmed up in {self.startup['warmup_seconds']:.2f}s")
+
+    async def warmup(self) -> None:
+        """
+        Прогрев модели: первые вызовы инициализируют сессию ONNX Runtime / PyTorch и выделяют буферы,
+        поэтому выполняются до перевода сервиса в состояние готовности, а не на первом запросе клиента
+        """
+
+        batch_size = app_settings.WARMUP_BATCH_SIZE
+        if batch_size <= 0:
+            return
+
+        texts = make_warmup_texts(batch_size)
+
+        # одиночный текст и полный пакет, по одному вызову на каждого исполнителя
+        # (в пуле процессов модель загружается в каждом процессе при первом обращении)
+        for batch in (texts[:1], texts):
+            await asyncio.gather(*(
+                self._embed_batch_async(self.pool.default_model, batch) for _ in range(self.pool.workers)
+            ))
+
+        if self.reranker:
+            await self._rerank_async(texts[0], texts[:app_settings.RERANK_BATCH_SIZE])
+
+    def _get_pool(self) -> InferencePool:
+        if not self.ready:
+            raise ServiceNotReadyError("Сервис не готов: модель загружается")
+
+        return self.pool
+
+    async def _embed_batch_async(self, model_name: str, texts: list[str]):
+        """
+        Пакетная векторизация в пуле исполнителей (вне цикла событий)
+        """
+
+        return await self.pool.run(model_name, "embed_batch_array", texts)
+
+    async def _embed_text_cached(self, text: str, model_name: str | None = None) -> np.ndarray:
+        """
+        Векторизация текста с использованием кэша
+        """
+
+        model_name = self._get_pool().resolve(model_name)
+
+        embedding = self.cache.get(model_name, text)
+        if embedding is None:
+            embedding = await self.batcher.submit(text, key=model_name)
+            self.cache.put(model_name, text, embedding)
+
+        return embedding
+
+    async def _embed_batch_cached(self, texts: list[str], model_name: str | None = None) -> list[np.ndarray]:
+        """
+        Пакетная векторизация с использованием кэша и постоянного хранилища: в модель передаются только тексты,
+        векторов которых нет ни в кэше, ни в хранилище
+        """
+
+        model_name = self._get_pool().resolve(model_name)
+
+        embeddings: list[np.ndarray | None] = [self.cache.get(model_name, text) for text in texts]
+        missed = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        if missed and self.store.enabled:
+            stored = await asyncio.to_thread(self.store.get_many, model_name, [texts[i] for i in missed])
+            for i, embedding in zip(missed, stored):
+                if embedding is not None:
+                    embeddings[i] = embedding
+                    self.cache.put(model_name, texts[i], embedding)
+            missed = [i for i in missed if embeddings[i] is None]
+
+        if missed:
+            missed_texts = [texts[i] for i in missed]
+            missed_embeddings = await self._embed_batch_async(model_name, missed_texts)
+            for i, embedding in zip(missed, missed_embeddings):
+                embeddings[i] = embedding
+                self.cache.put(model_name, texts[i], embedding)
+
+            if self.store.enabled:
+                try:
+                    await asyncio.to_thread(self.store.put_many, model_name, missed_texts, missed_embeddings)
+                except (OSError, ValueError) as ex:
+                    # векторы уже получены, ошибка записи не влияет на ответ
+                    app_logger.error(f"Ошибка записи в хранилище векторов: {ex}")
+
+        return embeddings
+
+    async def _embed_chunked(
+            self,
+            texts: list[str],
+            model_name: str | None = None,
+            return_windows: bool = False,
+    ) -> tuple[np.ndarray, list[np.ndarray] | None]:
+        """
+        Векторизация длинных текстов по перекрывающимся окнам (без кэша и сборки в пакеты)
+        """
+
+        model_name = self._get_pool().resolve(model_name)
+        return await self.pool.run(model_name, "embed_chunked", texts, return_windows)
+
+    @staticmethod
+    def _priority(requested: int, texts_count: int) -> int:
+        """
+        Приоритет запроса: заданный клиентом или по количеству текстов
+        """
+
+        if requested == vectorizer_pb2.PRIORITY_INTERACTIVE:  # noqa
+            return Priority.interactive
+
+        if requested == vectorizer_pb2.PRIORITY_BULK:  # noqa
+            return Priority.bulk
+
+        if texts_count <= app_settings.ADMISSION_INTERACTIVE_MAX_TEXTS:
+            return Priority.interactive
+
+        return Priority.bulk
+
+    @staticmethod
+    def _reject(context, ex: AdmissionRejected) -> None:
+        """
+        Отказ в допуске: RESOURCE_EXHAUSTED и рекомендуемая задержка повтора в завершающих метаданных
+        """
+
+        context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+        context.set_details(str(ex))
+        context.set_trailing_metadata(((RETRY_PUSHBACK_KEY, str(ex.retry_after_ms)),))
+
+    async def _rerank_async(self, query: str, candidates: list[str], deadline: float | None = None) -> np.ndarray:
+        """
+        Оценка кандидатов кросс-энкодером вне цикла событий. Задание, дождавшееся исполнителя после
+        срока deadline (time.monotonic), не выполняется: отменённый клиентом вызов не занимает исполнитель
+        """
+
+        if self.reranker is None:
+            raise RerankerNotConfiguredError("Модель переранжирования не задана")
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._rerank_executor, self.reranker.score, query, candidates, deadline)
+
+    @asynccontextmanager
+    async def _index_writing(self, name: str) -> AsyncIterator[None]:
+        """
+        Запись в индекс: во время переноса индекса на другую модель приостанавливается на время переключения
+        (переноса в этом процессе - ожиданием переноса, в другом процессе сервиса - файловой блокировкой записи)
+        """
+
+        migration = next(
+            (
+                migration for migration in self.migrations.values()
+                if migration.running and name in (migration.alias, migration.source)
+            ),
+            None,
+        )
+
+        async with migration.writing() if migration else nullcontext(), index_write_lock(self.indexes, name):
+            yield
+
+    async def _embed_migration(self, texts: list[str], model_name: str) -> list[np.ndarray]:
+        """
+        Векторизация текстов переноса индекса: пакетный приоритет с ожиданием очереди
+        """
+
+        async with self.admission.admit(Priority.bulk, len(texts), wait=True):
+            return await self._embed_batch_cached(texts, model_name)
+
+    @staticmethod
+    def _migration_status(migration: IndexMigration | None) -> vectorizer_pb2.MigrationStatus:  # noqa
+        if migration is None:
+            return vectorizer_pb2.MigrationStatus()  # noqa
+
+        return vectorizer_pb2.MigrationStatus(**migration.status())  # noqa
+
+    async def close(self) -> None:
+        for task in self._migration_tasks:
+            task.cancel()
+        await self.batcher.close()
+        if self.pool:
+            self.pool.close()
+        self._rerank_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def EmbedText(
+            self,
+            request: vectorizer_pb2.EmbedTextRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.EmbedTextResponse:  # noqa
         """
         Реализация RPC метода EmbedText (векторизация текста)
         """
 
         try:
-            # преобразование текста в вектор
-            embedding = self.embedding_model.embed(request.text)
+            windows = None
+            async with self.admission.admit(Priority.interactive):
+                if request.chunking:
+                    # длинный текст: объединённый вектор перекрывающихся окон
+                    pooled, windows = await self._embed_chunked(
+                        [request.text], request.model, request.return_windows
+                    )
+                    embedding = pooled[0]
+                else:
+                    # преобразование текста в вектор (в составе пакета конкурентных запросов)
+                    embedding = await self._embed_text_cached(request.text, request.model)
 
             # создание объекта ответа клиенту
-            response = vectorizer_pb2.EmbedTextResponse(embedding=embedding)  # noqa
+            if request.format == vectorizer_pb2.FORMAT_FLOAT_LIST:  # noqa
+                response = vectorizer_pb2.EmbedTextResponse(embedding=embedding.tolist())  # noqa
+            else:
+                response = vectorizer_pb2.EmbedTextResponse(packed=pack_embeddings([embedding], request.format))  # noqa
+
+            if windows:
+                windows_format = request.format or vectorizer_pb2.FORMAT_FLOAT32  # noqa
+                response.windows.CopyFrom(pack_embeddings(windows[0], windows_format))
 
             return response
 
+        except AdmissionRejected as ex:
+            self._reject(context, ex)
+            return vectorizer_pb2.EmbedTextResponse(embedding=[])  # noqa
+
+        except UnknownModelError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.EmbedTextResponse(embedding=[])  # noqa
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+            return vectorizer_pb2.EmbedTextResponse(embedding=[])  # noqa
+
         except Exception as ex:
             app_logger.error(f"Ошибка генерации вектора: {ex}")
             context.set_code(grpc.StatusCode.INTERNAL)  # установка кода ошибки gRPC на INTERNAL
             context.set_details(str(ex))
             return vectorizer_pb2.EmbedTextResponse(embedding=[])  # noqa
 
-    def EmbedTextBatch(
+    async def EmbedTextBatch(
             self,
             request: vectorizer_pb2.EmbedTextBatchRequest,  # noqa
             context
@@ -42,13 +391,25 @@ class VectorizerService(vectorizer_pb2_grpc.VectorizerServiceServicer):
         """
 
         try:
+            texts = list(request.texts)
+            priority = self._priority(request.priority, len(texts))
+
             # преобразование массива текстов в массив векторов
-            embeddings = self.embedding_model.embed_batch(request.texts)
+            async with self.admission.admit(priority, len(texts)):
+                if request.chunking:
+                    pooled, _ = await self._embed_chunked(texts, request.model)
+                    embeddings = list(pooled)
+                else:
+                    embeddings = await self._embed_batch_cached(texts, request.model)
+
+            # упакованный формат ответа
+            if request.format != vectorizer_pb2.FORMAT_FLOAT_LIST:  # noqa
+                return vectorizer_pb2.EmbedTextBatchResponse(packed=pack_embeddings(embeddings, request.format))  # noqa
 
             # создание объектов EmbeddingResult для каждого эмбеддинга
             embedding_results = []
             for embedding_vector in embeddings:
-                embedding_result = vectorizer_pb2.EmbeddingResult(embedding=embedding_vector)  # noqa
+                embedding_result = vectorizer_pb2.EmbeddingResult(embedding=embedding_vector.tolist())  # noqa
                 embedding_results.append(embedding_result)
 
             # создание объекта ответа клиенту
@@ -56,20 +417,527 @@ class VectorizerService(vectorizer_pb2_grpc.VectorizerServiceServicer):
 
             return response
 
+        except AdmissionRejected as ex:
+            self._reject(context, ex)
+            return vectorizer_pb2.EmbedTextBatchResponse(embeddings=[])  # noqa
+
+        except UnknownModelError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.EmbedTextBatchResponse(embeddings=[])  # noqa
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+            return vectorizer_pb2.EmbedTextBatchResponse(embeddings=[])  # noqa
+
         except Exception as ex:
             app_logger.error(f"Ошибка генерации векторов: {ex}")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(ex))
             return vectorizer_pb2.EmbedTextBatchResponse(embeddings=[])  # noqa
 
+    async def EmbedTextStream(self, request_iterator, context):  # noqa
+        """
+        Реализация RPC метода EmbedTextStream (потоковая векторизация текста).
+
+        Входящие тексты читаются отдельной задачей в ограниченную очередь пакетов: когда очередь заполнена,
+        чтение приостанавливается и управление потоком HTTP/2 притормаживает клиента,
+        поэтому память сервиса не растёт с размером корпуса.
+        """
+
+        batch_size = max(1, app_settings.EMBED_STREAM_BATCH_SIZE)
+        batches: asyncio.Queue[tuple[list[str], list[str]] | None] = asyncio.Queue(
+            maxsize=max(1, app_settings.EMBED_STREAM_MAX_PENDING)
+        )
+        embedding_format = None
+        model_name = None
+
+        async def read_requests():
+            nonlocal embedding_format, model_name
+
+            ids, texts = [], []
+            try:
+                async for request in request_iterator:
+                    if embedding_format is None:
+                        embedding_format = request.format or vectorizer_pb2.FORMAT_FLOAT32  # noqa
+                        model_name = request.model
+
+                    ids.append(request.id)
+                    texts.append(request.text)
+
+                    if len(texts) >= batch_size:
+                        await batches.put((ids, texts))
+                        ids, texts = [], []
+
+                if texts:
+                    await batches.put((ids, texts))
+
+            except asyncio.CancelledError:
+                # чтение отменено завершившимся обработчиком: очередь больше никто не читает,
+                # и признак окончания потока в заполненную очередь заблокировал бы задачу навсегда
+                raise
+
+            except Exception:
+                # признак окончания потока, ошибка пробрасывается ожиданием задачи чтения
+                await batches.put(None)
+                raise
+
+            # признак окончания потока
+            await batches.put(None)
+
+        reader = asyncio.create_task(read_requests())
+
+        try:
+            while (batch := await batches.get()) is not None:
+                ids, texts = batch
+
+                # поток не отклоняется, а ждёт очереди: чтение запросов при этом приостанавливается
+                async with self.admission.admit(Priority.bulk, len(texts), wait=True):
+                    embeddings = await self._embed_batch_cached(texts, model_name)
+
+                yield vectorizer_pb2.EmbedTextStreamResponse(  # noqa
+                    ids=ids,
+                    packed=pack_embeddings(embeddings, embedding_format),
+                )
+
+            # проброс ошибки чтения потока
+            await reader
+
+        except UnknownModelError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка потоковой генерации векторов: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+
+        finally:
+            reader.cancel()
+            # ожидание отменённой задачи чтения (её ошибка уже обработана или не важна)
+            await asyncio.gather(reader, return_exceptions=True)
+
+    async def Upsert(
+            self,
+            request: vectorizer_pb2.UpsertRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.UpsertResponse:  # noqa
+        """
+        Реализация RPC метода Upsert (добавление или замена векторов в индексе)
+        """
+
+        try:
+            # во время переноса индекса запись выполняется в прежней версии, кроме момента переключения
+            async with self._index_writing(request.index):
+                index = self.indexes.get(request.index, create=True)
+
+                # тексты без явно заданного вектора векторизуются моделью индекса
+                texts = [item.text for item in request.items if not item.vector]
+                model_name = ""
+                text_embeddings = iter([])
+                if texts:
+                    model_name = self._get_pool().resolve(request.model or index.model or None)
+                    # без явного приоритета запись в индекс считается пакетной
+                    priority = self._priority(request.priority or vectorizer_pb2.PRIORITY_BULK, len(texts))  # noqa
+                    async with self.admission.admit(priority, len(texts)):
+                        text_embeddings = iter(await self._embed_batch_cached(texts, model_name))
+
+                vectors = [item.vector if item.vector else next(text_embeddings) for item in request.items]
+
+                upserted = await asyncio.to_thread(
+                    index.upsert,
+                    [item.id for item in request.items],
+                    vectors,
+                    [dict(item.metadata) for item in request.items],
+                    model_name,
+                )
+
+                return vectorizer_pb2.UpsertResponse(upserted=upserted, size=len(index))  # noqa
+
+        except AdmissionRejected as ex:
+            self._reject(context, ex)
+            return vectorizer_pb2.UpsertResponse()  # noqa
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+            return vectorizer_pb2.UpsertResponse()  # noqa
+
+        except ValueError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.UpsertResponse()  # noqa
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка записи в индекс: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+            return vectorizer_pb2.UpsertResponse()  # noqa
+
+    async def Delete(
+            self,
+            request: vectorizer_pb2.DeleteRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.DeleteResponse:  # noqa
+        """
+        Реализация RPC метода Delete (удаление векторов из индекса)
+        """
+
+        try:
+            async with self._index_writing(request.index):
+                index = self.indexes.get(request.index)
+                deleted = await asyncio.to_thread(index.delete, list(request.ids), dict(request.filter))
+
+            return vectorizer_pb2.DeleteResponse(deleted=deleted, size=len(index))  # noqa
+
+        except IndexNotFoundError as ex:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(ex))
+            return vectorizer_pb2.DeleteResponse()  # noqa
+
+        except ValueError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.DeleteResponse()  # noqa
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка удаления из индекса: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+            return vectorizer_pb2.DeleteResponse()  # noqa
 
-async def serve():
-    server = grpc.aio.server()
-    vectorizer_pb2_grpc.add_VectorizerServiceServicer_to_server(VectorizerService(), server)
+    async def List(
+            self,
+            request: vectorizer_pb2.ListRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.ListResponse:  # noqa
+        """
+        Реализация RPC метода List (идентификаторы и метаданные векторов индекса)
+        """
+
+        try:
+            index = self.indexes.get(request.index)
+            items = await asyncio.to_thread(
+                index.items, request.offset, request.limit or None, list(request.fields) or None
+            )
+
+            return vectorizer_pb2.ListResponse(  # noqa
+                items=[vectorizer_pb2.IndexItem(id=doc_id, metadata=metadata) for doc_id, metadata in items],  # noqa
+                size=len(index),
+            )
+
+        except IndexNotFoundError as ex:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(ex))
+            return vectorizer_pb2.ListResponse()  # noqa
+
+        except ValueError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.ListResponse()  # noqa
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка чтения индекса: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+            return vectorizer_pb2.ListResponse()  # noqa
+
+    async def Search(
+            self,
+            request: vectorizer_pb2.SearchRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.SearchResponse:  # noqa
+        """
+        Реализация RPC метода Search (поиск ближайших векторов в индексе)
+        """
+
+        try:
+            index = self.indexes.get(request.index)
+
+            async with self.admission.admit(Priority.interactive):
+                if request.vector:
+                    query_vector = np.asarray(request.vector, dtype=np.float32)
+                else:
+                    query_vector = await self._embed_text_cached(request.text, index.model or None)
+
+                hits = await asyncio.to_thread(
+                    index.search,
+                    query_vector,
+                    request.top_k or 5,
+                    dict(request.filter),
+                    request.nprobe,
+                )
+
+            return vectorizer_pb2.SearchResponse(hits=[  # noqa
+                vectorizer_pb2.SearchHit(id=doc_id, score=score, metadata=metadata)  # noqa
+                for doc_id, score, metadata in hits
+            ])
+
+        except AdmissionRejected as ex:
+            self._reject(context, ex)
+            return vectorizer_pb2.SearchResponse()  # noqa
+
+        except IndexNotFoundError as ex:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(ex))
+            return vectorizer_pb2.SearchResponse()  # noqa
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+            return vectorizer_pb2.SearchResponse()  # noqa
+
+        except ValueError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.SearchResponse()  # noqa
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка поиска в индексе: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+            return vectorizer_pb2.SearchResponse()  # noqa
+
+    async def Rerank(
+            self,
+            request: vectorizer_pb2.RerankRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.RerankResponse:  # noqa
+        """
+        Реализация RPC метода Rerank (переранжирование кандидатов кросс-энкодером)
+        """
+
+        try:
+            candidates = list(request.candidates)
+            if len(candidates) > app_settings.RERANK_MAX_CANDIDATES:
+                raise ValueError(
+                    f"Количество кандидатов {len(candidates)} больше допустимого ({app_settings.RERANK_MAX_CANDIDATES})"
+                )
+
+            if not self.ready:
+                raise ServiceNotReadyError("Сервис не готов: модель загружается")
+
+            # срок вызова клиента (None - без срока)
+            time_remaining = context.time_remaining()
+            deadline = time.monotonic() + time_remaining if time_remaining is not None else None
+
+            async with self.admission.admit(Priority.interactive, len(candidates)):
+                scores = await self._rerank_async(request.query, candidates, deadline)
+
+            order = np.argsort(-scores, kind="stable")
+            if request.top_k:
+                order = order[:request.top_k]
+
+            return vectorizer_pb2.RerankResponse(hits=[  # noqa
+                vectorizer_pb2.RerankHit(index=int(i), score=float(scores[i]))  # noqa
+                for i in order
+            ])
+
+        except AdmissionRejected as ex:
+            self._reject(context, ex)
+            return vectorizer_pb2.RerankResponse()  # noqa
+
+        except RerankerNotConfiguredError as ex:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details(str(ex))
+            return vectorizer_pb2.RerankResponse()  # noqa
+
+        except RerankDeadlineExceeded as ex:
+            context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+            context.set_details(str(ex))
+            return vectorizer_pb2.RerankResponse()  # noqa
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+            return vectorizer_pb2.RerankResponse()  # noqa
+
+        except ValueError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return vectorizer_pb2.RerankResponse()  # noqa
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка переранжирования: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+            return vectorizer_pb2.RerankResponse()  # noqa
+
+    async def StartMigration(
+            self,
+            request: vectorizer_pb2.StartMigrationRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.MigrationStatus:  # noqa
+        """
+        Реализация RPC метода StartMigration (перенос индекса на другую модель в фоне)
+        """
+
+        try:
+            current = self.migrations.get(request.index)
+            if current and current.running:
+                context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+                context.set_details(f"Перенос индекса {request.index} уже выполняется")
+                return self._migration_status(current)
+
+            self.indexes.get(request.index)
+            migration = IndexMigration(
+                indexes=self.indexes,
+                alias=request.index,
+                model=self._get_pool().resolve(request.model or None),
+                embed=self._embed_migration,
+                text_field=request.text_field or app_settings.MIGRATION_TEXT_FIELD,
+                batch_size=app_settings.MIGRATION_BATCH_SIZE,
+                max_passes=app_settings.MIGRATION_MAX_PASSES,
+                drop_source=request.drop_source,
+            )
+
+            self.migrations[request.index] = migration
+            task = asyncio.create_task(migration.run())
+            self._migration_tasks.add(task)
+            task.add_done_callback(self._migration_tasks.discard)
+
+            return self._migration_status(migration)
+
+        except IndexNotFoundError as ex:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(str(ex))
+            return self._migration_status(None)
+
+        except UnknownModelError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return self._migration_status(None)
+
+        except ServiceNotReadyError as ex:
+            context.set_code(grpc.StatusCode.UNAVAILABLE)
+            context.set_details(str(ex))
+            return self._migration_status(None)
+
+        except ValueError as ex:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(ex))
+            return self._migration_status(None)
+
+        except Exception as ex:
+            app_logger.error(f"Ошибка запуска переноса индекса: {ex}")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(ex))
+            return self._migration_status(None)
+
+    async def GetMigration(
+            self,
+            request: vectorizer_pb2.GetMigrationRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.MigrationStatus:  # noqa
+        """
+        Реализация RPC метода GetMigration (состояние и скорость переноса индекса)
+        """
+
+        migration = self.migrations.get(request.index)
+        if migration is None:
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Перенос индекса {request.index} не выполнялся")
+
+        return self._migration_status(migration)
+
+    async def GetStats(
+            self,
+            request: vectorizer_pb2.GetStatsRequest,  # noqa
+            context
+    ) -> vectorizer_pb2.GetStatsResponse:  # noqa
+        """
+        Реализация RPC метода GetStats (счётчики сервиса)
+        """
+
+        stats = {
+            **self.cache.stats(),
+            **self.store.stats(),
+            **(self.pool.stats() if self.pool else {}),
+            **self.indexes.stats(),
+            "migrations_running": float(sum(migration.running for migration in self.migrations.values())),
+            **self.admission.stats(),
+            **(self.reranker.stats() if self.reranker else {}),
+            **{f"startup_{name}": value for name, value in self.startup.items()},
+            "ready": float(self.ready),
+        }
+
+        return vectorizer_pb2.GetStatsResponse(stats=stats)  # noqa
+
+
+def server_uds_path() -> str | None:
+    """
+    Путь Unix-сокета сервера. SO_REUSEPORT на Unix-сокеты не распространяется, поэтому при нескольких
+    процессах сервера каждый слушает собственный сокет с номером процесса: <GRPC_UDS_PATH>.<номер>
+    """
+
+    path = app_settings.GRPC_UDS_PATH
+    if path and app_settings.SERVER_PROCESSES > 1:
+        # имя процесса задаётся в ServerProcesses: vectorizer-<номер>
+        path = f"{path}.{multiprocessing.current_process().name.rsplit('-', 1)[-1]}"
+
+    return path
+
+
+async def serve(import_seconds: float = 0.0, embedding_model: EmbeddingModel | None = None):
+    started = time.perf_counter()
+
+    server = grpc.aio.server(options=[
+        # несколько процессов сервера слушают один порт, соединения распределяет ядро
+        ("grpc.so_reuseport", int(app_settings.SERVER_PROCESSES > 1)),
+        # keepalive-пинги долгоживущих клиентских соединений, в том числе без активных вызовов
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.min_ping_interval_without_data_ms", int(app_settings.GRPC_MIN_PING_INTERVAL_SECONDS * 1000)),
+        ("grpc.http2.max_ping_strikes", 0),
+    ])
+    service = VectorizerService(embedding_model=embedding_model)
+    service.startup["import_seconds"] = import_seconds
+    vectorizer_pb2_grpc.add_VectorizerServiceServicer_to_server(service, server)
+
+    # стандартная проверка готовности: NOT_SERVING до завершения загрузки модели и прогрева
+    health_servicer = health.aio.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
+    for name in ("", SERVICE_NAME):
+        await health_servicer.set(name, health_pb2.HealthCheckResponse.NOT_SERVING)  # noqa
 
     listen_addr = f"{app_settings.GRPC_HOST}:{app_settings.GRPC_PORT}"
     server.add_insecure_port(listen_addr)
     app_logger.info(f"Starting gRPC service on {listen_addr}")
 
+    # Unix-сокет для клиентов на том же хосте (без стека TCP)
+    uds_path = server_uds_path()
+    if uds_path:
+        os.makedirs(os.path.dirname(uds_path) or ".", exist_ok=True)
+        if os.path.exists(uds_path):
+            os.unlink(uds_path)  # сокет, оставшийся после аварийного завершения процесса
+        server.add_insecure_port(f"unix:{uds_path}")
+        app_logger.info(f"Starting gRPC service on unix:{uds_path}")
+
+    # сервер принимает соединения (и проверки готовности) сразу, модель загружается после запуска
     await server.start()
-    await server.wait_for_termination()
+    try:
+        await service.start()
+
+        for name in ("", SERVICE_NAME):
+            await health_servicer.set(name, health_pb2.HealthCheckResponse.SERVING)  # noqa
+
+        service.startup["total_seconds"] = import_seconds + time.perf_counter() - started
+        app_logger.info(
+            "gRPC service ready: "
+            + ", ".join(f"{name} {value:.2f}s" for name, value in service.startup.items())
+        )
+
+        await server.wait_for_termination()
+
+    finally:
+        # перевод в NOT_SERVING, чтобы клиенты перестали направлять запросы, и завершение текущих
+        await health_servicer.enter_graceful_shutdown()
+        await server.stop(app_settings.GRPC_SHUTDOWN_GRACE_SECONDS)
+        await service.close()
+
+        if uds_path and os.path.exists(uds_path):
+            os.unlink(uds_path)
@@ -0,0 +1,103 @@
+""" Поиск наиболее похожих векторов на основе NumPy """
+
+import numpy as np
+
+from typing import List, Sequence
+
+SIMILARITY_COSINE = "cosine"
+SIMILARITY_EUCLIDEAN = "euclidean"
+
+
+class SimilarityEngine:
+    """
+    Матрица векторов-кандидатов для быстрого поиска top-k ближайших к вектору запроса.
+
+    Кандидаты хранятся одной непрерывной матрицей float32, нормализуются один раз при создании,
+    оценка всех кандидатов выполняется одним матричным умножением, а отбор top-k - через argpartition.
+    """
+
+    def __init__(self, candidates: Sequence[Sequence[float]] | np.ndarray) -> None:
+        matrix = np.ascontiguousarray(candidates, dtype=np.float32)
+
+        if matrix.ndim == 1:
+            # пустой список кандидатов или единственный вектор
+            matrix = matrix.reshape((0, 0)) if matrix.size == 0 else matrix.reshape(1, -1)
+
+        if matrix.ndim != 2:
+            raise ValueError("Кандидаты должны быть двумерной матрицей")
+
+        self.matrix = matrix
+
+        # квадраты норм для евклидова расстояния и нормы для косинусного сходства
+        self.sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        norms = np.sqrt(self.sq_norms)
+
+        # нулевые векторы оставляем нулевыми (сходство с ними равно 0)
+        safe_norms = np.where(norms == 0, 1.0, norms).astype(np.float32)
+        self.normalized = matrix / safe_norms[:, None]
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def scores(
+            self,
+            query_vector: Sequence[float] | np.ndarray,
+            similarity_func: str = SIMILARITY_COSINE
+    ) -> np.ndarray:
+        """
+        Оценка сходства вектора запроса со всеми кандидатами
+        """
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+
+        if not len(self):
+            return np.empty(0, dtype=np.float32)
+
+        if query.shape[0] != self.dim:
+            raise ValueError("Векторы должны быть одинаковой длины")
+
+        if similarity_func == SIMILARITY_COSINE:
+            query_norm = float(np.linalg.norm(query))
+            if query_norm == 0:
+                return np.zeros(len(self), dtype=np.float32)
+            return self.normalized @ (query / query_norm)
+
+        elif similarity_func == SIMILARITY_EUCLIDEAN:
+            # ||q - c||^2 = ||q||^2 + ||c||^2 - 2 * q·c,
+            # возврат отрицательного расстояния, чтобы "больше" означало "ближе"
+            sq_distances = float(query @ query) + self.sq_norms - 2.0 * (self.matrix @ query)
+            return -np.sqrt(np.maximum(sq_distances, 0.0))
+
+        raise ValueError(f"Неизвестная функция сходства: {similarity_func}")
+
+    def top_k(
+            self,
+            query_vector: Sequence[float] | np.ndarray,
+            top_k: int = 5,
+            similarity_func: str = SIMILARITY_COSINE
+    ) -> List[tuple]:
+        """
+        Поиск top-k наиболее похожих кандидатов
+
+        :return: Список кортежей (индекс_кандидата, значение_сходства), отсортированный по убыванию сходства.
+        """
+
+        scores = self.scores(query_vector, similarity_func)
+        count = scores.shape[0]
+
+        if top_k <= 0 or count == 0:
+            return []
+
+        if top_k < count:
+            # частичная сортировка: top-k элементов за O(n), затем сортировка только их
+            indices = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            indices = np.arange(count)
+
+        indices = indices[np.argsort(-scores[indices], kind="stable")]
+
+        return [(int(idx), float(scores[idx])) for idx in indices]
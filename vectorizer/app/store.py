@@ -0,0 +1,260 @@
+""" Постоянное хранилище векторов текстов с адресацией по содержимому """
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from typing import Callable
+
+from app.cache import EmbeddingCache
+from app.logs import app_logger
+
+STORE_META_FILE = "store.json"
+STORE_LOCK_FILE = "store.lock"
+STORE_KEYS_FILE = "keys.bin"
+STORE_VECTORS_FILE = "vectors.bin"
+KEY_SIZE = 32  # sha256
+
+
+def text_key(text: str) -> bytes:
+    """
+    Ключ записи: sha256 нормализованного текста
+    """
+
+    return hashlib.sha256(EmbeddingCache.normalize(text).encode("utf-8")).digest()
+
+
+class ModelEmbeddings:
+    """
+    Векторы текстов одной модели.
+
+    Хранятся в двух файлах, которые только дописываются: ключи (sha256 текста по 32 байта) и матрица
+    векторов float32 (строка i - вектор ключа i). Матрица отображается в память, индекс ключ -> строка
+    строится в памяти при открытии. Вектор дописывается раньше ключа, поэтому после аварийного завершения
+    лишний хвост файла векторов отбрасывается. Дописывание выполняется под файловой блокировкой, и перед
+    чтением подхватываются записи, добавленные другими процессами сервиса.
+    """
+
+    def __init__(self, path: str, model_name: str) -> None:
+        self.path = path
+        self.model_name = model_name
+        self.lock = threading.Lock()
+
+        self.dim = 0
+        self.rows: dict[bytes, int] = {}
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self._keys_size = 0  # прочитанный размер файла ключей
+
+        os.makedirs(path, exist_ok=True)
+        self._read_meta()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._keys_size + len(self.rows) * self.dim * 4
+
+    def _read_meta(self) -> None:
+        if os.path.exists(self._file(STORE_META_FILE)):
+            with open(self._file(STORE_META_FILE), encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+
+    def _write_meta(self, dim: int) -> None:
+        tmp_path = self._file(f"{STORE_META_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "dim": dim}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._file(STORE_META_FILE))
+        self.dim = dim
+
+    def _count(self) -> int:
+        """
+        Количество полных записей: ключ записан только после вектора
+        """
+
+        try:
+            keys_size = os.path.getsize(self._file(STORE_KEYS_FILE))
+            vectors_size = os.path.getsize(self._file(STORE_VECTORS_FILE))
+        except FileNotFoundError:
+            return 0
+
+        if not self.dim:
+            return 0
+
+        return min(keys_size // KEY_SIZE, vectors_size // (self.dim * 4))
+
+    def refresh(self) -> None:
+        """
+        Чтение записей, добавленных после последнего чтения (в том числе другими процессами)
+        """
+
+        if not self.dim:
+            self._read_meta()
+
+        count = self._count()
+        known = self._keys_size // KEY_SIZE
+        if count <= known:
+            return
+
+        with open(self._file(STORE_KEYS_FILE), "rb") as f:
+            f.seek(known * KEY_SIZE)
+            data = f.read((count - known) * KEY_SIZE)
+
+        for row in range(known, count):
+            offset = (row - known) * KEY_SIZE
+            self.rows.setdefault(data[offset:offset + KEY_SIZE], row)
+
+        self._keys_size = count * KEY_SIZE
+        self.vectors = np.memmap(self._file(STORE_VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, self.dim))
+
+    def _truncate(self) -> None:
+        """
+        Отбрасывание неполной записи, оставшейся после аварийного завершения
+        """
+
+        count = self._count()
+        for name, row_size in ((STORE_KEYS_FILE, KEY_SIZE), (STORE_VECTORS_FILE, self.dim * 4)):
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > count * row_size:
+                app_logger.warning(f"Хранилище векторов {self.model_name}: отброшена неполная запись {name}")
+                os.truncate(path, count * row_size)
+
+    def get_many(self, keys: list[bytes]) -> list[np.ndarray | None]:
+        """
+        Векторы по ключам (None - вектора нет)
+        """
+
+        with self.lock:
+            self.refresh()
+            rows = [self.rows.get(key) for key in keys]
+            found = [row for row in rows if row is not None]
+            if not found:
+                return [None] * len(keys)
+
+            # копия строк: ответ не удерживает отображение файла
+            found_vectors = iter(np.array(self.vectors[found]))
+
+        return [next(found_vectors) if row is not None else None for row in rows]
+
+    def put_many(self, keys: list[bytes], vectors: np.ndarray) -> int:
+        """
+        Дописывание отсутствующих векторов, возвращает количество добавленных записей
+        """
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        with self.lock, open(self._file(STORE_LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if not self.dim:
+                    self._read_meta()
+                if not self.dim:
+                    self._write_meta(vectors.shape[1])
+
+                if vectors.shape[1] != self.dim:
+                    raise ValueError(f"Размерность вектора {vectors.shape[1]} не совпадает с хранилищем {self.dim}")
+
+                self._truncate()
+                self.refresh()
+
+                # новые ключи без повторов (в том числе внутри пакета)
+                new_rows: dict[bytes, int] = {}
+                for i, key in enumerate(keys):
+                    if key not in self.rows:
+                        new_rows.setdefault(key, i)
+                if not new_rows:
+                    return 0
+
+                indices = list(new_rows.values())
+                with open(self._file(STORE_VECTORS_FILE), "ab") as f:
+                    f.write(vectors[indices].tobytes())
+                with open(self._file(STORE_KEYS_FILE), "ab") as f:
+                    f.write(b"".join(new_rows))
+
+                self.refresh()
+                return len(indices)
+
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    """
+    Постоянное хранилище векторов по ключу (модель, sha256 текста): при переиндексации векторизуются
+    только новые и изменённые тексты. Векторы каждой модели хранятся в собственном подкаталоге root,
+    variant (по названию модели) отличает векторы одной модели с разными параметрами загрузки (например, квантизацией).
+    """
+
+    def __init__(self, root: str | None = None, variant: Callable[[str], str] | None = None) -> None:
+        self.root = root
+        self.variant = variant
+        self._models: dict[str, ModelEmbeddings] = {}
+        self._lock = threading.Lock()
+
+        # счётчики для оценки доли повторной векторизации
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def _get(self, model_name: str) -> ModelEmbeddings:
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                # название модели может содержать символы, недопустимые в имени каталога
+                variant = self.variant(model_name) if self.variant else ""
+                name = hashlib.blake2b(f"{model_name}\0{variant}".encode("utf-8"), digest_size=8).hexdigest()
+                model = self._models[model_name] = ModelEmbeddings(os.path.join(self.root, name), model_name)
+
+            return model
+
+    def get_many(self, model_name: str, texts: list[str]) -> list[np.ndarray | None]:
+        """
+        Сохранённые векторы текстов (None - текст ещё не векторизован)
+        """
+
+        if not self.enabled:
+            return [None] * len(texts)
+
+        vectors = self._get(model_name).get_many([text_key(text) for text in texts])
+        found = sum(vector is not None for vector in vectors)
+        self.hits += found
+        self.misses += len(texts) - found
+
+        return vectors
+
+    def put_many(self, model_name: str, texts: list[str], vectors: np.ndarray | list[np.ndarray]) -> None:
+        """
+        Сохранение векторов текстов
+        """
+
+        if not self.enabled or not texts:
+            return
+
+        self.writes += self._get(model_name).put_many([text_key(text) for text in texts], np.asarray(vectors))
+
+    def stats(self) -> dict[str, float]:
+        """
+        Счётчики хранилища
+        """
+
+        requests = self.hits + self.misses
+
+        return {
+            "store_items": sum(len(model) for model in self._models.values()),
+            "store_bytes": sum(model.size_bytes for model in self._models.values()),
+            "store_hits": self.hits,
+            "store_misses": self.misses,
+            "store_writes": self.writes,
+            "store_hit_ratio": self.hits / requests if requests else 0.0,
+        }
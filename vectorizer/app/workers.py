@@ -0,0 +1,139 @@
+""" Пул исполнителей инференса модели вне цикла событий gRPC """
+
+import asyncio
+import multiprocessing
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from app.logs import app_logger
+from app.models import EmbeddingModel
+from app.registry import ModelRegistry, UnknownModelError
+
+
+class PoolType:
+    """
+    Типы пула исполнителей
+    """
+
+    thread = "thread"
+    process = "process"
+
+
+# реестр моделей процесса-исполнителя (для пула процессов)
+_worker_registry: ModelRegistry | None = None
+
+
+def _init_worker(registry_params: dict) -> None:
+    """
+    Создание реестра моделей (и загрузка модели по умолчанию) в процессе-исполнителе
+    """
+
+    global _worker_registry
+    _worker_registry = ModelRegistry(**registry_params)
+
+
+def _call_worker_model(model_name: str | None, method: str, *args) -> Any:
+    """
+    Вызов метода модели в процессе-исполнителе
+    """
+
+    return _worker_registry.call(model_name, method, *args)
+
+
+class InferencePool:
+    """
+    Пул исполнителей инференса.
+
+    В режиме thread реестр моделей один на процесс, модели вызываются из пула потоков (ONNX Runtime
+    и PyTorch освобождают GIL на время вычислений). В режиме process каждый процесс-исполнитель ведёт
+    собственный реестр и загружает собственные экземпляры моделей, что позволяет задействовать все ядра,
+    в том числе на токенизации и постобработке.
+    """
+
+    def __init__(
+            self,
+            model_name: str,
+            model_lib: str,
+            pool_type: str = PoolType.thread,
+            workers: int = 1,
+            embedding_model: EmbeddingModel | None = None,
+            models: dict[str, str] | None = None,
+            memory_budget_mb: float = 0,
+    ) -> None:
+        self.pool_type = pool_type
+        self.workers = max(1, workers)
+        self.registry: ModelRegistry | None = None
+        self._executor: Executor
+
+        registry_params = {
+            "default_model": model_name,
+            "default_lib": model_lib,
+            "models": models,
+            "memory_budget_mb": memory_budget_mb,
+        }
+
+        if pool_type == PoolType.thread:
+            preloaded = {model_name: embedding_model} if embedding_model else None
+            self.registry = ModelRegistry(**registry_params, preloaded=preloaded)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+
+        elif pool_type == PoolType.process:
+            # в основном процессе модели не загружаются, список нужен только для проверки имён
+            self.available = {model_name: model_lib, **(models or {})}
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # fork после запуска gRPC небезопасен, поэтому процессы создаются через spawn
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(registry_params,),
+            )
+
+        else:
+            raise ValueError(f"Неизвестный тип пула исполнителей: {pool_type}")
+
+        self.default_model = model_name
+        app_logger.info(f"Inference pool: {self.pool_type}, workers: {self.workers}")
+
+    def resolve(self, model_name: str | None) -> str:
+        """
+        Проверка названия модели с учётом модели по умолчанию
+        """
+
+        if self.registry:
+            return self.registry.resolve(model_name)
+
+        model_name = model_name or self.default_model
+        if model_name not in self.available:
+            raise UnknownModelError(f"Модель не найдена: {model_name}")
+
+        return model_name
+
+    async def run(self, model_name: str | None, method: str, *args) -> Any:
+        """
+        Вызов метода модели векторизации в пуле исполнителей
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if self.pool_type == PoolType.thread:
+            func = partial(self.registry.call, model_name, method, *args)
+        else:
+            func = partial(_call_worker_model, model_name, method, *args)
+
+        return await loop.run_in_executor(self._executor, func)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Счётчики реестра моделей (для пула потоков)
+        """
+
+        return self.registry.stats() if self.registry else {}
+
+    def close(self) -> None:
+        """
+        Остановка пула исполнителей
+        """
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,87 @@
+""" Нагрузочный бенчмарк EmbedText: без сборки в пакеты и с динамической сборкой (micro-batching) """
+
+import argparse
+import asyncio
+import sys
+import time
+
+import grpc
+
+sys.path.append(".")
+
+from proto import vectorizer_pb2, vectorizer_pb2_grpc
+
+from app.config import app_settings
+from app.service import VectorizerService
+from benchmarks.utils import SyntheticModel, percentile
+
+
+async def run_load(address: str, clients: int, requests_per_client: int) -> tuple[float, list[float]]:
+    """
+    Нагрузка: clients конкурентных клиентов, каждый отправляет requests_per_client запросов подряд
+    """
+
+    latencies: list[float] = []
+
+    async with grpc.aio.insecure_channel(address) as channel:
+        stub = vectorizer_pb2_grpc.VectorizerServiceStub(channel)
+
+        async def client(client_id: int):
+            for i in range(requests_per_client):
+                request = vectorizer_pb2.EmbedTextRequest(text=f"вопрос {client_id} {i}")  # noqa
+                start = time.perf_counter()
+                await stub.EmbedText(request)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(c) for c in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    return clients * requests_per_client / elapsed, latencies
+
+
+async def bench(max_batch_size: int, max_wait_ms: float, args) -> None:
+    app_settings.EMBED_BATCH_MAX_SIZE = max_batch_size
+    app_settings.EMBED_BATCH_MAX_WAIT_MS = max_wait_ms
+    app_settings.RERANK_MODEL = None
+
+    model = SyntheticModel(call_overhead_ms=args.overhead_ms, per_text_ms=args.per_text_ms)
+    service = VectorizerService(embedding_model=model)
+    await service.start()
+    model.calls = 0  # вызовы прогрева не учитываются
+
+    server = grpc.aio.server()
+    vectorizer_pb2_grpc.add_VectorizerServiceServicer_to_server(service, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+
+    try:
+        rps, latencies = await run_load(f"127.0.0.1:{port}", args.clients, args.requests)
+    finally:
+        await server.stop(None)
+        await service.close()
+
+    print(
+        f"{max_batch_size:>8} {max_wait_ms:>8.1f} {rps:>10.0f} {percentile(latencies, 50):>9.1f} "
+        f"{percentile(latencies, 99):>9.1f} {model.calls:>8}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=64, help="количество конкурентных клиентов")
+    parser.add_argument("--requests", type=int, default=20, help="запросов на клиента")
+    parser.add_argument("--overhead-ms", type=float, default=8.0, help="накладные расходы на вызов модели")
+    parser.add_argument("--per-text-ms", type=float, default=0.5, help="стоимость векторизации одного текста")
+    parser.add_argument("--max-wait-ms", type=float, default=app_settings.EMBED_BATCH_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    print(f"{'пакет':>8} {'ожид,мс':>8} {'запр/с':>10} {'p50,мс':>9} {'p99,мс':>9} {'вызовов':>8}")
+
+    await bench(1, 0.0, args)
+    for max_batch_size in (8, 32, 64):
+        await bench(max_batch_size, args.max_wait_ms, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
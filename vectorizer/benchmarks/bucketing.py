@@ -0,0 +1,141 @@
+""" Бенчмарк пакетной векторизации: порядок поступления против дедупликации и корзин по длине """
+
+import argparse
+import random
+import re
+import sys
+import time
+
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(".")
+
+from app.config import app_settings
+from app.models import EmbeddingModel
+
+# статьи энциклопедии для построения реалистичного распределения чанков
+ARTICLES_PATH = Path(__file__).resolve().parents[2] / "backend" / "scripts" / "articles"
+
+QUESTIONS = [
+    "кто создал Ту-144",
+    "когда совершил первый полёт Конкорд",
+    "привет",
+    "сколько было построено Ил-2",
+    "что такое дирижабль",
+    "расскажи о проекте",
+]
+
+
+class PaddedCostModel(EmbeddingModel):
+    """
+    Синтетическая модель: стоимость вызова пропорциональна количеству текстов,
+    умноженному на длину самого длинного текста пакета (как при дополнении до общей длины)
+    """
+
+    def __init__(self, call_overhead_ms: float = 2.0, per_token_ms: float = 0.01, dim: int = 384) -> None:  # noqa
+        self.model = self
+        self.model_lib = "synthetic"
+        self.model_name = "synthetic"
+        self.call_overhead = call_overhead_ms / 1000
+        self.per_token = per_token_ms / 1000
+        self.dim = dim
+        self.tokens_processed = 0
+
+    def count_tokens(self, texts: list[str]) -> list[int]:
+        return [len(text.split()) + 2 for text in texts]
+
+    def _embed_raw(self, texts: list[str]) -> np.ndarray:
+        padded_tokens = len(texts) * max(self.count_tokens(texts))
+        self.tokens_processed += padded_tokens
+        time.sleep(self.call_overhead + self.per_token * padded_tokens)
+        return np.ones((len(texts), self.dim), dtype=np.float32)
+
+
+def build_corpus(size: int, duplicates: float, seed: int = 42) -> list[str]:
+    """
+    Смесь коротких запросов и заголовков, средних и длинных чанков статей, с долей повторов
+    """
+
+    rng = random.Random(seed)
+    words = []
+    for path in sorted(ARTICLES_PATH.glob("*.md")):
+        words.extend(re.sub(r"[#*_]", " ", path.read_text(encoding="utf-8")).split())
+
+    def chunk(length: int) -> str:
+        start = rng.randrange(len(words))
+        return " ".join(words[(start + i) % len(words)] for i in range(length))
+
+    corpus = []
+    for _ in range(size):
+        if corpus and rng.random() < duplicates:
+            corpus.append(rng.choice(corpus))
+            continue
+
+        kind = rng.random()
+        if kind < 0.3:
+            corpus.append(rng.choice(QUESTIONS) + f" {rng.randrange(1000)}")
+        elif kind < 0.45:
+            corpus.append(chunk(rng.randint(3, 12)))
+        elif kind < 0.85:
+            corpus.append(chunk(rng.randint(60, 180)))
+        else:
+            corpus.append(chunk(rng.randint(300, 500)))
+
+    return corpus
+
+
+def run(model: EmbeddingModel, corpus: list[str], batch_size: int, bucketing: bool) -> float:
+    """
+    Векторизация корпуса пакетами batch_size в порядке поступления, время в секундах
+    """
+
+    start = time.perf_counter()
+    for i in range(0, len(corpus), batch_size):
+        batch = corpus[i:i + batch_size]
+        if bucketing:
+            model.embed_batch_array(batch)
+        else:
+            model._embed_raw(batch)  # noqa
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=2048, help="количество текстов в корпусе")
+    parser.add_argument("--batch-size", type=int, default=256, help="размер пакета EmbedTextBatch")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="доля повторяющихся текстов")
+    parser.add_argument("--real", action="store_true", help="использовать модель из настроек вместо синтетической")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size, args.duplicates)
+
+    if args.real:
+        model = EmbeddingModel(model_name=app_settings.MODEL_NAME, model_lib=app_settings.MODEL_LIB)
+        model.embed_batch_array(corpus[:8])  # прогрев
+    else:
+        model = PaddedCostModel()
+
+    lengths = model.count_tokens(corpus)
+    print(
+        f"текстов: {len(corpus)}, уникальных: {len(set(corpus))}, "
+        f"токенов: мин {min(lengths)}, медиана {int(np.median(lengths))}, макс {max(lengths)}"
+    )
+
+    baseline = run(model, corpus, args.batch_size, bucketing=False)
+    baseline_tokens = getattr(model, "tokens_processed", 0)
+
+    bucketed = run(model, corpus, args.batch_size, bucketing=True)
+    bucketed_tokens = getattr(model, "tokens_processed", 0) - baseline_tokens
+
+    print(f"порядок поступления: {baseline:.2f} с, токенов с дополнением: {baseline_tokens or '-'}")
+    print(
+        f"дедупликация + корзины по {app_settings.EMBED_BUCKET_SIZE}: {bucketed:.2f} с, "
+        f"токенов с дополнением: {bucketed_tokens or '-'}"
+    )
+    print(f"ускорение: {baseline / bucketed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+""" Бенчмарк индекса приближённого поиска (IVF): полнота top-k и задержка против точного поиска NumPy """
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(".")
+
+from app.index import INDEX_DTYPE_FLOAT32, INDEX_DTYPE_INT8, VectorIndex
+from app.similarity import SimilarityEngine
+from benchmarks.utils import percentile
+
+DIM = 384  # размерность векторов paraphrase-multilingual-MiniLM-L12-v2
+
+
+def make_corpus(size: int, queries: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Синтетический корпус с кластерной структурой (как у эмбеддингов тематических текстов) и запросы рядом с ним
+    """
+
+    centers = rng.standard_normal((max(1, size // 200), DIM), dtype=np.float32)
+    labels = rng.integers(0, len(centers), size)
+    corpus = centers[labels] + 0.6 * rng.standard_normal((size, DIM), dtype=np.float32)
+
+    query_rows = rng.integers(0, size, queries)
+    query_vectors = corpus[query_rows] + 0.6 * rng.standard_normal((queries, DIM), dtype=np.float32)
+
+    return corpus, query_vectors
+
+
+def measure(search, query_vectors: np.ndarray) -> tuple[list[list[int]], list[float]]:
+    """
+    Результаты и задержки (в миллисекундах) поиска по каждому запросу
+    """
+
+    results, latencies = [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return results, latencies
+
+
+def recall(results: list[list[int]], exact: list[list[int]]) -> float:
+    return float(np.mean([len(set(r) & set(e)) / len(e) for r, e in zip(results, exact)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(
+        f"{'векторов':>9} {'индекс':>14} {'recall@k':>9} {'p50,мс':>8} {'p99,мс':>8} {'построение,с':>13}"
+    )
+
+    for size in args.sizes:
+        corpus, query_vectors = make_corpus(size, args.queries, rng)
+        ids = [str(i) for i in range(size)]
+
+        engine = SimilarityEngine(corpus)
+        exact, latencies = measure(
+            lambda q: [idx for idx, _ in engine.top_k(q, args.top_k)],
+            query_vectors,
+        )
+        print(
+            f"{size:>9} {'numpy':>14} {1.0:>9.3f} {percentile(latencies, 50):>8.2f} "
+            f"{percentile(latencies, 99):>8.2f} {'-':>13}"
+        )
+
+        for dtype in (INDEX_DTYPE_FLOAT32, INDEX_DTYPE_INT8):
+            start = time.perf_counter()
+            index = VectorIndex(dtype=dtype, train_min=1)
+            index.upsert(ids, corpus)
+            build_seconds = time.perf_counter() - start
+
+            for nprobe in args.nprobe:
+                results, latencies = measure(
+                    lambda q: [int(doc_id) for doc_id, _, _ in index.search(q, args.top_k, nprobe=nprobe)],
+                    query_vectors,
+                )
+                print(
+                    f"{size:>9} {f'ivf {dtype} /{nprobe}':>14} {recall(results, exact):>9.3f} "
+                    f"{percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f} {build_seconds:>13.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
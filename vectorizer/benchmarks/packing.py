@@ -0,0 +1,93 @@
+""" Бенчмарк формата передачи векторов: repeated float против упакованных float32/float16/int8 """
+
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(".")
+
+from proto import vectorizer_pb2
+
+from app.packing import EmbeddingFormat, pack_embeddings, unpack_embeddings
+
+DIM = 384
+BATCH_SIZES = [64, 512, 4096]
+REPEATS = 20
+
+FORMATS = {
+    "float32": EmbeddingFormat.FORMAT_FLOAT32,
+    "float16": EmbeddingFormat.FORMAT_FLOAT16,
+    "int8": EmbeddingFormat.FORMAT_INT8,
+}
+
+
+def measure(func) -> float:
+    """
+    Среднее время выполнения функции (в миллисекундах)
+    """
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def bench_float_list(matrix: np.ndarray) -> tuple[float, float, int, np.ndarray]:
+    """
+    Прежний формат: список EmbeddingResult с repeated float, на клиенте - списки Python
+    """
+
+    def encode() -> bytes:
+        results = [vectorizer_pb2.EmbeddingResult(embedding=row.tolist()) for row in matrix]  # noqa
+        return vectorizer_pb2.EmbedTextBatchResponse(embeddings=results).SerializeToString()  # noqa
+
+    payload = encode()
+
+    def decode():
+        response = vectorizer_pb2.EmbedTextBatchResponse.FromString(payload)  # noqa
+        return [list(result.embedding) for result in response.embeddings]
+
+    return measure(encode), measure(decode), len(payload), np.array(decode(), dtype=np.float32)
+
+
+def bench_packed(matrix: np.ndarray, fmt: int) -> tuple[float, float, int, np.ndarray]:
+    """
+    Упакованный формат, на клиенте - матрица NumPy
+    """
+
+    def encode() -> bytes:
+        return vectorizer_pb2.EmbedTextBatchResponse(packed=pack_embeddings(matrix, fmt)).SerializeToString()  # noqa
+
+    payload = encode()
+
+    def decode():
+        return unpack_embeddings(vectorizer_pb2.EmbedTextBatchResponse.FromString(payload).packed)  # noqa
+
+    return measure(encode), measure(decode), len(payload), decode()
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    print(f"{'пакет':>6} {'формат':>8} {'кодир,мс':>9} {'декод,мс':>9} {'размер,КБ':>10} {'мин. косинус':>13}")
+
+    for batch_size in BATCH_SIZES:
+        matrix = rng.standard_normal((batch_size, DIM), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        results = {"list": bench_float_list(matrix)}
+        for name, fmt in FORMATS.items():
+            results[name] = bench_packed(matrix, fmt)
+
+        for name, (encode_ms, decode_ms, size, decoded) in results.items():
+            decoded = np.asarray(decoded, dtype=np.float32)
+            cosine = (decoded * matrix).sum(axis=1) / np.linalg.norm(decoded, axis=1)
+            print(
+                f"{batch_size:>6} {name:>8} {encode_ms:>9.2f} {decode_ms:>9.3f} {size / 1024:>10.1f} "
+                f"{cosine.min():>13.5f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+""" Бенчмарк масштабирования: пропускная способность EmbedText в зависимости от количества процессов сервера """
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+import grpc
+
+sys.path.append(".")
+
+from proto import vectorizer_pb2, vectorizer_pb2_grpc
+
+from app.config import app_settings
+from app.processes import ServerProcesses
+from app.service import serve
+from benchmarks.utils import SyntheticModel
+
+
+async def serve_synthetic(port: int, processes: int, cpu_ms: float, overhead_ms: float) -> None:
+    """
+    Процесс сервера с синтетической моделью, занимающей процессор (без кэша, индексов, переранжирования и прогрева)
+    """
+
+    app_settings.GRPC_HOST = "127.0.0.1"
+    app_settings.GRPC_PORT = port
+    app_settings.SERVER_PROCESSES = processes
+    app_settings.EMBED_CACHE_MAX_ITEMS = 0
+    app_settings.INDEX_DIR = None
+    app_settings.WARMUP_BATCH_SIZE = 0
+    app_settings.RERANK_MODEL = None
+
+    model = SyntheticModel(call_overhead_ms=overhead_ms, per_text_ms=0, cpu_per_text_ms=cpu_ms)
+    await serve(embedding_model=model)
+
+
+def run_clients(address: str, channels: int, concurrency: int, duration: float) -> int:
+    """
+    Процесс нагрузки: channels отдельных соединений, concurrency запросов в полёте на каждом,
+    возвращает количество выполненных за duration запросов
+    """
+
+    async def main() -> int:
+        completed = 0
+        deadline = time.perf_counter() + duration
+
+        async def client(stub, client_id: int):
+            nonlocal completed
+            i = 0
+            while time.perf_counter() < deadline:
+                await stub.EmbedText(vectorizer_pb2.EmbedTextRequest(text=f"{os.getpid()} {client_id} {i}"))  # noqa
+                completed += 1
+                i += 1
+
+        # отдельный пул подканалов: каждое соединение распределяется ядром на свой процесс сервера
+        options = [("grpc.use_local_subchannel_pool", 1)]
+        channel_list = [grpc.aio.insecure_channel(address, options=options) for _ in range(channels)]
+        try:
+            await asyncio.gather(*(
+                client(vectorizer_pb2_grpc.VectorizerServiceStub(channel), c * concurrency + n)
+                for c, channel in enumerate(channel_list)
+                for n in range(concurrency)
+            ))
+        finally:
+            for channel in channel_list:
+                await channel.close()
+
+        return completed
+
+    return asyncio.run(main())
+
+
+async def wait_ready(address: str, timeout: float = 60.0) -> None:
+    async with grpc.aio.insecure_channel(address) as channel:
+        stub = vectorizer_pb2_grpc.VectorizerServiceStub(channel)
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                await stub.EmbedText(vectorizer_pb2.EmbedTextRequest(text="ready"), timeout=1)  # noqa
+                return
+            except grpc.aio.AioRpcError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+
+async def bench(processes: int, args) -> float:
+    address = f"127.0.0.1:{args.port}"
+    server = ServerProcesses(
+        serve_synthetic,
+        (args.port, processes, args.cpu_ms, args.overhead_ms),
+        processes,
+    )
+    server.start()
+
+    try:
+        await wait_ready(address)
+        # даём подняться всем процессам сервера
+        await asyncio.sleep(1)
+
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.client_processes) as pool:
+            counts = await asyncio.to_thread(
+                pool.starmap,
+                run_clients,
+                [(address, args.channels, args.concurrency, args.duration)] * args.client_processes,
+            )
+
+    finally:
+        await asyncio.to_thread(server.stop)
+
+    return sum(counts) / args.duration
+
+
+async def main():
+    cpu_count = os.cpu_count() or 1
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, nargs="+", default=sorted({1, 2, max(1, cpu_count // 2)}))
+    parser.add_argument("--client-processes", type=int, default=max(1, cpu_count // 2), help="процессов нагрузки")
+    parser.add_argument("--channels", type=int, default=8, help="соединений на процесс нагрузки")
+    parser.add_argument("--concurrency", type=int, default=8, help="запросов в полёте на соединение")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность замера (в секундах)")
+    parser.add_argument("--cpu-ms", type=float, default=0.5, help="время процессора на текст (с удержанием GIL)")
+    parser.add_argument("--overhead-ms", type=float, default=1.0, help="накладные расходы на вызов модели")
+    parser.add_argument("--port", type=int, default=50151)
+    args = parser.parse_args()
+
+    print(f"ядер: {cpu_count}, процессов нагрузки: {args.client_processes}")
+    print(f"{'процессов':>10} {'запр/с':>10} {'ускорение':>10}")
+
+    baseline = None
+    for processes in args.processes:
+        rps = await bench(processes, args)
+        baseline = baseline or rps
+        print(f"{processes:>10} {rps:>10.0f} {rps / baseline:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
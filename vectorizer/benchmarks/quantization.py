@@ -0,0 +1,113 @@
+""" Оценка int8 ONNX-модели: согласие с исходной fp32-моделью и прирост пропускной способности """
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(".")
+
+from app.config import app_settings, ModelLib, ModelQuantization
+from app.models import EmbeddingModel
+from app.similarity import SimilarityEngine
+from benchmarks.bucketing import QUESTIONS, build_corpus
+from benchmarks.utils import percentile
+
+
+def measure_throughput(model: EmbeddingModel, texts: list[str], batch_size: int, repeats: int) -> float:
+    """
+    Пропускная способность модели (текстов в секунду) при векторизации пакетами batch_size
+    """
+
+    model.embed_batch_array(texts[:batch_size])  # прогрев
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for i in range(0, len(texts), batch_size):
+            model.embed_batch_array(texts[i:i + batch_size])
+
+    return repeats * len(texts) / (time.perf_counter() - start)
+
+
+def measure_latency(model: EmbeddingModel, queries: list[str]) -> list[float]:
+    """
+    Задержка векторизации одиночного запроса (в миллисекундах)
+    """
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.embed_batch_array([query])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latencies
+
+
+def top_k_overlap(reference: np.ndarray, candidate: np.ndarray, queries_ref, queries_cand, top_k: int) -> float:
+    """
+    Средняя доля совпадающих top-k соседей запросов при поиске по векторам двух моделей
+    """
+
+    engine_ref = SimilarityEngine(reference)
+    engine_cand = SimilarityEngine(candidate)
+
+    overlaps = []
+    for query_ref, query_cand in zip(queries_ref, queries_cand):
+        ids_ref = {idx for idx, _ in engine_ref.top_k(query_ref, top_k)}
+        ids_cand = {idx for idx, _ in engine_cand.top_k(query_cand, top_k)}
+        overlaps.append(len(ids_ref & ids_cand) / top_k)
+
+    return float(np.mean(overlaps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=ModelLib.sentence_transformers.paraphrase_multilingual_MiniLM_L12_v2)
+    parser.add_argument("--corpus-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--config", default=app_settings.MODEL_QUANTIZATION_CONFIG, help="arm64, avx2, avx512...")
+    args = parser.parse_args()
+
+    app_settings.MODEL_QUANTIZATION_CONFIG = args.config
+    corpus = build_corpus(args.corpus_size, duplicates=0.0)
+    queries = [f"{question} {i}" for i, question in enumerate(QUESTIONS * 10)]
+
+    models = {
+        "fp32": EmbeddingModel(args.model, ModelLib.sentence_transformers.name, ModelQuantization.none),
+        "int8": EmbeddingModel(args.model, ModelLib.sentence_transformers.name, ModelQuantization.int8),
+    }
+
+    embeddings = {name: model.embed_batch_array(corpus) for name, model in models.items()}
+    query_embeddings = {name: model.embed_batch_array(queries) for name, model in models.items()}
+
+    # косинусное сходство векторов одного и того же текста от двух моделей
+    fp32 = embeddings["fp32"] / np.linalg.norm(embeddings["fp32"], axis=1, keepdims=True)
+    int8 = embeddings["int8"] / np.linalg.norm(embeddings["int8"], axis=1, keepdims=True)
+    agreement = np.einsum("ij,ij->i", fp32, int8)
+
+    print(f"модель: {args.model}, текстов: {len(corpus)}, набор инструкций: {args.config}")
+    print(
+        f"согласие с fp32 (косинус): среднее {agreement.mean():.4f}, "
+        f"p1 {np.percentile(agreement, 1):.4f}, минимум {agreement.min():.4f}"
+    )
+    overlap = top_k_overlap(
+        embeddings["fp32"], embeddings["int8"], query_embeddings["fp32"], query_embeddings["int8"], args.top_k
+    )
+    print(f"совпадение top-{args.top_k} соседей запросов: {overlap:.3f}")
+
+    print(f"{'модель':>8} {'текстов/с':>10} {'p50,мс':>8} {'p99,мс':>8}")
+    results = {}
+    for name, model in models.items():
+        throughput = measure_throughput(model, corpus, args.batch_size, args.repeats)
+        latencies = measure_latency(model, queries)
+        results[name] = throughput
+        print(f"{name:>8} {throughput:>10.1f} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}")
+
+    print(f"ускорение int8: {results['int8'] / results['fp32']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+""" Стоимость переранжирования кросс-энкодером: задержка запроса и время на одного кандидата """
+
+import argparse
+import sys
+import time
+
+sys.path.append(".")
+
+from app.config import app_settings
+from app.rerank import CrossEncoderModel
+from benchmarks.bucketing import QUESTIONS, build_corpus
+from benchmarks.utils import percentile
+
+
+def measure(model: CrossEncoderModel, candidates: list[str], count: int, repeats: int) -> list[float]:
+    """
+    Задержки (в миллисекундах) переранжирования count кандидатов для разных запросов
+    """
+
+    latencies = []
+    for i in range(repeats):
+        query = QUESTIONS[i % len(QUESTIONS)]
+        offset = (i * count) % max(1, len(candidates) - count)
+
+        start = time.perf_counter()
+        model.score(query, candidates[offset:offset + count])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=app_settings.RERANK_MODEL)
+    parser.add_argument("--model-lib", default=app_settings.RERANK_MODEL_LIB)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 30, 100])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    model = CrossEncoderModel(args.model, args.model_lib)
+    corpus = build_corpus(max(args.candidates) * 4, duplicates=0.0)
+    model.score(QUESTIONS[0], corpus[:max(args.batch_sizes)])  # прогрев
+
+    print(f"модель: {args.model}")
+    print(f"{'кандидатов':>10} {'пакет':>6} {'p50,мс':>8} {'p99,мс':>8} {'мс/кандидат':>12}")
+
+    for batch_size in args.batch_sizes:
+        app_settings.RERANK_BATCH_SIZE = batch_size
+
+        for count in args.candidates:
+            latencies = measure(model, corpus, count, args.repeats)
+            p50 = percentile(latencies, 50)
+            print(f"{count:>10} {batch_size:>6} {p50:>8.2f} {percentile(latencies, 99):>8.2f} {p50 / count:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+""" Бенчмарк поиска наиболее похожих векторов: чистый Python против NumPy (SimilarityEngine) """
+
+import math
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(".")
+
+from app.similarity import SimilarityEngine
+
+DIM = 384  # размерность векторов paraphrase-multilingual-MiniLM-L12-v2
+TOP_K = 5
+SIZES = [1_000, 10_000, 100_000]
+
+
+def python_top_k(query_vector: list[float], candidates: list[list[float]], top_k: int) -> list[tuple]:
+    """
+    Прежняя реализация: поштучная оценка кандидатов и полная сортировка
+    """
+
+    query_norm = math.sqrt(sum(a * a for a in query_vector))
+
+    similarities = []
+    for i, candidate_vector in enumerate(candidates):
+        dot_product = sum(a * b for a, b in zip(query_vector, candidate_vector))
+        candidate_norm = math.sqrt(sum(b * b for b in candidate_vector))
+        score = dot_product / (query_norm * candidate_norm) if query_norm and candidate_norm else 0.0
+        similarities.append((i, score))
+
+    similarities.sort(key=lambda x: x[1], reverse=True)
+    return similarities[:top_k]
+
+
+def measure(func, repeats: int) -> float:
+    """
+    Среднее время выполнения функции (в миллисекундах)
+    """
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    print(f"{'кандидатов':>12} {'python, мс':>12} {'numpy, мс':>12} {'индекс, мс':>12} {'ускорение':>10}")
+
+    for size in SIZES:
+        candidates = rng.standard_normal((size, DIM), dtype=np.float32)
+        query = rng.standard_normal(DIM, dtype=np.float32)
+
+        candidates_list = candidates.tolist()
+        query_list = query.tolist()
+
+        # прежняя реализация (один прогон, слишком медленная для повторов)
+        python_ms = measure(lambda: python_top_k(query_list, candidates_list, TOP_K), repeats=1)
+
+        # запрос к заранее построенному индексу
+        engine = SimilarityEngine(candidates)
+        numpy_ms = measure(lambda: engine.top_k(query, TOP_K), repeats=50)
+
+        # построение индекса (нормализация) вместе с запросом - как в find_most_similar_by_vector
+        build_ms = measure(lambda: SimilarityEngine(candidates_list).top_k(query_list, TOP_K), repeats=3)
+
+        # проверка совпадения результатов
+        expected = [idx for idx, _ in python_top_k(query_list, candidates_list, TOP_K)] if size <= 10_000 else None
+        if expected is not None:
+            assert expected == [idx for idx, _ in engine.top_k(query, TOP_K)], "Результаты не совпадают"
+
+        print(f"{size:>12} {python_ms:>12.2f} {numpy_ms:>12.3f} {build_ms:>12.2f} {python_ms / numpy_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
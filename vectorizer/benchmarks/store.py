@@ -0,0 +1,74 @@
+""" Бенчмарк переиндексации с постоянным хранилищем векторов: полная векторизация против изменённой доли текстов """
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(".")
+
+from app.config import app_settings
+from app.service import VectorizerService
+from benchmarks.bucketing import build_corpus
+from benchmarks.utils import SyntheticModel
+
+
+async def reindex(texts: list[str], args) -> tuple[float, dict[str, float]]:
+    """
+    Переиндексация корпуса новым экземпляром сервиса (как после перезапуска: кэш в памяти пуст),
+    возвращает время и счётчики хранилища
+    """
+
+    service = VectorizerService(
+        embedding_model=SyntheticModel(call_overhead_ms=args.overhead_ms, per_text_ms=args.per_text_ms)
+    )
+    await service.start()
+
+    try:
+        start = time.perf_counter()
+        for offset in range(0, len(texts), args.batch_size):
+            await service._embed_batch_cached(texts[offset:offset + args.batch_size])  # noqa
+        elapsed = time.perf_counter() - start
+
+        return elapsed, service.store.stats()
+
+    finally:
+        await service.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20_000, help="количество чанков корпуса")
+    parser.add_argument("--changed", type=float, nargs="+", default=[0.0, 0.01, 0.1], help="доля изменённых чанков")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--overhead-ms", type=float, default=8.0, help="накладные расходы вызова модели")
+    parser.add_argument("--per-text-ms", type=float, default=2.0, help="стоимость векторизации одного текста")
+    args = parser.parse_args()
+
+    app_settings.EMBED_STORE_DIR = tempfile.mkdtemp(prefix="vectorizer-store-")
+    app_settings.INDEX_DIR = None
+    app_settings.RERANK_MODEL = None
+    app_settings.WARMUP_BATCH_SIZE = 0
+
+    corpus = build_corpus(args.size, duplicates=0.0)
+    rng = random.Random(42)
+
+    elapsed, stats = await reindex(corpus, args)
+    print(f"{'изменено':>9} {'время,с':>8} {'векторизовано':>14} {'из хранилища':>13}")
+    print(f"{'всё':>9} {elapsed:>8.2f} {stats['store_misses']:>14.0f} {stats['store_hits']:>13.0f}")
+
+    for changed in args.changed:
+        texts = [
+            f"{text} (правка {rng.randrange(10 ** 9)})" if rng.random() < changed else text
+            for text in corpus
+        ]
+        elapsed, stats = await reindex(texts, args)
+        print(f"{changed:>9.0%} {elapsed:>8.2f} {stats['store_misses']:>14.0f} {stats['store_hits']:>13.0f}")
+
+    print(f"размер хранилища: {stats['store_bytes'] / 1024 / 1024:.1f} МБ ({app_settings.EMBED_STORE_DIR})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+""" Микробенчмарк транспорта: задержка одиночного EmbedText через TCP (loopback) и через Unix-сокет """
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import grpc
+
+sys.path.append(".")
+
+from proto import vectorizer_pb2, vectorizer_pb2_grpc
+
+from app.config import app_settings
+from app.processes import ServerProcesses
+from app.service import serve
+from benchmarks.utils import SyntheticModel, percentile
+
+
+async def serve_synthetic(port: int, uds_path: str) -> None:
+    """
+    Процесс сервера с моделью без вычислений: повторяющийся запрос отвечается из кэша,
+    поэтому задержка складывается из транспорта, (де)сериализации и обработки запроса сервером
+    """
+
+    app_settings.GRPC_HOST = "127.0.0.1"
+    app_settings.GRPC_PORT = port
+    app_settings.GRPC_UDS_PATH = uds_path
+    app_settings.INDEX_DIR = None
+    app_settings.RERANK_MODEL = None
+    app_settings.WARMUP_BATCH_SIZE = 0
+
+    await serve(embedding_model=SyntheticModel(call_overhead_ms=0, per_text_ms=0))
+
+
+async def measure(target: str, requests: int, concurrency: int, embedding_format: int) -> tuple[list[float], float]:
+    """
+    Задержки вызовов (в миллисекундах) и пропускная способность (вызовов в секунду)
+    """
+
+    latencies: list[float] = []
+    request = vectorizer_pb2.EmbedTextRequest(text="сколько весит Ан-225", format=embedding_format)  # noqa
+
+    async with grpc.aio.insecure_channel(target) as channel:
+        stub = vectorizer_pb2_grpc.VectorizerServiceStub(channel)
+
+        # прогрев: соединение, кэш сервиса
+        for _ in range(100):
+            await stub.EmbedText(request, wait_for_ready=True)
+
+        async def client(count: int):
+            for _ in range(count):
+                start = time.perf_counter()
+                await stub.EmbedText(request)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latencies, len(latencies) / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--format", choices=["list", "float32"], default="float32", help="формат вектора в ответе")
+    parser.add_argument("--port", type=int, default=50171)
+    args = parser.parse_args()
+
+    embedding_format = {
+        "list": vectorizer_pb2.FORMAT_FLOAT_LIST,  # noqa
+        "float32": vectorizer_pb2.FORMAT_FLOAT32,  # noqa
+    }[args.format]
+
+    uds_path = os.path.join(tempfile.mkdtemp(prefix="vectorizer-"), "grpc.sock")
+    targets = {"tcp": f"127.0.0.1:{args.port}", "unix": f"unix:{uds_path}"}
+
+    server = ServerProcesses(serve_synthetic, (args.port, uds_path), processes=1)
+    server.start()
+
+    try:
+        print(f"{'транспорт':>10} {'клиентов':>9} {'p50,мс':>8} {'p99,мс':>8} {'вызовов/с':>10}")
+        for concurrency in args.concurrency:
+            for name, target in targets.items():
+                latencies, rps = await measure(target, args.requests, concurrency, embedding_format)
+                print(
+                    f"{name:>10} {concurrency:>9} {percentile(latencies, 50):>8.3f} "
+                    f"{percentile(latencies, 99):>8.3f} {rps:>10.0f}"
+                )
+
+    finally:
+        await asyncio.to_thread(server.stop)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
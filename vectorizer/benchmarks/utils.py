@@ -0,0 +1,66 @@
+""" Общие утилиты бенчмарков """
+
+import hashlib
+import time
+
+import numpy as np
+
+from typing import List
+
+
+class SyntheticModel:
+    """
+    Синтетическая модель векторизации с интерфейсом EmbeddingModel.
+
+    Имитирует стоимость вызова модели: фиксированные накладные расходы на вызов плюс стоимость на каждый текст.
+    Ожидание выполняется через time.sleep, который, как и инференс ONNX/PyTorch, освобождает GIL.
+    Дополнительно cpu_per_text_ms имитирует токенизацию и постобработку на Python, удерживающие GIL.
+    """
+
+    def __init__(
+            self,
+            dim: int = 384,
+            call_overhead_ms: float = 8.0,
+            per_text_ms: float = 0.5,
+            cpu_per_text_ms: float = 0.0,
+    ) -> None:
+        self.model = self
+        self.model_lib = "synthetic"
+        self.model_name = "synthetic"
+        self.dim = dim
+        self.call_overhead = call_overhead_ms / 1000
+        self.per_text = per_text_ms / 1000
+        self.cpu_per_text = cpu_per_text_ms / 1000
+        self.calls = 0
+
+    def _vector(self, text: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        time.sleep(self.call_overhead + self.per_text * len(texts))
+
+        # занятость процессора с удержанием GIL
+        deadline = time.perf_counter() + self.cpu_per_text * len(texts)
+        while time.perf_counter() < deadline:
+            pass
+
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        return np.stack([self._vector(text) for text in texts])
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_batch_array(texts).tolist()
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch_array([text])[0].tolist()
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Перцентиль q (0..100) списка значений
+    """
+
+    return float(np.percentile(values, q)) if values else 0.0
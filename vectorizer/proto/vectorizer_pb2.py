@@ -24,23 +24,89 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10vectorizer.proto\x12\nvectorizer\" \n\x10\x45mbedTextRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\"&\n\x11\x45mbedTextResponse\x12\x11\n\tembedding\x18\x01 \x03(\x02\"&\n\x15\x45mbedTextBatchRequest\x12\r\n\x05texts\x18\x01 \x03(\t\"I\n\x16\x45mbedTextBatchResponse\x12/\n\nembeddings\x18\x01 \x03(\x0b\x32\x1b.vectorizer.EmbeddingResult\"$\n\x0f\x45mbeddingResult\x12\x11\n\tembedding\x18\x01 \x03(\x02\x32\xb6\x01\n\x11VectorizerService\x12H\n\tEmbedText\x12\x1c.vectorizer.EmbedTextRequest\x1a\x1d.vectorizer.EmbedTextResponse\x12W\n\x0e\x45mbedTextBatch\x12!.vectorizer.EmbedTextBatchRequest\x1a\".vectorizer.EmbedTextBatchResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10vectorizer.proto\x12\nvectorizer\"y\n\x10PackedEmbeddings\x12+\n\x06\x66ormat\x18\x01 \x01(\x0e\x32\x1b.vectorizer.EmbeddingFormat\x12\r\n\x05\x63ount\x18\x02 \x01(\r\x12\x0b\n\x03\x64im\x18\x03 \x01(\r\x12\x0c\n\x04\x64\x61ta\x18\x04 \x01(\x0c\x12\x0e\n\x06scales\x18\x05 \x03(\x02\"\x86\x01\n\x10\x45mbedTextRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\x12+\n\x06\x66ormat\x18\x02 \x01(\x0e\x32\x1b.vectorizer.EmbeddingFormat\x12\r\n\x05model\x18\x03 \x01(\t\x12\x10\n\x08\x63hunking\x18\x04 \x01(\x08\x12\x16\n\x0ereturn_windows\x18\x05 \x01(\x08\"\x83\x01\n\x11\x45mbedTextResponse\x12\x11\n\tembedding\x18\x01 \x03(\x02\x12,\n\x06packed\x18\x02 \x01(\x0b\x32\x1c.vectorizer.PackedEmbeddings\x12-\n\x07windows\x18\x03 \x01(\x0b\x32\x1c.vectorizer.PackedEmbeddings\"\x9c\x01\n\x15\x45mbedTextBatchRequest\x12\r\n\x05texts\x18\x01 \x03(\t\x12+\n\x06\x66ormat\x18\x02 \x01(\x0e\x32\x1b.vectorizer.EmbeddingFormat\x12\r\n\x05model\x18\x03 \x01(\t\x12\x10\n\x08\x63hunking\x18\x04 \x01(\x08\x12&\n\x08priority\x18\x05 \x01(\x0e\x32\x14.vectorizer.Priority\"w\n\x16\x45mbedTextBatchResponse\x12/\n\nembeddings\x18\x01 \x03(\x0b\x32\x1b.vectorizer.EmbeddingResult\x12,\n\x06packed\x18\x02 \x01(\x0b\x32\x1c.vectorizer.PackedEmbeddings\"$\n\x0f\x45mbeddingResult\x12\x11\n\tembedding\x18\x01 \x03(\x02\"n\n\x16\x45mbedTextStreamRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12+\n\x06\x66ormat\x18\x03 \x01(\x0e\x32\x1b.vectorizer.EmbeddingFormat\x12\r\n\x05model\x18\x04 \x01(\t\"T\n\x17\x45mbedTextStreamResponse\x12\x0b\n\x03ids\x18\x01 \x03(\t\x12,\n\x06packed\x18\x02 \x01(\x0b\x32\x1c.vectorizer.PackedEmbeddings\"\x11\n\x0fGetStatsRequest\"x\n\x10GetStatsResponse\x12\x36\n\x05stats\x18\x01 \x03(\x0b\x32\'.vectorizer.GetStatsResponse.StatsEntry\x1a,\n\nStatsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"\x9d\x01\n\tIndexItem\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12\x0e\n\x06vector\x18\x03 \x03(\x02\x12\x35\n\x08metadata\x18\x04 \x03(\x0b\x32#.vectorizer.IndexItem.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"{\n\rUpsertRequest\x12\r\n\x05index\x18\x01 \x01(\t\x12$\n\x05items\x18\x02 \x03(\x0b\x32\x15.vectorizer.IndexItem\x12\r\n\x05model\x18\x03 \x01(\t\x12&\n\x08priority\x18\x04 \x01(\x0e\x32\x14.vectorizer.Priority\"0\n\x0eUpsertResponse\x12\x10\n\x08upserted\x18\x01 \x01(\r\x12\x0c\n\x04size\x18\x02 \x01(\r\"\x91\x01\n\rDeleteRequest\x12\r\n\x05index\x18\x01 \x01(\t\x12\x0b\n\x03ids\x18\x02 \x03(\t\x12\x35\n\x06\x66ilter\x18\x03 \x03(\x0b\x32%.vectorizer.DeleteRequest.FilterEntry\x1a-\n\x0b\x46ilterEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"/\n\x0e\x44\x65leteResponse\x12\x0f\n\x07\x64\x65leted\x18\x01 \x01(\r\x12\x0c\n\x04size\x18\x02 \x01(\r\"\xc1\x01\n\rSearchRequest\x12\r\n\x05index\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12\x0e\n\x06vector\x18\x03 \x03(\x02\x12\r\n\x05top_k\x18\x04 \x01(\r\x12\x35\n\x06\x66ilter\x18\x05 \x03(\x0b\x32%.vectorizer.SearchRequest.FilterEntry\x12\x0e\n\x06nprobe\x18\x06 \x01(\r\x1a-\n\x0b\x46ilterEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x8e\x01\n\tSearchHit\x12\n\n\x02id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\x12\x35\n\x08metadata\x18\x03 \x03(\x0b\x32#.vectorizer.SearchHit.MetadataEntry\x1a/\n\rMetadataEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"5\n\x0eSearchResponse\x12#\n\x04hits\x18\x01 \x03(\x0b\x32\x15.vectorizer.SearchHit\"K\n\x0bListRequest\x12\r\n\x05index\x18\x01 \x01(\t\x12\x0e\n\x06\x66ields\x18\x02 \x03(\t\x12\x0e\n\x06offset\x18\x03 \x01(\r\x12\r\n\x05limit\x18\x04 \x01(\r\"B\n\x0cListResponse\x12$\n\x05items\x18\x01 \x03(\x0b\x32\x15.vectorizer.IndexItem\x12\x0c\n\x04size\x18\x02 \x01(\r\"A\n\rRerankRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\x12\n\ncandidates\x18\x02 \x03(\t\x12\r\n\x05top_k\x18\x03 \x01(\r\")\n\tRerankHit\x12\r\n\x05index\x18\x01 \x01(\r\x12\r\n\x05score\x18\x02 \x01(\x02\"5\n\x0eRerankResponse\x12#\n\x04hits\x18\x01 \x03(\x0b\x32\x15.vectorizer.RerankHit\"^\n\x15StartMigrationRequest\x12\r\n\x05index\x18\x01 \x01(\t\x12\r\n\x05model\x18\x02 \x01(\t\x12\x12\n\ntext_field\x18\x03 \x01(\t\x12\x13\n\x0b\x64rop_source\x18\x04 \x01(\x08\"$\n\x13GetMigrationRequest\x12\r\n\x05index\x18\x01 \x01(\t\"\xe7\x01\n\x0fMigrationStatus\x12\r\n\x05index\x18\x01 \x01(\t\x12\x0e\n\x06source\x18\x02 \x01(\t\x12\x0e\n\x06target\x18\x03 \x01(\t\x12\r\n\x05model\x18\x04 \x01(\t\x12\r\n\x05state\x18\x05 \x01(\t\x12\r\n\x05total\x18\x06 \x01(\r\x12\x11\n\tprocessed\x18\x07 \x01(\r\x12\x0e\n\x06passes\x18\x08 \x01(\r\x12\x18\n\x10texts_per_second\x18\t \x01(\x02\x12\x17\n\x0f\x65lapsed_seconds\x18\n \x01(\x02\x12\x13\n\x0b\x65ta_seconds\x18\x0b \x01(\x02\x12\r\n\x05\x65rror\x18\x0c \x01(\t*a\n\x0f\x45mbeddingFormat\x12\x15\n\x11\x46ORMAT_FLOAT_LIST\x10\x00\x12\x12\n\x0e\x46ORMAT_FLOAT32\x10\x01\x12\x12\n\x0e\x46ORMAT_FLOAT16\x10\x02\x12\x0f\n\x0b\x46ORMAT_INT8\x10\x03*J\n\x08Priority\x12\x11\n\rPRIORITY_AUTO\x10\x00\x12\x18\n\x14PRIORITY_INTERACTIVE\x10\x01\x12\x11\n\rPRIORITY_BULK\x10\x02\x32\xbc\x06\n\x11VectorizerService\x12H\n\tEmbedText\x12\x1c.vectorizer.EmbedTextRequest\x1a\x1d.vectorizer.EmbedTextResponse\x12W\n\x0e\x45mbedTextBatch\x12!.vectorizer.EmbedTextBatchRequest\x1a\".vectorizer.EmbedTextBatchResponse\x12^\n\x0f\x45mbedTextStream\x12\".vectorizer.EmbedTextStreamRequest\x1a#.vectorizer.EmbedTextStreamResponse(\x01\x30\x01\x12\x45\n\x08GetStats\x12\x1b.vectorizer.GetStatsRequest\x1a\x1c.vectorizer.GetStatsResponse\x12?\n\x06Upsert\x12\x19.vectorizer.UpsertRequest\x1a\x1a.vectorizer.UpsertResponse\x12?\n\x06\x44\x65lete\x12\x19.vectorizer.DeleteRequest\x1a\x1a.vectorizer.DeleteResponse\x12?\n\x06Search\x12\x19.vectorizer.SearchRequest\x1a\x1a.vectorizer.SearchResponse\x12\x39\n\x04List\x12\x17.vectorizer.ListRequest\x1a\x18.vectorizer.ListResponse\x12?\n\x06Rerank\x12\x19.vectorizer.RerankRequest\x1a\x1a.vectorizer.RerankResponse\x12P\n\x0eStartMigration\x12!.vectorizer.StartMigrationRequest\x1a\x1b.vectorizer.MigrationStatus\x12L\n\x0cGetMigration\x12\x1f.vectorizer.GetMigrationRequest\x1a\x1b.vectorizer.MigrationStatusb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'vectorizer_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_EMBEDTEXTREQUEST']._serialized_start=32
-  _globals['_EMBEDTEXTREQUEST']._serialized_end=64
-  _globals['_EMBEDTEXTRESPONSE']._serialized_start=66
-  _globals['_EMBEDTEXTRESPONSE']._serialized_end=104
-  _globals['_EMBEDTEXTBATCHREQUEST']._serialized_start=106
-  _globals['_EMBEDTEXTBATCHREQUEST']._serialized_end=144
-  _globals['_EMBEDTEXTBATCHRESPONSE']._serialized_start=146
-  _globals['_EMBEDTEXTBATCHRESPONSE']._serialized_end=219
-  _globals['_EMBEDDINGRESULT']._serialized_start=221
-  _globals['_EMBEDDINGRESULT']._serialized_end=257
-  _globals['_VECTORIZERSERVICE']._serialized_start=260
-  _globals['_VECTORIZERSERVICE']._serialized_end=442
+  _globals['_GETSTATSRESPONSE_STATSENTRY']._loaded_options = None
+  _globals['_GETSTATSRESPONSE_STATSENTRY']._serialized_options = b'8\001'
+  _globals['_INDEXITEM_METADATAENTRY']._loaded_options = None
+  _globals['_INDEXITEM_METADATAENTRY']._serialized_options = b'8\001'
+  _globals['_DELETEREQUEST_FILTERENTRY']._loaded_options = None
+  _globals['_DELETEREQUEST_FILTERENTRY']._serialized_options = b'8\001'
+  _globals['_SEARCHREQUEST_FILTERENTRY']._loaded_options = None
+  _globals['_SEARCHREQUEST_FILTERENTRY']._serialized_options = b'8\001'
+  _globals['_SEARCHHIT_METADATAENTRY']._loaded_options = None
+  _globals['_SEARCHHIT_METADATAENTRY']._serialized_options = b'8\001'
+  _globals['_EMBEDDINGFORMAT']._serialized_start=2689
+  _globals['_EMBEDDINGFORMAT']._serialized_end=2786
+  _globals['_PRIORITY']._serialized_start=2788
+  _globals['_PRIORITY']._serialized_end=2862
+  _globals['_PACKEDEMBEDDINGS']._serialized_start=32
+  _globals['_PACKEDEMBEDDINGS']._serialized_end=153
+  _globals['_EMBEDTEXTREQUEST']._serialized_start=156
+  _globals['_EMBEDTEXTREQUEST']._serialized_end=290
+  _globals['_EMBEDTEXTRESPONSE']._serialized_start=293
+  _globals['_EMBEDTEXTRESPONSE']._serialized_end=424
+  _globals['_EMBEDTEXTBATCHREQUEST']._serialized_start=427
+  _globals['_EMBEDTEXTBATCHREQUEST']._serialized_end=583
+  _globals['_EMBEDTEXTBATCHRESPONSE']._serialized_start=585
+  _globals['_EMBEDTEXTBATCHRESPONSE']._serialized_end=704
+  _globals['_EMBEDDINGRESULT']._serialized_start=706
+  _globals['_EMBEDDINGRESULT']._serialized_end=742
+  _globals['_EMBEDTEXTSTREAMREQUEST']._serialized_start=744
+  _globals['_EMBEDTEXTSTREAMREQUEST']._serialized_end=854
+  _globals['_EMBEDTEXTSTREAMRESPONSE']._serialized_start=856
+  _globals['_EMBEDTEXTSTREAMRESPONSE']._serialized_end=940
+  _globals['_GETSTATSREQUEST']._serialized_start=942
+  _globals['_GETSTATSREQUEST']._serialized_end=959
+  _globals['_GETSTATSRESPONSE']._serialized_start=961
+  _globals['_GETSTATSRESPONSE']._serialized_end=1081
+  _globals['_GETSTATSRESPONSE_STATSENTRY']._serialized_start=1037
+  _globals['_GETSTATSRESPONSE_STATSENTRY']._serialized_end=1081
+  _globals['_INDEXITEM']._serialized_start=1084
+  _globals['_INDEXITEM']._serialized_end=1241
+  _globals['_INDEXITEM_METADATAENTRY']._serialized_start=1194
+  _globals['_INDEXITEM_METADATAENTRY']._serialized_end=1241
+  _globals['_UPSERTREQUEST']._serialized_start=1243
+  _globals['_UPSERTREQUEST']._serialized_end=1366
+  _globals['_UPSERTRESPONSE']._serialized_start=1368
+  _globals['_UPSERTRESPONSE']._serialized_end=1416
+  _globals['_DELETEREQUEST']._serialized_start=1419
+  _globals['_DELETEREQUEST']._serialized_end=1564
+  _globals['_DELETEREQUEST_FILTERENTRY']._serialized_start=1519
+  _globals['_DELETEREQUEST_FILTERENTRY']._serialized_end=1564
+  _globals['_DELETERESPONSE']._serialized_start=1566
+  _globals['_DELETERESPONSE']._serialized_end=1613
+  _globals['_SEARCHREQUEST']._serialized_start=1616
+  _globals['_SEARCHREQUEST']._serialized_end=1809
+  _globals['_SEARCHREQUEST_FILTERENTRY']._serialized_start=1519
+  _globals['_SEARCHREQUEST_FILTERENTRY']._serialized_end=1564
+  _globals['_SEARCHHIT']._serialized_start=1812
+  _globals['_SEARCHHIT']._serialized_end=1954
+  _globals['_SEARCHHIT_METADATAENTRY']._serialized_start=1194
+  _globals['_SEARCHHIT_METADATAENTRY']._serialized_end=1241
+  _globals['_SEARCHRESPONSE']._serialized_start=1956
+  _globals['_SEARCHRESPONSE']._serialized_end=2009
+  _globals['_LISTREQUEST']._serialized_start=2011
+  _globals['_LISTREQUEST']._serialized_end=2086
+  _globals['_LISTRESPONSE']._serialized_start=2088
+  _globals['_LISTRESPONSE']._serialized_end=2154
+  _globals['_RERANKREQUEST']._serialized_start=2156
+  _globals['_RERANKREQUEST']._serialized_end=2221
+  _globals['_RERANKHIT']._serialized_start=2223
+  _globals['_RERANKHIT']._serialized_end=2264
+  _globals['_RERANKRESPONSE']._serialized_start=2266
+  _globals['_RERANKRESPONSE']._serialized_end=2319
+  _globals['_STARTMIGRATIONREQUEST']._serialized_start=2321
+  _globals['_STARTMIGRATIONREQUEST']._serialized_end=2415
+  _globals['_GETMIGRATIONREQUEST']._serialized_start=2417
+  _globals['_GETMIGRATIONREQUEST']._serialized_end=2453
+  _globals['_MIGRATIONSTATUS']._serialized_start=2456
+  _globals['_MIGRATIONSTATUS']._serialized_end=2687
+  _globals['_VECTORIZERSERVICE']._serialized_start=2865
+  _globals['_VECTORIZERSERVICE']._serialized_end=3693
 # @@protoc_insertion_point(module_scope)
@@ -44,6 +44,51 @@ class VectorizerServiceStub(object):
                 request_serializer=vectorizer__pb2.EmbedTextBatchRequest.SerializeToString,
                 response_deserializer=vectorizer__pb2.EmbedTextBatchResponse.FromString,
                 _registered_method=True)
+        self.EmbedTextStream = channel.stream_stream(
+                '/vectorizer.VectorizerService/EmbedTextStream',
+                request_serializer=vectorizer__pb2.EmbedTextStreamRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.EmbedTextStreamResponse.FromString,
+                _registered_method=True)
+        self.GetStats = channel.unary_unary(
+                '/vectorizer.VectorizerService/GetStats',
+                request_serializer=vectorizer__pb2.GetStatsRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.GetStatsResponse.FromString,
+                _registered_method=True)
+        self.Upsert = channel.unary_unary(
+                '/vectorizer.VectorizerService/Upsert',
+                request_serializer=vectorizer__pb2.UpsertRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.UpsertResponse.FromString,
+                _registered_method=True)
+        self.Delete = channel.unary_unary(
+                '/vectorizer.VectorizerService/Delete',
+                request_serializer=vectorizer__pb2.DeleteRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.DeleteResponse.FromString,
+                _registered_method=True)
+        self.Search = channel.unary_unary(
+                '/vectorizer.VectorizerService/Search',
+                request_serializer=vectorizer__pb2.SearchRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.SearchResponse.FromString,
+                _registered_method=True)
+        self.List = channel.unary_unary(
+                '/vectorizer.VectorizerService/List',
+                request_serializer=vectorizer__pb2.ListRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.ListResponse.FromString,
+                _registered_method=True)
+        self.Rerank = channel.unary_unary(
+                '/vectorizer.VectorizerService/Rerank',
+                request_serializer=vectorizer__pb2.RerankRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.RerankResponse.FromString,
+                _registered_method=True)
+        self.StartMigration = channel.unary_unary(
+                '/vectorizer.VectorizerService/StartMigration',
+                request_serializer=vectorizer__pb2.StartMigrationRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.MigrationStatus.FromString,
+                _registered_method=True)
+        self.GetMigration = channel.unary_unary(
+                '/vectorizer.VectorizerService/GetMigration',
+                request_serializer=vectorizer__pb2.GetMigrationRequest.SerializeToString,
+                response_deserializer=vectorizer__pb2.MigrationStatus.FromString,
+                _registered_method=True)
 
 
 class VectorizerServiceServicer(object):
@@ -61,6 +106,60 @@ class VectorizerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def EmbedTextStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetStats(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Upsert(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Delete(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Search(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def List(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Rerank(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StartMigration(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetMigration(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_VectorizerServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -74,6 +173,51 @@ def add_VectorizerServiceServicer_to_server(servicer, server):
                     request_deserializer=vectorizer__pb2.EmbedTextBatchRequest.FromString,
                     response_serializer=vectorizer__pb2.EmbedTextBatchResponse.SerializeToString,
             ),
+            'EmbedTextStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.EmbedTextStream,
+                    request_deserializer=vectorizer__pb2.EmbedTextStreamRequest.FromString,
+                    response_serializer=vectorizer__pb2.EmbedTextStreamResponse.SerializeToString,
+            ),
+            'GetStats': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetStats,
+                    request_deserializer=vectorizer__pb2.GetStatsRequest.FromString,
+                    response_serializer=vectorizer__pb2.GetStatsResponse.SerializeToString,
+            ),
+            'Upsert': grpc.unary_unary_rpc_method_handler(
+                    servicer.Upsert,
+                    request_deserializer=vectorizer__pb2.UpsertRequest.FromString,
+                    response_serializer=vectorizer__pb2.UpsertResponse.SerializeToString,
+            ),
+            'Delete': grpc.unary_unary_rpc_method_handler(
+                    servicer.Delete,
+                    request_deserializer=vectorizer__pb2.DeleteRequest.FromString,
+                    response_serializer=vectorizer__pb2.DeleteResponse.SerializeToString,
+            ),
+            'Search': grpc.unary_unary_rpc_method_handler(
+                    servicer.Search,
+                    request_deserializer=vectorizer__pb2.SearchRequest.FromString,
+                    response_serializer=vectorizer__pb2.SearchResponse.SerializeToString,
+            ),
+            'List': grpc.unary_unary_rpc_method_handler(
+                    servicer.List,
+                    request_deserializer=vectorizer__pb2.ListRequest.FromString,
+                    response_serializer=vectorizer__pb2.ListResponse.SerializeToString,
+            ),
+            'Rerank': grpc.unary_unary_rpc_method_handler(
+                    servicer.Rerank,
+                    request_deserializer=vectorizer__pb2.RerankRequest.FromString,
+                    response_serializer=vectorizer__pb2.RerankResponse.SerializeToString,
+            ),
+            'StartMigration': grpc.unary_unary_rpc_method_handler(
+                    servicer.StartMigration,
+                    request_deserializer=vectorizer__pb2.StartMigrationRequest.FromString,
+                    response_serializer=vectorizer__pb2.MigrationStatus.SerializeToString,
+            ),
+            'GetMigration': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetMigration,
+                    request_deserializer=vectorizer__pb2.GetMigrationRequest.FromString,
+                    response_serializer=vectorizer__pb2.MigrationStatus.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'vectorizer.VectorizerService', rpc_method_handlers)
@@ -138,3 +282,246 @@ class VectorizerService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def EmbedTextStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/vectorizer.VectorizerService/EmbedTextStream',
+            vectorizer__pb2.EmbedTextStreamRequest.SerializeToString,
+            vectorizer__pb2.EmbedTextStreamResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetStats(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/GetStats',
+            vectorizer__pb2.GetStatsRequest.SerializeToString,
+            vectorizer__pb2.GetStatsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Upsert(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/Upsert',
+            vectorizer__pb2.UpsertRequest.SerializeToString,
+            vectorizer__pb2.UpsertResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Delete(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/Delete',
+            vectorizer__pb2.DeleteRequest.SerializeToString,
+            vectorizer__pb2.DeleteResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Search(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/Search',
+            vectorizer__pb2.SearchRequest.SerializeToString,
+            vectorizer__pb2.SearchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def List(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/List',
+            vectorizer__pb2.ListRequest.SerializeToString,
+            vectorizer__pb2.ListResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Rerank(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/Rerank',
+            vectorizer__pb2.RerankRequest.SerializeToString,
+            vectorizer__pb2.RerankResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StartMigration(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/StartMigration',
+            vectorizer__pb2.StartMigrationRequest.SerializeToString,
+            vectorizer__pb2.MigrationStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetMigration(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/vectorizer.VectorizerService/GetMigration',
+            vectorizer__pb2.GetMigrationRequest.SerializeToString,
+            vectorizer__pb2.MigrationStatus.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,16 +1,25 @@
-import asyncio
+import time
 
-from asyncio import CancelledError
+# время импорта модулей (включая библиотеки моделей) - часть времени запуска сервиса
+_import_started = time.perf_counter()
 
-from app.bot import bot_services
-from app.logs_handlers import add_logging_handler
-from app.rmq_manager import app_rmq_manager
-from app.service import serve
-from app.logs import app_logger
+import asyncio  # noqa: E402
+
+from asyncio import CancelledError  # noqa: E402
+
+from app.bot import bot_services  # noqa: E402
+from app.config import app_settings  # noqa: E402
+from app.logs_handlers import add_logging_handler  # noqa: E402
+from app.processes import ServerProcesses  # noqa: E402
+from app.rmq_manager import app_rmq_manager  # noqa: E402
+from app.service import serve  # noqa: E402
+from app.logs import app_logger  # noqa: E402
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 
 async def main():
-    app_logger.info(f"Starting gRPC service")
+    app_logger.info(f"Starting gRPC service (imports: {IMPORT_SECONDS:.2f}s)")
     try:
         if app_rmq_manager.url:
             await app_rmq_manager.start()
@@ -19,7 +28,11 @@ async def main():
             app_logger.info("RabbitMQ connected")
 
         await bot_services.send_info("Сервис запущен 🟢")
-        await serve()
+        if app_settings.SERVER_PROCESSES > 1:
+            # несколько процессов сервера на одном порту, текущий процесс только наблюдает за ними
+            await ServerProcesses(serve, (IMPORT_SECONDS,), app_settings.SERVER_PROCESSES).run()
+        else:
+            await serve(import_seconds=IMPORT_SECONDS)
 
     except (KeyboardInterrupt, CancelledError):
         app_logger.info("Stopping gRPC service")
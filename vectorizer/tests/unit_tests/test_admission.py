@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+
+from app.admission import AdmissionController, AdmissionRejected, Priority
+
+
+def make_admission(max_in_flight: int = 1) -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=max_in_flight,
+        bulk_max_in_flight=max_in_flight,
+        queue_limits={Priority.interactive: 1, Priority.bulk: 1},
+        max_wait_ms=1000,
+    )
+
+
+async def test_queue_limit():
+    admission = make_admission()
+
+    async with admission.admit(Priority.interactive):
+        waiter = asyncio.create_task(admission.admit(Priority.interactive).__aenter__())
+        await asyncio.sleep(0)
+
+        # очередь приоритета заполнена: запрос отклоняется сразу с оценкой времени повтора
+        with pytest.raises(AdmissionRejected) as ex:
+            async with admission.admit(Priority.interactive):
+                pass
+        assert ex.value.retry_after_ms >= admission.min_retry_after_ms
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    assert admission.in_flight == 0
+
+
+async def test_abandon_after_grant():
+    admission = make_admission()
+
+    async def wait_admission():
+        async with admission.admit(Priority.interactive):
+            pass
+
+    holder = admission.admit(Priority.interactive)
+    await holder.__aenter__()
+
+    waiter = asyncio.create_task(wait_admission())
+    await asyncio.sleep(0)
+    assert admission.stats()["admission_interactive_queue"] == 1
+
+    # освобождение выдаёт ёмкость ожидающему запросу, который отменяется до возобновления
+    await holder.__aexit__(None, None, None)
+    assert admission.in_flight == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    # выданная ёмкость возвращена, следующий запрос допускается без очереди
+    assert admission.in_flight == 0
+    async with admission.admit(Priority.interactive):
+        assert admission.in_flight == 1
+
+
+async def test_interactive_before_bulk():
+    admission = make_admission()
+    order = []
+
+    async def request(priority: int):
+        async with admission.admit(priority, wait=True):
+            order.append(priority)
+
+    async with admission.admit(Priority.interactive):
+        bulk = asyncio.create_task(request(Priority.bulk))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(request(Priority.interactive))
+        await asyncio.sleep(0)
+
+    await asyncio.gather(bulk, interactive)
+    assert order == [Priority.interactive, Priority.bulk]
@@ -0,0 +1,46 @@
+import numpy as np
+
+from app.index import VectorIndex
+
+
+def test_delete_and_refresh_across_instances(tmp_path):
+    rng = np.random.default_rng(1)
+    writer = VectorIndex(path=str(tmp_path), train_min=50)
+    writer.upsert(
+        [f"id{i}" for i in range(40)],
+        rng.normal(size=(40, 8)),
+        [{"group": str(i % 3)} for i in range(40)],
+        model="model",
+    )
+
+    reader = VectorIndex.load(str(tmp_path), train_min=50)
+    assert reader.ids == writer.ids and reader.model == "model"
+
+    # добавление (с обучением IVF) и удаление по идентификаторам и метаданным видны после refresh
+    writer.upsert([f"id{i}" for i in range(40, 120)], rng.normal(size=(80, 8)), [{"group": "x"}] * 80)
+    assert writer.delete(["id3", "id100"]) == 2
+    writer.delete(metadata_filter={"group": "1"})
+
+    reader.refresh()
+    assert reader.ids == writer.ids and reader.size == writer.size
+    assert reader.centroids is not None
+    assert [reader.get_metadata(row) for row in range(reader.size)] == [
+        writer.get_metadata(row) for row in range(writer.size)
+    ]
+
+    query = rng.normal(size=8)
+    assert [hit[0] for hit in reader.search(query, 5)] == [hit[0] for hit in writer.search(query, 5)]
+
+    # запись второго экземпляра видна первому
+    vector = rng.normal(size=8)
+    reader.upsert(["new"], [vector], [{"group": "z"}])
+    assert writer.search(vector, 1)[0][0] == "new"
+    assert dict(writer.items(fields=["group"]))["new"] == {"group": "z"}
+
+
+def test_items_pages(tmp_path):
+    index = VectorIndex(path=str(tmp_path))
+    index.upsert(["a", "b", "c"], np.eye(3), [{"text": "a", "hash": "1"}, {"hash": "2"}, {"text": "c"}])
+
+    assert index.items(offset=1, limit=1) == [("b", {"hash": "2"})]
+    assert index.items(fields=["hash"]) == [("a", {"hash": "1"}), ("b", {"hash": "2"}), ("c", {})]
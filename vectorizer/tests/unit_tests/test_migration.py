@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.index import IndexStore
+from app.migration import IndexMigration, MigrationState
+
+
+async def embed(texts: list[str], model: str) -> list[np.ndarray]:
+    return [np.array([len(text), 1, 0], dtype=np.float32) for text in texts]
+
+
+async def test_alias_switch(tmp_path):
+    indexes = IndexStore(root=str(tmp_path), train_min=1000)
+    indexes.get("docs", create=True).upsert(
+        ["a", "b"], [[1, 0, 0], [0, 1, 0]], [{"text": "first"}, {"text": "second text"}], model="old"
+    )
+
+    migration = IndexMigration(indexes, "docs", "new", embed, drop_source=True)
+    await migration.run()
+
+    # псевдоним указывает на новую версию, построенную новой моделью, прежняя удалена
+    assert migration.state == MigrationState.completed and migration.processed == 2
+    assert migration.source == "docs" and indexes.resolve("docs") == migration.target
+    assert not (tmp_path / "docs").exists()
+
+    index = indexes.get("docs")
+    assert index.model == "new"
+    assert dict(index.items()) == {"a": {"text": "first"}, "b": {"text": "second text"}}
+
+    # другой экземпляр хранилища (другой процесс сервиса) читает новую версию через псевдоним
+    other = IndexStore(root=str(tmp_path), train_min=1000)
+    assert other.get("docs").search([11, 1, 0], 1)[0][0] == "b"
+
+
+async def test_records_without_text(tmp_path):
+    indexes = IndexStore(root=str(tmp_path), train_min=1000)
+    indexes.get("docs", create=True).upsert(["a"], [[1, 0, 0]], [{"title": "no text"}])
+
+    migration = IndexMigration(indexes, "docs", "new", embed)
+    await migration.run()
+
+    # перенос не выполняется, псевдоним не меняется
+    assert migration.state == MigrationState.failed and "text" in migration.error
+    assert indexes.resolve("docs") == "docs"
@@ -0,0 +1,36 @@
+import numpy as np
+import os
+
+from app.store import KEY_SIZE, STORE_KEYS_FILE, STORE_VECTORS_FILE, EmbeddingStore, ModelEmbeddings
+
+
+def test_torn_tail_truncation(tmp_path):
+    store = ModelEmbeddings(str(tmp_path), "model")
+    assert store.put_many([b"a" * KEY_SIZE, b"b" * KEY_SIZE], np.array([[1, 0], [0, 1]])) == 2
+
+    # аварийное завершение: вектор дописан без ключа, ключ дописан не полностью
+    with open(tmp_path / STORE_VECTORS_FILE, "ab") as f:
+        f.write(np.array([5, 5], dtype=np.float32).tobytes())
+    with open(tmp_path / STORE_KEYS_FILE, "ab") as f:
+        f.write(b"c" * 10)
+
+    reopened = ModelEmbeddings(str(tmp_path), "model")
+    assert reopened.get_many([b"a" * KEY_SIZE, b"c" * KEY_SIZE])[1] is None
+
+    # лишний хвост отбрасывается перед дописыванием, новая запись не смещается
+    assert reopened.put_many([b"c" * KEY_SIZE], np.array([[2, 3]])) == 1
+    assert os.path.getsize(tmp_path / STORE_KEYS_FILE) == 3 * KEY_SIZE
+
+    vectors = ModelEmbeddings(str(tmp_path), "model").get_many([b"a" * KEY_SIZE, b"b" * KEY_SIZE, b"c" * KEY_SIZE])
+    assert [vector.tolist() for vector in vectors] == [[1, 0], [0, 1], [2, 3]]
+
+
+def test_variant_per_model(tmp_path):
+    store = EmbeddingStore(str(tmp_path), variant=lambda model_name: "int8" if model_name == "default" else "none")
+    store.put_many("default", ["text"], np.array([[1, 0]]))
+
+    assert store.get_many("default", ["text"])[0].tolist() == [1, 0]
+    assert store.get_many("other", ["text"]) == [None]
+
+    # векторы модели с другой квантизацией хранятся отдельно
+    assert EmbeddingStore(str(tmp_path), variant=lambda model_name: "none").get_many("default", ["text"]) == [None]